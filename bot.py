@@ -1,4 +1,5 @@
 import json
+import logging
 import os
 from abc import ABC
 
@@ -6,12 +7,15 @@ import aiohttp
 import discord
 from discord.ext import commands
 
+from utils.cases import CASE_LEDGER
 from utils.functions import send_to_dm_log
+from utils.logs import LOGS
+from utils.pipeline import MessagePipeline
+from utils.suggestions import SUGGESTIONS
 from utils.views import ReportView, Ticket, Close, Role1, Role2, Role3, Role4, Role5, Pronouns, Allevents
 from utils.variables import *
 
-import sys
-import traceback
+log = logging.getLogger("bot")
 
 INITIAL_EXTENSIONS = [
     "cogs.mod",
@@ -48,13 +52,14 @@ class TMS(commands.Bot, ABC):
         self.persistent_views_added = False
         self.session = aiohttp.ClientSession(loop=self.loop)
         self.owner_id = 747126643587416174
+        self.pipeline = MessagePipeline()
+        self.pipeline.register("commands", self.run_commands)
 
         for extension in INITIAL_EXTENSIONS:
             try:
                 self.load_extension(extension)
-            except all:
-                print(f'Failed to load extension {extension}', file=sys.stderr)
-                traceback.print_exc()
+            except Exception:
+                log.exception("Failed to load extension %s", extension)
 
     async def on_ready(self):
         if not self.persistent_views_added:
@@ -69,19 +74,19 @@ class TMS(commands.Bot, ABC):
             self.add_view(Ticket(bot))
             self.add_view(Close(bot))
             self.persistent_views_added = True
-        print(f'{bot.user} has connected!')
-        print(f'Logged in as {self.user} (ID: {self.user.id})')
-        print("discord.py v" + discord.__version__)
+        await CASE_LEDGER.connect()
+        await SUGGESTIONS.connect()
+        log.info("Logged in as %s (ID: %s), discord.py v%s", self.user, self.user.id, discord.__version__)
 
     async def on_error(
             self, event, *args, **kwargs
     ) -> None:
-        print(traceback.format_exc())
+        log.exception("Unhandled error in %s", event)
 
     async def on_application_command_error(
             self, ctx: discord.ApplicationContext, exception: discord.DiscordException
     ) -> None:
-        print(exception)
+        log.warning("Error in /%s: %s", ctx.command, exception)
         try:
             await ctx.defer()
             await ctx.respond(exception)
@@ -106,14 +111,14 @@ class TMS(commands.Bot, ABC):
         if type(message.channel) == discord.DMChannel:
             await send_to_dm_log(bot, message)
 
-        if message.author.id in TMS_BOT_IDS:
+        if message.author.id in TMS_BOT_IDS or message.author.bot:
             return
 
-        censor_cog = bot.get_cog("Censor")  # Censor
-        await censor_cog.on_message(message)
+        # Censor, spam checks and commands are registered as pipeline stages
+        await self.pipeline.process(message)
 
-        spam = bot.get_cog("SpamManager")  # Spamming
-        await spam.store_and_validate(message)
+    async def run_commands(self, normalized):
+        await self.process_commands(normalized.message)
 
     def run(self):
         super().run(os.environ['TOKEN'], reconnect=True)
@@ -121,12 +126,14 @@ class TMS(commands.Bot, ABC):
     async def close(self):
         await self.session.close()
         await super().close()
+        LOGS.stop()
 
 
 bot = TMS()
 
 
 def main():
+    LOGS.start()
     bot.run()
 
 
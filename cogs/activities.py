@@ -1,23 +1,123 @@
+import asyncio
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
 import discord
 from discord.ext import commands
 from discord.http import Route
 from utils.variables import SERVER_ID
-from discord import slash_command
+from discord import Option, slash_command
 
 
 # CREDIT - https://github.com/aikaterna/aikaterna-cogs/tree/v3/discordexperiments
 
+# Activity choice -> (application ID, name shown in the invite)
+ACTIVITIES: Dict[str, Tuple[int, str]] = {
+    "ytparty": (880218394199220334, "YouTube Together"),
+    "ytpartyold": (755600276941176913, "YouTube Together (Old Version)"),
+    "ytpartydev": (880218832743055411, "YouTube Together (Dev Version)"),
+    "betrayal": (773336526917861400, "the Betrayal game"),
+    "fishington": (814288819477020702, "the Fishington game"),
+    "chess": (832012774040141894, "Chess in the Park"),
+    "chessdev": (832012586023256104, "Chess in the Park (Dev Version)"),
+    "doodlecrew": (878067389634314250, "the Doodle Crew game"),
+    "doodlecrewdev": (878067427668275241, "the Doodle Crew game (Dev Version)"),
+    "lettertile": (879863686565621790, "the Letter Tile game"),
+    "wordsnacks": (879863976006127627, "the Word Snacks game"),
+    "wordsnacksdev": (879864010126786570, "the Word Snacks game (Dev Version)"),
+    "spellcast": (852509694341283871, "the SpellCast game"),
+    "checkers": (832013003968348200, "Checkers in the Park"),
+    "sketchy": (879864070101172255, "the Sketchy Artist game"),
+    "sketchydev": (879864104980979792, "the Sketchy Artist game (Dev Version)"),
+    "awkword": (879863881349087252, "the Awkword game"),
+    "decodersdev": (891001866073296967, "the Decoders game (Dev Version)"),
+}
+
+DEFAULT_MAX_AGE = 86400
+# Discord's longest expiring invite; 0 makes a permanent one
+MAX_INVITE_AGE = 604800
+# A cached invite is reused while its remaining lifetime is within this fraction (or minimum) of what was requested
+REUSE_TOLERANCE = 0.1
+MIN_REUSE_TOLERANCE = 60
+
+InviteKey = Tuple[int, int, int]  # (voice channel, application, max age)
+
+
+class CachedInvite(NamedTuple):
+    code: str
+    expires_at: Optional[float]  # monotonic time, or None for a permanent invite
+
+    def usable_for(self, max_age: int, now: float) -> bool:
+        if self.expires_at is None:
+            return max_age == 0
+        return self.expires_at - now >= max_age - max(MIN_REUSE_TOLERANCE, max_age * REUSE_TOLERANCE)
+
+
+class InviteCache:
+    """
+    Activity invites keyed by (voice channel, application, max age), reused while they still have close to the
+    requested lifetime left. Concurrent requests for the same key share a single invite request instead of each
+    creating an invite.
+    """
+
+    def __init__(self, http):
+        self.http = http
+        self._invites: Dict[InviteKey, CachedInvite] = {}
+        self._pending: Dict[InviteKey, asyncio.Task] = {}
+
+    async def _create(self, channel_id: int, app_id: int, max_age: int) -> CachedInvite:
+        r = Route("POST", "/channels/{channel_id}/invites", channel_id=channel_id)
+        payload = {"max_age": max_age, "target_type": 2, "target_application_id": app_id}
+        code = (await self.http.request(r, json=payload))["code"]
+        invite = CachedInvite(code, time.monotonic() + max_age if max_age else None)
+        self._invites[(channel_id, app_id, max_age)] = invite
+        return invite
+
+    async def get(self, channel_id: int, app_id: int, max_age: int) -> str:
+        key = (channel_id, app_id, max_age)
+        invite = self._invites.get(key)
+        if invite is not None and invite.usable_for(max_age, time.monotonic()):
+            return invite.code
+
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.create_task(self._create(channel_id, app_id, max_age))
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        return (await asyncio.shield(task)).code
+
+    def discard(self, code: str) -> None:
+        for key, invite in list(self._invites.items()):
+            if invite.code == code:
+                del self._invites[key]
+
+    def prune(self) -> None:
+        now = time.monotonic()
+        self._invites = {
+            key: invite for key, invite in self._invites.items()
+            if invite.expires_at is None or invite.expires_at > now
+        }
+
+
 class Activities(commands.Cog):
     """
     Open an activity in a voice channel!
     """
     def __init__(self, bot):
         self.bot = bot
+        self.invites = InviteCache(bot.http)
 
     @property
     def display_emoji(self) -> discord.PartialEmoji:
         return discord.PartialEmoji(name="\U0001f3ae")
 
+    @commands.Cog.listener()
+    async def on_invite_delete(self, invite: discord.Invite):
+        self.invites.discard(invite.code)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        self.invites.prune()
+
     async def _create_invite(self, ctx, app_id: int, max_age: int, app_name: str):
         voice = ctx.author.voice
         if not voice:
@@ -27,9 +127,7 @@ class Activities(commands.Cog):
                 "I need the `Create Invite` permission for your channel before you can use this command."
             )
 
-        r = Route("POST", "/channels/{channel_id}/invites", channel_id=voice.channel.id)
-        payload = {"max_age": max_age, "target_type": 2, "target_application_id": app_id}
-        code = (await self.bot.http.request(r, json=payload))["code"]
+        code = await self.invites.get(voice.channel.id, app_id, max_age)
 
         await ctx.respond(
             embed=discord.Embed(
@@ -39,166 +137,22 @@ class Activities(commands.Cog):
         )
 
     @slash_command(guild_ids=[SERVER_ID])
-    async def ytparty(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a YouTube Together voice channel invite.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "YouTube Together"
-        await self._create_invite(ctx, 880218394199220334, invite_max_age_in_seconds, app_name)
-    
-    @slash_command(guild_ids=[SERVER_ID])
-    async def ytpartyold(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a YouTube Together voice channel invite, the old version.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "YouTube Together (Old Version)"
-        await self._create_invite(ctx, 755600276941176913, invite_max_age_in_seconds, app_name)
-    
-    @slash_command(guild_ids=[SERVER_ID])
-    async def ytpartydev(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a YouTube Together voice channel invite, the dev version.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "YouTube Together (Dev Version)"
-        await self._create_invite(ctx, 880218832743055411, invite_max_age_in_seconds, app_name)
-    
-    @slash_command(guild_ids=[SERVER_ID])
-    async def betrayal(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a Betrayal.io voice channel invite.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "the Betrayal game"
-        await self._create_invite(ctx, 773336526917861400, invite_max_age_in_seconds, app_name)
-
-    @slash_command(guild_ids=[SERVER_ID])
-    async def fishington(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a Fishington.io voice channel invite.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "the Fishington game"
-        await self._create_invite(ctx, 814288819477020702, invite_max_age_in_seconds, app_name)
-    
-    @slash_command(guild_ids=[SERVER_ID])
-    async def chess(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a Chess in the Park voice channel invite.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "Chess in the Park"
-        await self._create_invite(ctx, 832012774040141894, invite_max_age_in_seconds, app_name)
-    
-    @slash_command(guild_ids=[SERVER_ID])
-    async def chessdev(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a Chess in the Park voice channel invite, the dev version.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "Chess in the Park (Dev Version)"
-        await self._create_invite(ctx, 832012586023256104, invite_max_age_in_seconds, app_name)
-    
-    @slash_command(guild_ids=[SERVER_ID])
-    async def doodlecrew(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a Doodle Crew voice channel invite.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "the Doodle Crew game"
-        await self._create_invite(ctx, 878067389634314250, invite_max_age_in_seconds, app_name)
-    
-    @slash_command(guild_ids=[SERVER_ID])
-    async def doodlecrewdev(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a Doodle Crew voice channel invite, the dev version.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "the Doodle Crew game (Dev Version)"
-        await self._create_invite(ctx, 878067427668275241, invite_max_age_in_seconds, app_name)
-    
-    @slash_command(guild_ids=[SERVER_ID])
-    async def lettertile(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a Letter Tile voice channel invite.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "the Letter Tile game"
-        await self._create_invite(ctx, 879863686565621790, invite_max_age_in_seconds, app_name)
-    
-    @slash_command(guild_ids=[SERVER_ID])
-    async def wordsnacks(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a Word Snacks voice channel invite.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "the Word Snacks game"
-        await self._create_invite(ctx, 879863976006127627, invite_max_age_in_seconds, app_name)
-
-    @slash_command(guild_ids=[SERVER_ID])
-    async def wordsnacksdev(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a Word Snacks voice channel invite, the dev version.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "the Word Snacks game (Dev Version)"
-        await self._create_invite(ctx, 879864010126786570, invite_max_age_in_seconds, app_name)
-    
-    @slash_command(guild_ids=[SERVER_ID])
-    async def spellcast(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a SpellCast voice channel invite.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "the SpellCast game"
-        await self._create_invite(ctx, 852509694341283871, invite_max_age_in_seconds, app_name)
-    
-    @slash_command(guild_ids=[SERVER_ID])
-    async def checkers(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a Checkers in the Park voice channel invite.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "Checkers in the Park"
-        await self._create_invite(ctx, 832013003968348200, invite_max_age_in_seconds, app_name)
-
-    @slash_command(guild_ids=[SERVER_ID])
-    async def sketchy(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a Sketchy Artist voice channel invite.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "the Sketchy Artist game"
-        await self._create_invite(ctx, 879864070101172255, invite_max_age_in_seconds, app_name)
-    
-    @slash_command(guild_ids=[SERVER_ID])
-    async def sketchydev(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a Sketchy Artist voice channel invite, the dev version.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "the Sketchy Artist game (Dev Version)"
-        await self._create_invite(ctx, 879864104980979792, invite_max_age_in_seconds, app_name)
-
-    @slash_command(guild_ids=[SERVER_ID])
-    async def awkword(self, ctx, invite_max_age_in_seconds=86400):
-        """
-        Create a Awkword voice channel invite.
-        Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
-        """
-        app_name = "the Awkword game"
-        await self._create_invite(ctx, 879863881349087252, invite_max_age_in_seconds, app_name)
-
-    @slash_command(guild_ids=[SERVER_ID])
-    async def decodersdev(self, ctx, invite_max_age_in_seconds=86400):
+    async def activity(
+            self,
+            ctx,
+            activity: Option(str, description="The activity to start", choices=list(ACTIVITIES)),
+            invite_max_age_in_seconds: Option(int, description="How long the invite lasts, 0 for forever",
+                                              required=False)
+    ):
         """
-        Create a Decoders voice channel invite, the dev version.
+        Create a voice channel invite for an activity, like YouTube Together or Chess in the Park.
         Use `0` for `invite_max_age_in_seconds` if you want the invite to be permanent.
         """
-        app_name = "the Decoders game (Dev Version)"
-        await self._create_invite(ctx, 891001866073296967, invite_max_age_in_seconds, app_name)
+        max_age = DEFAULT_MAX_AGE if invite_max_age_in_seconds is None else invite_max_age_in_seconds
+        if not 0 <= max_age <= MAX_INVITE_AGE:
+            return await ctx.respond(f"Invites can last at most {MAX_INVITE_AGE} seconds, or use `0` for forever.")
+        app_id, app_name = ACTIVITIES[activity]
+        await self._create_invite(ctx, app_id, max_age, app_name)
 
 
 def setup(bot):
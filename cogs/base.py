@@ -47,6 +47,7 @@ class Core(commands.Cog):
         except ExtensionError as e:
             await ctx.respond(f'{e.__class__.__name__}: {e}')
         else:
+            self.invalidate_help()
             await ctx.respond('<:greenTick:899466945672392704> ')
 
     @module.command()
@@ -58,6 +59,7 @@ class Core(commands.Cog):
         except ExtensionError as e:
             await ctx.respond(f'{e.__class__.__name__}: {e}')
         else:
+            self.invalidate_help()
             await ctx.respond('<:greenTick:899466945672392704>')
 
     @module.command()
@@ -69,8 +71,18 @@ class Core(commands.Cog):
         except ExtensionError as e:
             await ctx.respond(f'{e.__class__.__name__}: {e}')
         else:
+            self.invalidate_help()
             await ctx.respond('<:greenTick:899466945672392704>')
 
+    def invalidate_help(self):
+        """Marks the help index and command source map stale, since the set of commands has changed."""
+        help_cog = self.bot.get_cog("Help")
+        if help_cog is not None:
+            help_cog.index.invalidate()
+        github_cog = self.bot.get_cog("Github")
+        if github_cog is not None:
+            github_cog.invalidate_source_map()
+
     def reload_or_load_extension(self, module):
         try:
             self.bot.reload_extension(module)
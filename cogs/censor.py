@@ -1,27 +1,87 @@
 from discord.ext import commands
+import functools
 import re
+import unicodedata
+from typing import Optional
+
 import discord
 
+from utils.cases import CASE_LEDGER
+from utils.pipeline import NormalizedMessage
+
 CENSORED = {
     "words": ["BAD_WORDS"]
 }
 
 
+def fold(content: str) -> str:
+    """The form of some text that censored words are matched against."""
+    return unicodedata.normalize("NFKC", content).casefold()
+
+
+@functools.lru_cache(maxsize=4)
+def _compile(words: tuple) -> Optional[re.Pattern]:
+    # An empty alternation would match at every word boundary, so there is no pattern without any words
+    if not words:
+        return None
+    return re.compile(r"\b(" + "|".join(re.escape(fold(w)) for w in words) + r")\b", re.I)
+
+
+def censor_matcher() -> Optional[re.Pattern]:
+    """
+    Returns one compiled pattern matching every censored word, or None if there are no censored words.
+    The pattern is rebuilt only when the word list changes.
+    """
+    return _compile(tuple(CENSORED["words"]))
+
+
+def censor_content(content: str) -> str:
+    """
+    Replaces every censored word in some text with "<censored>".
+    Words are matched in the folded text, and each match is mapped back to the characters it was folded from, so a
+    word that is only caught after normalization (such as fullwidth letters) is censored as written.
+    """
+    matcher = censor_matcher()
+    if matcher is None:
+        return content
+    folded, origins = [], []
+    for index, character in enumerate(content):
+        piece = fold(character)
+        folded.append(piece)
+        origins.extend([index] * len(piece))
+    folded = "".join(folded)
+
+    pieces, last = [], 0
+    for match in matcher.finditer(folded):
+        start, end = origins[match.start()], origins[match.end() - 1] + 1
+        if start < last:
+            continue
+        pieces.extend((content[last:start], "<censored>"))
+        last = end
+    if not pieces and matcher.search(fold(content)):
+        # Folding character by character missed a match that spans combined characters; censor the folded text
+        return matcher.sub("<censored>", fold(content))
+    pieces.append(content[last:])
+    return "".join(pieces)
+
+
 class Censor(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        bot.pipeline.register("censor", self.check, gate=True)
 
     print("Censor Cog Loaded")
 
+    def cog_unload(self):
+        self.bot.pipeline.unregister("censor")
+
     @staticmethod
     def censor_needed(content: str) -> bool:
         """
         Determines whether the message has content that needs to be censored.
         """
-        for word in CENSORED['words']:
-            if len(re.findall(fr"\b({word})\b", content, re.I)):
-                return True
-        return False
+        matcher = censor_matcher()
+        return matcher is not None and matcher.search(fold(content)) is not None
 
     @staticmethod
     async def censor(message):
@@ -29,9 +89,7 @@ class Censor(commands.Cog):
         channel = message.channel
         ava = message.author.avatar
         wh = await channel.create_webhook(name="Censor (Automated)")
-        content = message.content
-        for word in CENSORED["words"]:
-            content = re.sub(fr'\b({word})\b', "<censored>", content, flags=re.IGNORECASE)
+        content = censor_content(message.content)
         author_nickname = message.author.nick
         if author_nickname is None:
             author_nickname = message.author.name
@@ -41,30 +99,29 @@ class Censor(commands.Cog):
                       allowed_mentions=mention_perms)
         await wh.delete()
 
-    async def on_message(self, message):
+    async def check(self, normalized: NormalizedMessage) -> bool:
         """
         Will censor the message. Will replace any flags in content with "<censored>".
-        :param message: The message being checked. message.context will be modified
-        if censor gets triggered if and only if the author is not a staff member.
-        :type message: discord.Message
+        Returns True if the message was censored, which stops it from being processed any further.
+        :param normalized: The message being checked.
+        :type normalized: NormalizedMessage
         """
-        # if message.author.id == 817169150983012412:
-        #     await message.delete()
-        #     await message.channel.send(message.content[::-1])
-        print(f"Message in {message.channel} from {message.author}: {message.content}")
-        if message.author.bot:
-            return
+        message = normalized.message
         if message.author.discriminator == "0000":
-            return
-        content = message.content
-        for word in CENSORED["words"]:
-            if len(re.findall(fr"\b({word})\b", content, re.I)):
-                print(f"Censoring message by {message.author} because of the word: `{word}`")
-                await message.delete()
-                return await self.censor(message)
-        return await self.bot.process_commands(message)
+            return True
+        matcher = censor_matcher()
+        match = matcher.search(normalized.folded) if matcher is not None else None
+        if match is None:
+            return False
+        await message.delete()
+        await CASE_LEDGER.add(message.author.id, "censor", f"Sent a message containing `{match.group(0)}`",
+                              automatic=True)
+        if CASE_LEDGER.should_escalate(message.author.id):
+            spam = self.bot.get_cog("SpamManager")
+            await spam.escalate(message, "repeatedly using censored words")
+        await self.censor(message)
+        return True
 
 
 def setup(bot):
     bot.add_cog(Censor(bot))
-
@@ -1,5 +1,5 @@
 import asyncio
-import json
+from typing import List
 
 import discord
 from discord import Permission, slash_command
@@ -7,7 +7,10 @@ from discord.commands import permissions
 from discord.commands.commands import Option
 from discord.ext import commands
 
+from utils.bulk import BulkEditor, PlannedEdit
 from utils.checks import is_staff
+from utils.store import edit_data, load_data
+from utils.transcripts import close_ticket
 from utils.variables import *
 from utils.views import Allevents, AllEventsSelect, Pronouns, Role1, Role2, Role3, Role4, Role5, Ticket
 
@@ -46,12 +49,7 @@ class Config(commands.Cog):
         Manually closes the ticket channel
         '''
 
-        with open('data.json') as f:
-            data = json.load(f)
-
-        if ctx.channel.id in data["ticket-channel-ids"]:
-
-            channel_id = ctx.channel.id
+        if ctx.channel.id in load_data()["ticket-channel-ids"]:
 
             def check(message):
                 return message.author == ctx.author and message.channel == ctx.channel and message.content.lower() == "close"
@@ -66,13 +64,7 @@ class Config(commands.Cog):
                 ticket_channel = ctx.channel
                 await ctx.respond(embed=em)
                 await self.bot.wait_for('message', check=check, timeout=60)
-                await ticket_channel.delete()
-
-                index = data["ticket-channel-ids"].index(channel_id)
-                del data["ticket-channel-ids"][index]
-
-                with open('data.json', 'w') as f:
-                    json.dump(data, f)
+                await close_ticket(ticket_channel, ctx.author)
 
             except asyncio.TimeoutError:
                 em = discord.Embed(
@@ -81,292 +73,133 @@ class Config(commands.Cog):
                     color=0x00a8ff)
                 await ctx.respond(embed=em)
 
+    @staticmethod
+    def can_manage_tickets(ctx) -> bool:
+        """Whether the author has one of the ticket admin roles, or is an administrator."""
+        verified = load_data()["verified-roles"]
+        return ctx.author.guild_permissions.administrator or any(role.id in verified for role in ctx.author.roles)
+
     @ticket.command()
     @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
     async def add_access(self, ctx, role: Option(discord.Role, description="Role id or mention role")):
-        with open('data.json') as f:
-            data = json.load(f)
-
-        valid_user = False
-
-        for role in data["verified-roles"]:
-            try:
-                if ctx.guild.get_role(role) in ctx.author.roles:
-                    valid_user = True
-            except:
-                pass
-
-        if valid_user or ctx.author.guild_permissions.administrator:
-            role = int(role)
-
-            if role not in data["valid-roles"]:
-
-                try:
-                    role = ctx.guild.get_role(role)
-
-                    with open("data.json") as f:
-                        data = json.load(f)
-
-                    data["valid-roles"].append(role)
-
-                    with open('data.json', 'w') as f:
-                        json.dump(data, f)
-
-                    em = discord.Embed(title="TMS Tickets",
-                                       description="You have successfully added `{}` to the list of roles with access to tickets.".format(
-                                           role.name), color=0x00a8ff)
-
-                    await ctx.respond(embed=em)
-
-                except:
-                    em = discord.Embed(title="TMS Tickets",
-                                       description="That isn't a valid role ID. Please try again with a valid role ID.")
-                    await ctx.respond(embed=em)
+        if not self.can_manage_tickets(ctx):
+            em = discord.Embed(title="TMS Tickets", description="Sorry, you don't have permission to run that command.",
+                               color=0x00a8ff)
+            return await ctx.respond(embed=em)
 
-            else:
-                em = discord.Embed(title="TMS Tickets", description="That role already has access to tickets!",
-                                   color=0x00a8ff)
-                await ctx.respond(embed=em)
+        async with edit_data() as data:
+            added = role.id not in data["valid-roles"]
+            if added:
+                data["valid-roles"].append(role.id)
 
+        if added:
+            em = discord.Embed(title="TMS Tickets",
+                               description="You have successfully added `{}` to the list of roles with access to tickets.".format(
+                                   role.name), color=0x00a8ff)
         else:
-            em = discord.Embed(title="TMS Tickets", description="Sorry, you don't have permission to run that command.",
+            em = discord.Embed(title="TMS Tickets", description="That role already has access to tickets!",
                                color=0x00a8ff)
-            await ctx.respond(embed=em)
+        await ctx.respond(embed=em)
 
     @ticket.command()
     @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
     async def delete_access(self, ctx, role: Option(discord.Role, description="Role id or mention role")):
-        with open('data.json') as f:
-            data = json.load(f)
-
-        valid_user = False
-
-        for role in data["verified-roles"]:
-            try:
-                if ctx.guild.get_role(role) in ctx.author.roles:
-                    valid_user = True
-            except:
-                pass
-
-        if valid_user or ctx.author.guild_permissions.administrator:
-
-            try:
-                role = int(role)
-                role = ctx.guild.get_role(role)
-
-                with open("data.json") as f:
-                    data = json.load(f)
-
-                valid_roles = data["valid-roles"]
-
-                if role in valid_roles:
-                    index = valid_roles.index(role)
-
-                    del valid_roles[index]
-
-                    data["valid-roles"] = valid_roles
-
-                    with open('data.json', 'w') as f:
-                        json.dump(data, f)
-
-                    em = discord.Embed(title="TMS Tickets",
-                                       description="You have successfully removed `{}` from the list of roles with access to tickets.".format(
-                                           role.name), color=0x00a8ff)
-
-                    await ctx.respond(embed=em)
-
-                else:
-
-                    em = discord.Embed(title="TMS Tickets",
-                                       description="That role already doesn't have access to tickets!", color=0x00a8ff)
-                    await ctx.respond(embed=em)
+        if not self.can_manage_tickets(ctx):
+            em = discord.Embed(title="TMS Tickets", description="Sorry, you don't have permission to run that command.",
+                               color=0x00a8ff)
+            return await ctx.respond(embed=em)
 
-            except:
-                em = discord.Embed(title="TMS Tickets",
-                                   description="That isn't a valid role ID. Please try again with a valid role ID.")
-                await ctx.respond(embed=em)
+        async with edit_data() as data:
+            removed = role.id in data["valid-roles"]
+            if removed:
+                data["valid-roles"].remove(role.id)
 
+        if removed:
+            em = discord.Embed(title="TMS Tickets",
+                               description="You have successfully removed `{}` from the list of roles with access to tickets.".format(
+                                   role.name), color=0x00a8ff)
         else:
-            em = discord.Embed(title="TMS Tickets", description="Sorry, you don't have permission to run that command.",
-                               color=0x00a8ff)
-            await ctx.respond(embed=em)
+            em = discord.Embed(title="TMS Tickets",
+                               description="That role already doesn't have access to tickets!", color=0x00a8ff)
+        await ctx.respond(embed=em)
 
     @ticket.command()
     @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
     async def add_pinged_role(self, ctx,
                               role: Option(discord.Role, description="Role id or mention role")):
-        with open('data.json') as f:
-            data = json.load(f)
-
-        valid_user = False
-
-        for role in data["verified-roles"]:
-            try:
-                if ctx.guild.get_role(role) in ctx.author.roles:
-                    valid_user = True
-            except:
-                pass
-
-        if valid_user or ctx.author.guild_permissions.administrator:
-
-            role = int(role)
-
-            if role not in data["pinged-roles"]:
-
-                try:
-                    role = ctx.guild.get_role(role)
-
-                    with open("data.json") as f:
-                        data = json.load(f)
-
-                    data["pinged-roles"].append(role)
-
-                    with open('data.json', 'w') as f:
-                        json.dump(data, f)
-
-                    em = discord.Embed(title="TMS Tickets",
-                                       description="You have successfully added `{}` to the list of roles that get pinged when new tickets are created!".format(
-                                           role.name), color=0x00a8ff)
-
-                    await ctx.respond(embed=em)
+        if not self.can_manage_tickets(ctx):
+            em = discord.Embed(title="TMS Tickets", description="Sorry, you don't have permission to run that command.",
+                               color=0x00a8ff)
+            return await ctx.respond(embed=em)
 
-                except:
-                    em = discord.Embed(title="TMS Tickets",
-                                       description="That isn't a valid role ID. Please try again with a valid role ID.")
-                    await ctx.respond(embed=em)
-
-            else:
-                em = discord.Embed(title="TMS Tickets",
-                                   description="That role already receives pings when tickets are created.",
-                                   color=0x00a8ff)
-                await ctx.respond(embed=em)
+        async with edit_data() as data:
+            added = role.id not in data["pinged-roles"]
+            if added:
+                data["pinged-roles"].append(role.id)
 
+        if added:
+            em = discord.Embed(title="TMS Tickets",
+                               description="You have successfully added `{}` to the list of roles that get pinged when new tickets are created!".format(
+                                   role.name), color=0x00a8ff)
         else:
-            em = discord.Embed(title="TMS Tickets", description="Sorry, you don't have permission to run that command.",
+            em = discord.Embed(title="TMS Tickets",
+                               description="That role already receives pings when tickets are created.",
                                color=0x00a8ff)
-            await ctx.respond(embed=em)
+        await ctx.respond(embed=em)
 
     @ticket.command()
     @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
     async def delete_pinged_role(self, ctx,
                                  role: Option(discord.Role, description="Role id or mention role")):
-        with open('data.json') as f:
-            data = json.load(f)
-
-        valid_user = False
-
-        for role in data["verified-roles"]:
-            try:
-                if ctx.guild.get_role(role) in ctx.author.roles:
-                    valid_user = True
-            except:
-                pass
-
-        if valid_user or ctx.author.guild_permissions.administrator:
-
-            try:
-                role = int(role)
-                role = ctx.guild.get_role(role)
-
-                with open("data.json") as f:
-                    data = json.load(f)
-
-                pinged_roles = data["pinged-roles"]
-
-                if role in pinged_roles:
-                    index = pinged_roles.index(role)
-
-                    del pinged_roles[index]
-
-                    data["pinged-roles"] = pinged_roles
-
-                    with open('data.json', 'w') as f:
-                        json.dump(data, f)
-
-                    em = discord.Embed(title="TMS Tickets",
-                                       description="You have successfully removed `{}` from the list of roles that get pinged when new tickets are created.".format(
-                                           role.name), color=0x00a8ff)
-                    await ctx.respond(embed=em)
-
-                else:
-                    em = discord.Embed(title="TMS Tickets",
-                                       description="That role already isn't getting pinged when new tickets are created!",
-                                       color=0xff008c)
-                    await ctx.respond(embed=em)
+        if not self.can_manage_tickets(ctx):
+            em = discord.Embed(title="TMS Tickets", description="Sorry, you don't have permission to run that command.",
+                               color=0xff008c)
+            return await ctx.respond(embed=em)
 
-            except:
-                em = discord.Embed(title="TMS Tickets",
-                                   description="That isn't a valid role ID. Please try again with a valid role ID.")
-                await ctx.respond(embed=em)
+        async with edit_data() as data:
+            removed = role.id in data["pinged-roles"]
+            if removed:
+                data["pinged-roles"].remove(role.id)
 
+        if removed:
+            em = discord.Embed(title="TMS Tickets",
+                               description="You have successfully removed `{}` from the list of roles that get pinged when new tickets are created.".format(
+                                   role.name), color=0x00a8ff)
         else:
-            em = discord.Embed(title="TMS Tickets", description="Sorry, you don't have permission to run that command.",
+            em = discord.Embed(title="TMS Tickets",
+                               description="That role already isn't getting pinged when new tickets are created!",
                                color=0xff008c)
-            await ctx.respond(embed=em)
+        await ctx.respond(embed=em)
 
     @ticket.command()
     @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
     async def add_admin_role(self, ctx, role: Option(discord.Role, description="Role id or mention role")):
-        try:
-            role_id = int(role)
-            role = ctx.guild.get_role(role_id)
+        async with edit_data() as data:
+            if role.id not in data["verified-roles"]:
+                data["verified-roles"].append(role.id)
 
-            with open("data.json") as f:
-                data = json.load(f)
-
-            data["verified-roles"].append(role_id)
-
-            with open('data.json', 'w') as f:
-                json.dump(data, f)
-
-            em = discord.Embed(title="TMS Tickets",
-                               description="You have successfully added `{}` to the list of roles that can run admin-level commands!".format(
-                                   role.name), color=0xff008c)
-            await ctx.respond(embed=em)
-
-        except:
-            em = discord.Embed(title="TMS Tickets",
-                               description="That isn't a valid role ID. Please try again with a valid role ID.")
-            await ctx.respond(embed=em)
+        em = discord.Embed(title="TMS Tickets",
+                           description="You have successfully added `{}` to the list of roles that can run admin-level commands!".format(
+                               role.name), color=0xff008c)
+        await ctx.respond(embed=em)
 
     @ticket.command()
     @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
     async def del_admin_role(self, ctx, role: Option(discord.Role, description="Role id or mention role")):
-        try:
-            role_id = int(role)
-            role = ctx.guild.get_role(role_id)
-
-            with open("data.json") as f:
-                data = json.load(f)
+        async with edit_data() as data:
+            removed = role.id in data["verified-roles"]
+            if removed:
+                data["verified-roles"].remove(role.id)
 
-            admin_roles = data["verified-roles"]
-
-            if role_id in admin_roles:
-                index = admin_roles.index(role_id)
-
-                del admin_roles[index]
-
-                data["verified-roles"] = admin_roles
-
-                with open('data.json', 'w') as f:
-                    json.dump(data, f)
-
-                em = discord.Embed(title="TMS Tickets",
-                                   description="You have successfully removed `{}` from the list of roles that get pinged when new tickets are created.".format(
-                                       role.name), color=0x00a8ff)
-
-                await ctx.respond(embed=em)
-
-            else:
-                em = discord.Embed(title="TMS Tickets",
-                                   description="That role isn't getting pinged when new tickets are created!",
-                                   color=0x00a8ff)
-                await ctx.respond(embed=em)
-
-        except:
+        if removed:
             em = discord.Embed(title="TMS Tickets",
-                               description="That isn't a valid role ID. Please try again with a valid role ID.")
-            await ctx.respond(embed=em)
+                               description="You have successfully removed `{}` from the list of roles that can run admin-level commands.".format(
+                                   role.name), color=0x00a8ff)
+        else:
+            em = discord.Embed(title="TMS Tickets",
+                               description="That role already can't run admin-level commands!",
+                               color=0x00a8ff)
+        await ctx.respond(embed=em)
 
     roles = discord.SlashCommandGroup(
         "roles",
@@ -577,62 +410,70 @@ class Config(commands.Cog):
         }
         await ctx.defer()
 
+        async def progress(completed, total, failed):
+            await ctx.interaction.edit_original_message(
+                content=f"Applying the {theme} theme... `{completed}/{total}` channels processed"
+                        + (f" ({failed} failed)" if failed else "")
+            )
+
+        editor = BulkEditor.resume(ctx.guild, f"theme:{theme}", progress=progress)
+        if editor is None:
+            editor = BulkEditor(ctx.guild, self.plan_theme(ctx.guild, theme, themes), job=f"theme:{theme}",
+                                progress=progress)
+        await editor.run()
+
         if theme == "Christmas":
-            general_channel = ctx.guild.get_channel(816806329925894220)
-            main_category = ctx.guild.get_channel(816808800572538933)
-            server_category = ctx.guild.get_channel(863055197890674759)
-            admin_category = ctx.guild.get_channel(871885248223400016)
-            events_category = ctx.guild.get_channel(816806329925894218)
-            voice_category = ctx.guild.get_channel(878811294189375529)
-
-            for channel in main_category.channels:
-                emoji = "\N{EVERGREEN TREE}"
-                channel_name_x = channel.name.split("│")
-                channel_name = channel_name_x[1]
-                await channel.edit(name=f"{emoji}" + "│" + channel_name)
-
-            for channel in server_category.channels:
-                emoji = "\N{CHRISTMAS TREE}"
-                channel_name_x = channel.name.split("│")
-                channel_name = channel_name_x[1]
-                await channel.edit(name=f"{emoji}" + "│" + channel_name)
-
-            for channel in admin_category.channels:
-                emoji = "\N{CHRISTMAS TREE}"
-                channel_name_x = channel.name.split("│")
-                channel_name = channel_name_x[1]
-                await channel.edit(name=f"{emoji}" + "│" + channel_name)
-
-            for channel in events_category.channels:
-                emoji = "\N{WRAPPED PRESENT}"
-                channel_name_x = channel.name.split("│")
-                channel_name = channel_name_x[1]
-                await channel.edit(name=f"{emoji}" + "│" + channel_name)
-
-            for channel in voice_category.channels:
-                emoji = "\N{GLOWING STAR}"
-                channel_name_x = channel.name.split("│")
-                channel_name = channel_name_x[1]
-                await channel.edit(name=f"{emoji}" + "│" + channel_name)
-
-            await main_category.edit(name=f"\N{EVERGREEN TREE}" + "│" + "mains")
-            await server_category.edit(name=f"\N{CHRISTMAS TREE}" + "│" + "server")
-            await admin_category.edit(name=f"\N{CHRISTMAS TREE}" + "│" + "admin")
-            await events_category.edit(name=f"\N{WRAPPED PRESENT}" + "│" + "events")
-            await general_channel.edit(name="\N{CHRISTMAS TREE}" + "│general")
-            await voice_category.edit(name="\N{GLOWING STAR}" + "│voice channels")
             embed = discord.Embed()
             embed.title = "\N{CHRISTMAS TREE} Theme change complete! \N{CHRISTMAS TREE}"
             embed.description = "The server is now set to christmas mode. Happy Holidays!"
             embed.colour = 0x146B3A
-            return await ctx.respond(embed=embed)
+            if editor.failed:
+                embed.set_footer(text=f"{len(editor.failed)} channel(s) could not be renamed, and will be retried the "
+                                      f"next time this theme is applied")
+            return await ctx.interaction.edit_original_message(content=None, embed=embed)
+        await ctx.interaction.edit_original_message(
+            content=f"Theme change complete! {editor.done} renamed, {editor.skipped} already up to date"
+                    + (f", {len(editor.failed)} failed: " + ", ".join(f"<#{c}>" for c in editor.failed[:10])
+                       + ". They'll be retried the next time this theme is applied." if editor.failed else ".")
+        )
+
+    @staticmethod
+    def plan_theme(guild: discord.Guild, theme: str, themes: dict) -> List[PlannedEdit]:
+        """
+        Builds the list of channel renames needed to apply a theme.
+        Later entries for the same channel replace earlier ones, so the plan holds at most one edit per channel.
+        """
+        plan = {}
+
+        def rename(channel, emoji, name=None):
+            if channel is None:
+                return
+            if name is None:
+                name = channel.name.split("│", 1)[-1]
+            plan[channel.id] = PlannedEdit(channel.id, name=f"{emoji}│{name}")
+
+        if theme == "Christmas":
+            general_channel = guild.get_channel(816806329925894220)
+            categories = [
+                (guild.get_channel(816808800572538933), "\N{EVERGREEN TREE}", "mains"),
+                (guild.get_channel(863055197890674759), "\N{CHRISTMAS TREE}", "server"),
+                (guild.get_channel(871885248223400016), "\N{CHRISTMAS TREE}", "admin"),
+                (guild.get_channel(816806329925894218), "\N{WRAPPED PRESENT}", "events"),
+                (guild.get_channel(878811294189375529), "\N{GLOWING STAR}", "voice channels"),
+            ]
+            for category, emoji, _ in categories:
+                if category is None:
+                    continue
+                for channel in category.channels:
+                    rename(channel, emoji)
+            for category, emoji, name in categories:
+                rename(category, emoji, name)
+            rename(general_channel, "\N{CHRISTMAS TREE}", "general")
         else:
             emoji = themes[theme]
-            for channel in ctx.guild.channels:
-                channel_name_x = channel.name.split("│")
-                channel_name = channel_name_x[1]
-                await channel.edit(name=f"{emoji}" + "│" + channel_name)
-        await ctx.respond("Theme change complete!")
+            for channel in guild.channels:
+                rename(channel, emoji)
+        return list(plan.values())
 
 
 def setup(bot):
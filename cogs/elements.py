@@ -1,10 +1,11 @@
 import discord
 from discord.ext import commands
 from discord.ext.commands.errors import BadArgument
-from discord import slash_command
+from discord import Option, slash_command
+from utils.autocomplete import INDEXES, autocomplete
 from utils.element_info import LATTICES, IMAGES
 from mendeleev import element as ELEMENTS
-from utils.paginate import Pages, Source
+from utils.paginate import LazyPageSource, Pages
 from utils.variables import SERVER_ID
 
 # CREDIT -> https://github.com/TrustyJAID/Trusty-cogs/tree/master/elements
@@ -80,7 +81,8 @@ class Elements(commands.Cog):
     async def element(
             self,
             ctx: discord.ApplicationContext,
-            element: str,
+            element: Option(str, description="The name, symbol or atomic number of the element",
+                            autocomplete=autocomplete(INDEXES["elements"])),
     ) -> discord.InteractionResponse:
         """
         Display information about an element
@@ -97,8 +99,11 @@ class Elements(commands.Cog):
     ) -> None:
         """Display a menu of all elements"""
         await ctx.defer()
-        embeds = [await self.element_embed(ELEMENTS(e)) for e in range(1, 119)]
-        menu = Pages(ctx=ctx, source=Source(embeds, per_page=1), compact=True)
+
+        async def fetch(page_number: int) -> discord.Embed:
+            return await self.element_embed(ELEMENTS(page_number + 1))
+
+        menu = Pages(ctx=ctx, source=LazyPageSource(fetch=fetch, max_pages=118), compact=True)
         await menu.start()
 
     async def element_embed(self, element: ELEMENTS) -> discord.Embed:
@@ -1,23 +1,34 @@
 import asyncio
 import datetime
+import logging
+import os
 import random
 import unicodedata
 
+import aiohttp
 import discord
 
 import math
-import io
 from deep_translator import GoogleTranslator
 from deep_translator.exceptions import LanguageNotSupportedException as UnsupportedLanguage
 from discord.commands.commands import Option, option, slash_command
 from discord.ext import commands
 
-from utils.autocomplete import GOOGLE_LANGUAGES, image_filters
+from utils.autocomplete import INDEXES, autocomplete
 from utils.checks import is_not_blacklisted
+from utils.imagecache import IMAGE_CACHE, ImageTooLarge
+from utils.imagefilters import FILTER_ENGINE, FILTERS, FilterError, extension
+from utils.latex import LATEX, respond_latex
+from utils.stats import GUILD_STATS
 from utils.doggo import get_akita, get_cotondetulear, get_doggo, get_shiba
 from utils.variables import *
 from utils.views import Counter, TicTacToe
 
+log = logging.getLogger(__name__)
+
+# Local filters work on a 256px copy of the avatar, which is all a chat preview shows anyway
+LOCAL_AVATAR_SIZE = 256
+
 
 class Fun(commands.Cog):
     """Commands for Fun!"""
@@ -34,6 +45,10 @@ class Fun(commands.Cog):
     async def cog_check(self, ctx):
         return await is_not_blacklisted(ctx)
 
+    def cog_unload(self):
+        FILTER_ENGINE.shutdown()
+        LATEX.shutdown()
+
     @slash_command(guild_ids=[SERVER_ID])
     async def roll(self, ctx):
         '''Rolls a dice'''
@@ -153,29 +168,42 @@ class Fun(commands.Cog):
     @slash_command(guild_ids=[SERVER_ID])
     async def count(self, ctx):
         '''Counts the number of members in the server'''
-        guild = ctx.author.guild
-        await ctx.respond(f"Currently, there are `{len(guild.members)}` members in the server.")
+        stats = GUILD_STATS.get(ctx.guild)
+        await ctx.respond(f"Currently, there are `{stats.members}` members in the server.")
 
     @slash_command(guild_ids=[SERVER_ID])
     async def latex(self, ctx, latex: Option(str, description="LaTex Code")):
         '''Displays an image of an equation, uses LaTex as input'''
-        print(latex)
-        new_args = latex.replace(" ", r"&space;")
-        print(new_args)
-        await ctx.respond(r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}" + new_args + "}")
+        log.debug("Rendering LaTeX", extra={"latex": latex})
+        await respond_latex(ctx, latex)
 
     @slash_command(guild_ids=[SERVER_ID])
-    @option(name="manipulate", autocomplete=discord.utils.basic_autocomplete(values=image_filters))
+    @option(name="manipulate", autocomplete=autocomplete(INDEXES["image_filters"]))
     async def image(self, ctx: discord.ApplicationContext, member: discord.User, manipulate):
+        avatar = member.display_avatar
         params = {
-            'image_url': member.avatar.url,
+            'image_url': avatar.url,
         }
 
         await ctx.defer()
-        r = await self.bot.session.get(f'https://api.jeyy.xyz/image/{manipulate}', params=params)
-        buf = io.BytesIO(await r.read())
+        try:
+            # Avatar hashes change with the avatar, so the same avatar and filter always give the same image
+            if manipulate in FILTERS:
+                async def render() -> bytes:
+                    source = await avatar.with_format('png').with_size(LOCAL_AVATAR_SIZE).read()
+                    return await FILTER_ENGINE.render(source, manipulate)
+
+                path = await IMAGE_CACHE.produce(f"{avatar.key}:{manipulate}:local", extension(manipulate), render)
+            else:
+                path = await IMAGE_CACHE.fetch(self.bot.session, f"{avatar.key}:{manipulate}",
+                                               f'https://api.jeyy.xyz/image/{manipulate}', params=params)
+        except (ImageTooLarge, FilterError) as e:
+            return await ctx.respond(f"Sorry, I couldn't make that image. {e}.")
+        except (aiohttp.ClientError, asyncio.TimeoutError, discord.HTTPException) as e:
+            log.warning("Image manipulation %s failed: %s", manipulate, e)
+            return await ctx.respond("Sorry, I couldn't make that image right now. Try again in a bit.")
 
-        await ctx.respond(file=discord.File(buf, 'image.gif'))
+        await ctx.respond(file=discord.File(path, f'image{os.path.splitext(path)[1]}'))
 
     @slash_command(guild_ids=[SERVER_ID])
     async def profile(self,
@@ -318,7 +346,7 @@ class Fun(commands.Cog):
     #     await ctx.respond(embed=embed)
 
     @slash_command(guild_ids=[SERVER_ID])
-    @option("language", autocomplete=discord.utils.basic_autocomplete(values=GOOGLE_LANGUAGES))
+    @option("language", autocomplete=autocomplete(INDEXES["languages"]))
     async def translate(self, ctx, language: str, *, input: str):
         try:
             translator = GoogleTranslator(source='auto', target=language.lower())
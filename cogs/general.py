@@ -1,9 +1,8 @@
 import asyncio
 import datetime
+import logging
 import os
 from collections import Counter
-from fractions import Fraction
-from math import sqrt
 from typing import Optional
 
 import discord
@@ -12,13 +11,21 @@ import psutil
 from discord.commands.commands import Option, slash_command
 from discord.ext import commands
 
-from cogs.github import Github
 from utils import times
 from utils.checks import is_not_blacklisted
+from utils.latex import LATEX, LatexError, respond_latex
+from utils.purge import PurgeJob
+from utils.repo import REPO_INFO
 from utils.rules import RULES
+from utils.search import SEARCH_INDEX
+from utils.stats import GUILD_STATS
+from utils.suggestions import DOWNVOTE, SUGGESTIONS, UPVOTE
+from utils.symbolic import SYMBOLIC, MathError
 from utils.variables import *
 from utils.views import ReportView
 
+log = logging.getLogger(__name__)
+
 
 class General(commands.Cog):
     """General commands."""
@@ -40,6 +47,69 @@ class General(commands.Cog):
     def cog_unload(self) -> None:
         pass
 
+    # Keep the guild statistics up to date from gateway events
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            GUILD_STATS.rebuild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild: discord.Guild):
+        GUILD_STATS.rebuild(guild)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        GUILD_STATS.discard(guild.id)
+
+    @commands.Cog.listener()
+    async def on_guild_update(self, before: discord.Guild, after: discord.Guild):
+        stats = GUILD_STATS.peek(after.id)
+        if stats is not None:
+            stats.features = frozenset(after.features)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        stats = GUILD_STATS.peek(after.guild.id)
+        if stats is not None and after.is_default() and before.permissions != after.permissions:
+            stats.rebuild_channels(after.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_create(self, channel: discord.abc.GuildChannel):
+        stats = GUILD_STATS.peek(channel.guild.id)
+        if stats is not None:
+            stats.add_channel(channel)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel):
+        stats = GUILD_STATS.peek(channel.guild.id)
+        if stats is not None:
+            stats.remove_channel(channel.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+        stats = GUILD_STATS.peek(after.guild.id)
+        if stats is not None:
+            stats.update_channel(after)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        stats = GUILD_STATS.peek(member.guild.id)
+        if stats is not None:
+            stats.add_member(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        stats = GUILD_STATS.peek(member.guild.id)
+        if stats is not None:
+            stats.remove_member(member)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        stats = GUILD_STATS.peek(after.guild.id)
+        if stats is not None and before.premium_since != after.premium_since:
+            stats.update_boost(after)
+
     def get_bot_uptime(self) -> str:
         delta_uptime = datetime.datetime.utcnow() - self.bot.launch_time
         hours, remainder = divmod(int(delta_uptime.total_seconds()), 3600)
@@ -49,41 +119,25 @@ class General(commands.Cog):
         return uptime
 
     @staticmethod
-    async def _basic_cleanup_strategy(ctx, search):
-        count = 0
-        async for msg in ctx.history(limit=search, before=ctx.message):
-            if msg.author == ctx.me and not (msg.mentions or msg.role_mentions):
-                await msg.delete()
-                count += 1
-        return {'Bot': count}
-
-    @staticmethod
-    async def _complex_cleanup_strategy(ctx, search):
-
+    def _basic_cleanup_check(ctx):
         def check(m):
-            return m.author == ctx.me or m.content.startswith("!" or "?")
+            return m.author == ctx.me and not (m.mentions or m.role_mentions)
 
-        deleted = await ctx.channel.purge(limit=search, check=check, before=ctx.message)
-        return Counter(m.author.display_name for m in deleted)
+        return check
 
     @staticmethod
-    async def _regular_user_cleanup_strategy(ctx, search):
+    def _complex_cleanup_check(ctx):
         def check(m):
-            return (m.author == ctx.me or m.content.startswith("!" or "?")) and not (m.mentions or m.role_mentions)
+            return m.author == ctx.me or m.content.startswith(("!", "?"))
 
-        deleted = await ctx.channel.purge(limit=search, check=check, before=ctx.message)
-        return Counter(m.author.display_name for m in deleted)
+        return check
 
     @staticmethod
-    def format_commit(commit):
-        short, _, _ = commit.message.partition('\n')
-        short_sha2 = commit.hex[0:6]
-        commit_tz = datetime.timezone(datetime.timedelta(minutes=commit.commit_time_offset))
-        commit_time = datetime.datetime.fromtimestamp(commit.commit_time).astimezone(commit_tz)
+    def _regular_user_cleanup_check(ctx):
+        def check(m):
+            return (m.author == ctx.me or m.content.startswith(("!", "?"))) and not (m.mentions or m.role_mentions)
 
-        # [`hash`](url) message (offset)
-        offset = times.format_relative(commit_time.astimezone(datetime.timezone.utc))
-        return f'[`{short_sha2}`](https://github.com/pandabear189/tms-scioly-bots/commit/{commit.hex}) {short} ({offset})'
+        return check
 
     @slash_command(guild_ids=[SERVER_ID])
     async def rule(
@@ -114,7 +168,9 @@ class General(commands.Cog):
         embed.add_field(name="User:", value=f"{ctx.author.mention} \n id: `{ctx.author.id}`")
         embed.add_field(name="Report:", value=f"`{message}`")
         embed.set_author(name=f"{ctx.author}", icon_url=ava)
-        await reports_channel.send(embed=embed, view=ReportView())
+        report_message = await reports_channel.send(embed=embed, view=ReportView())
+        await SEARCH_INDEX.add("report", message, user_id=ctx.author.id, channel_id=ctx.channel.id,
+                               url=report_message.jump_url)
         await ctx.respond("Thanks, report created.")
 
     @staticmethod
@@ -142,24 +198,7 @@ class General(commands.Cog):
 
         roles = [role.name.replace('@', '@\u200b') for role in guild.roles]
 
-        if not guild.chunked:
-            async with ctx.typing():
-                await guild.chunk(cache=True)
-
-        # figure out what channels are 'secret'
-        everyone = guild.default_role
-        everyone_perms = everyone.permissions.value
-        secret = Counter()
-        totals = Counter()
-        for channel in guild.channels:
-            allow, deny = channel.overwrites_for(everyone).pair()
-            perms = discord.Permissions((everyone_perms & ~deny.value) | allow.value)
-            channel_type = type(channel)
-            totals[channel_type] += 1
-            if not perms.read_messages:
-                secret[channel_type] += 1
-            elif isinstance(channel, discord.VoiceChannel) and (not perms.connect or not perms.speak):
-                secret[channel_type] += 1
+        stats = GUILD_STATS.get(guild)
 
         e = discord.Embed()
         e.title = guild.name
@@ -172,8 +211,8 @@ class General(commands.Cog):
             discord.TextChannel: '<:text_channel:899326950785576970>',
             discord.VoiceChannel: '<:voice_channel:899326987255021619>',
         }
-        for key, total in totals.items():
-            secrets = secret[key]
+        for key, total in stats.channels.items():
+            secrets = stats.locked[key]
             try:
                 emoji = key_to_emoji[key]
             except KeyError:
@@ -185,7 +224,7 @@ class General(commands.Cog):
                 channel_info.append(f'{emoji} {total}')
 
         info = []
-        features = set(guild.features)
+        features = stats.features
         all_features = {
             'PARTNERED': 'Partnered',
             'VERIFIED': 'Verified',
@@ -214,13 +253,13 @@ class General(commands.Cog):
 
         if guild.premium_tier != 0:
             boosts = f'Level {guild.premium_tier}\n{guild.premium_subscription_count} boosts'
-            last_boost = max(guild.members, key=lambda m: m.premium_since or guild.created_at)
-            if last_boost.premium_since is not None:
-                boosts = f'{boosts}\nLast Boost: {last_boost} ({times.format_relative(last_boost.premium_since)})'
+            if stats.last_boost is not None:
+                boosted_at, member_id = stats.last_boost
+                last_boost = guild.get_member(member_id) or member_id
+                boosts = f'{boosts}\nLast Boost: {last_boost} ({times.format_relative(boosted_at)})'
             e.add_field(name='Boosts', value=boosts, inline=False)
 
-        bots = sum(m.bot for m in guild.members)
-        fmt = f'Total: {guild.member_count} ({bots} bots)'
+        fmt = f'Total: {stats.members} ({stats.bots} bots)'
 
         e.add_field(name='Members', value=fmt, inline=False)
         e.add_field(name='Roles', value=', '.join(roles) if len(roles) < 10 else f'{len(roles)} roles')
@@ -408,7 +447,7 @@ class General(commands.Cog):
     async def about(self, ctx):
         """Tells you information about the bot itself."""
 
-        revision = Github.get_last_commits(self, count=5)
+        revision = await REPO_INFO.last_commits(5)
         embed = discord.Embed(description='Latest Changes:\n' + revision)
         # embed = discord.Embed(description='Latest Changes:\n')
         embed.colour = discord.Colour.blurple()
@@ -420,23 +459,11 @@ class General(commands.Cog):
         embed.set_author(name=name, icon_url=owner.display_avatar.url, url='https://github.com/pandabear189')
 
         # statistics
-        total_members = 0
         total_unique = len(self.bot.users)
-
-        text = 0
-        voice = 0
-        guilds = 0
-        for guild in self.bot.guilds:
-            guilds += 1
-            if guild.unavailable:
-                continue
-
-            total_members += guild.member_count
-            for channel in guild.channels:
-                if isinstance(channel, discord.TextChannel):
-                    text += 1
-                elif isinstance(channel, discord.VoiceChannel):
-                    voice += 1
+        guild_stats = [GUILD_STATS.get(guild) for guild in self.bot.guilds if not guild.unavailable]
+        total_members = sum(stats.members for stats in guild_stats)
+        text = sum(stats.channels[discord.TextChannel] for stats in guild_stats)
+        voice = sum(stats.channels[discord.VoiceChannel] for stats in guild_stats)
 
         embed.add_field(name='Members', value=f'{total_members} total\n{total_unique} unique')
         embed.add_field(name='Channels', value=f'{text + voice} total\n{text} text\n{voice} voice')
@@ -501,6 +528,9 @@ class General(commands.Cog):
         global_rate_limit = self.bot.http._global_over.set()
         description.append(f'Global Rate Limit: {global_rate_limit}')
 
+        stage_timings = self.bot.pipeline.timings()
+        embed.add_field(name='Message Stages', value='\n'.join(stage_timings) or 'No messages yet', inline=False)
+
         if ws_rate_limit or total_warnings >= 3 or len(event_tasks) >= 4:
             embed.colour = UNHEALTHY
 
@@ -519,8 +549,9 @@ class General(commands.Cog):
         name = ctx.author.nick or ctx.author
         embed.set_author(name=name, icon_url=ctx.author.avatar)
         suggest_message = await suggest_channel.send(embed=embed)
-        await suggest_message.add_reaction("\U0001f44d")
-        await suggest_message.add_reaction("\U0001f44e")
+        await SUGGESTIONS.add(suggest_message.id, ctx.author.id, suggestion)
+        await suggest_message.add_reaction(UPVOTE)
+        await suggest_message.add_reaction(DOWNVOTE)
         await reports_channel.send(embed=embed)
         suggest_url = suggest_message.jump_url
         embed2 = discord.Embed(title=" ", description=f"Posted! [Your Suggestion!]({suggest_url})")
@@ -544,28 +575,49 @@ class General(commands.Cog):
         Members without can search up to 25 messages.
         """
 
-        strategy = self._basic_cleanup_strategy
+        strategy = self._basic_cleanup_check
+        can_bulk = ctx.channel.permissions_for(ctx.me).manage_messages
         is_mod = ctx.channel.permissions_for(ctx.author).manage_messages
-        if ctx.channel.permissions_for(ctx.me).manage_messages:
+        if can_bulk:
             if is_mod:
-                strategy = self._complex_cleanup_strategy
+                strategy = self._complex_cleanup_check
             else:
-                strategy = self._regular_user_cleanup_strategy
+                strategy = self._regular_user_cleanup_check
 
         if is_mod:
             search = min(max(2, search), 1000)
         else:
             search = min(max(2, search), 10)
 
-        spammers = await strategy(ctx, search)
-        deleted = sum(spammers.values())
+        await ctx.respond(f"Cleaning up the last {search} messages...")
+        # Only search the messages before this response, which would otherwise be cleaned up along with them
+        response = await ctx.interaction.original_message()
+
+        async def progress(job: PurgeJob):
+            try:
+                await ctx.interaction.edit_original_message(
+                    content=f"Cleaning up... searched {job.scanned}/{search} messages, removed {job.deleted} so far."
+                )
+            except discord.HTTPException:
+                log.warning("Couldn't update the cleanup progress in %s", ctx.channel.id)
+
+        # Without Manage Messages the bot can only delete its own messages, one at a time
+        job = await PurgeJob([ctx.channel], strategy(ctx), limit=search, before=response.created_at, bulk=can_bulk,
+                             progress=progress).run()
+        deleted = job.matched
         messages = [f'{deleted} message{" was" if deleted == 1 else "s were"} removed.']
+        if job.queued:
+            messages.append(f'{job.queued} of them will be deleted in the background over the next few minutes.')
         if deleted:
             messages.append('')
-            spammers = sorted(spammers.items(), key=lambda t: t[1], reverse=True)
+            spammers = sorted(job.authors.items(), key=lambda t: t[1], reverse=True)
             messages.extend(f'- **{author}**: {count}' for author, count in spammers)
 
-        await ctx.respond('\n'.join(messages))
+        try:
+            await ctx.interaction.edit_original_message(content='\n'.join(messages))
+        except discord.NotFound:
+            # Someone deleted the response while the cleanup was running
+            await ctx.send('\n'.join(messages))
 
     @slash_command(guild_ids=[SERVER_ID])
     async def newusers(self, ctx, count: int = None):
@@ -575,10 +627,9 @@ class General(commands.Cog):
         The count parameter can only be up to 25.
         """
 
-        if not ctx.guild.chunked:
-            members = await ctx.guild.chunk(cache=True)
-        else:
-            members = sorted(ctx.guild.members, key=lambda m: m.joined_at, reverse=True)[:count]
+        count = max(1, min(count or 10, 25))
+        stats = GUILD_STATS.get(ctx.guild)
+        members = [m for m in map(ctx.guild.get_member, stats.newest(count)) if m is not None]
 
         e = discord.Embed(title='New Members', colour=discord.Colour.green())
 
@@ -604,14 +655,81 @@ class Math(commands.Cog):
     async def cog_check(self, ctx):
         return await is_not_blacklisted(ctx)
 
-    def perfect_square(self, limit):
-        accumulation_list = [1]
-        index, increment = 0, 3
-        while accumulation_list[-1] + increment <= limit:
-            accumulation_list.append(accumulation_list[index] + increment)
-            index += 1
-            increment = 2 * index + 3
-        return accumulation_list
+    def cog_unload(self):
+        SYMBOLIC.shutdown()
+
+    async def _respond_math(self, ctx, title: str, expression: str, operation: str, *args):
+        """Runs a symbolic job and responds with the result, rendered as LaTeX when possible."""
+        await ctx.defer()
+        try:
+            text, latex = await SYMBOLIC.run(operation, expression, *args)
+        except MathError as e:
+            return await ctx.respond(str(e))
+
+        embed = discord.Embed(title=title, color=discord.Color.blurple())
+        embed.add_field(name="Input", value=f"```{discord.utils.escape_markdown(expression)[:1000]}```", inline=False)
+        embed.add_field(name="Result", value=f"```{text[:1000]}```", inline=False)
+        try:
+            path = await LATEX.render(self.bot.session, latex)
+        except LatexError:
+            return await ctx.respond(embed=embed)
+        embed.set_image(url="attachment://math.png")
+        await ctx.respond(embed=embed, file=discord.File(path, "math.png"))
+
+    math = discord.SlashCommandGroup(
+        "math",
+        "Solve, simplify and evaluate expressions",
+        [SERVER_ID]
+    )
+
+    @math.command()
+    async def solve(
+            self,
+            ctx,
+            equation: Option(str, description="The equation, e.g. x^2 + 2x = 3. Without an = it's solved for 0"),
+            variable: Option(str, description="The variable to solve for", required=False)
+    ):
+        """Solves an equation"""
+        await self._respond_math(ctx, "Solve", equation, "solve", variable)
+
+    @math.command()
+    async def simplify(self, ctx, expression: Option(str, description="The expression to simplify")):
+        """Simplifies an expression"""
+        await self._respond_math(ctx, "Simplify", expression, "simplify")
+
+    @math.command()
+    async def differentiate(
+            self,
+            ctx,
+            expression: Option(str, description="The expression to differentiate"),
+            variable: Option(str, description="The variable to differentiate with respect to", required=False),
+            order: Option(int, description="How many times to differentiate", required=False)
+    ):
+        """Differentiates an expression"""
+        order = max(1, min(order or 1, 10))
+        await self._respond_math(ctx, "Differentiate", expression, "differentiate", variable, order)
+
+    @math.command()
+    async def integrate(
+            self,
+            ctx,
+            expression: Option(str, description="The expression to integrate"),
+            variable: Option(str, description="The variable to integrate with respect to", required=False),
+            lower: Option(str, description="The lower bound, for a definite integral", required=False),
+            upper: Option(str, description="The upper bound, for a definite integral", required=False)
+    ):
+        """Integrates an expression, indefinitely or between two bounds"""
+        await self._respond_math(ctx, "Integrate", expression, "integrate", variable, lower, upper)
+
+    @math.command()
+    async def evaluate(
+            self,
+            ctx,
+            expression: Option(str, description="The expression, which can use units, e.g. 5 km / (2 hour)"),
+            unit: Option(str, description="The unit to convert the result to, e.g. meter/second", required=False)
+    ):
+        """Evaluates an expression numerically, converting between units"""
+        await self._respond_math(ctx, "Evaluate", expression, "evaluate", unit)
 
     @slash_command(guild_ids=[SERVER_ID])
     async def quadratic(self, ctx,
@@ -626,96 +744,16 @@ class Math(commands.Cog):
         `c:` the last term
         `ax^2 + bx + c`
         '''
-        if a <= 0:
-            return await ctx.respond('Lead coefficient of `0 or less` is **not** a quadratic!!')
-
-        w = 4 * a * c
-        square_root_value = b ** 2 - w
-        bottom = 2 * a
-
-        if square_root_value < 0:
-            if square_root_value < 0:
-                square_root_value = square_root_value * -1
-                if sqrt(square_root_value).is_integer():
-                    print(int(sqrt(square_root_value)))
-                    print("is perfect square (imaginary/complex)")
-                    p = int(-b + sqrt(square_root_value))
-                    q = int(-b - sqrt(square_root_value))
-
-                    if (p / bottom).is_integer():
-                        if (q / bottom).is_integer():
-                            if q == p:
-                                return await ctx.respond(
-                                    r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}x=" + f"{int(p / bottom)}i" + r"}")
-                            else:
-                                return await ctx.respond(
-                                    r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}x_1=" + f"{int(p / bottom)}i" + r"\;\;" + f"x_2={int(q / bottom)}i" + r"}")
-                        else:
-                            return await ctx.respond(
-                                r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}x_1=" + f"{int(p / bottom)}" + r"\;\;" + r"x_2=\frac{" + f"{q}" + r"}{" + f"{bottom}" + r"}}")
-                    if (q / bottom).is_integer():
-                        k, l = (p / bottom).as_integer_ratio()
-                        x = Fraction(k, l).limit_denominator()
-                        k, l = x.as_integer_ratio()
-                        return await ctx.respond(
-                            r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}x_1=" + f"{int(q / bottom)}i" + r"\;\;" + r"x_2=\frac{" + f"{k}i" + r"}{" + f"{l}" + r"}}")
-
-                    # Find perfect squares that are factors of n
-                factors = [square for square in self.perfect_square(square_root_value / 2) if
-                           square_root_value % square == 0 and square > 1]
-                if len(factors) == 0:
-                    print('\u221A', square_root_value)
-                    i = "i"
-                    return await ctx.respond(
-                        r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}" + r"x=\frac{" + f"{-b}" + rf"\pm\," + fr"{i}" + r"\sqrt" + f"{square_root_value}" + r"}{" + f"{bottom}" + r"}" + "}")
-                else:
-                    x = int(sqrt(max(factors)))  # Coefficient
-                    y = int(square_root_value / max(factors))  # Argument of the square root
-                    return await ctx.respond(
-                        r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}" + r"x=\frac{" + f"{-b}" + rf"\pm{x}i\sqrt" + f"{y}" + r"}{" + f"{bottom}" + r"}" + "}")
-
-        if sqrt(square_root_value).is_integer():
-            print(int(sqrt(square_root_value)))
-            print("is perfect square")
-            p = int(-b + sqrt(square_root_value))
-            q = int(-b - sqrt(square_root_value))
-
-            if (p / bottom).is_integer():
-                if (q / bottom).is_integer():
-                    if q == p:
-                        return await ctx.respond(
-                            r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}x=" + f"{int(p / bottom)}" + r"}")
-                    else:
-                        return await ctx.respond(
-                            r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}x_1=" + f"{int(p / bottom)}" + r"\;\;" + f"x_2={int(q / bottom)}" + r"}")
-                else:
-                    return await ctx.respond(
-                        r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}x_1=" + f"{int(p / bottom)}" + r"\;\;" + r"x_2=\frac{" + f"{q}" + r"}{" + f"{bottom}" + r"}}")
-            if (q / bottom).is_integer():
-                k, l = (p / bottom).as_integer_ratio()
-                x = Fraction(k, l).limit_denominator()
-                k, l = x.as_integer_ratio()
-                return await ctx.respond(
-                    r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}x_1=" + f"{int(q / bottom)}" + r"\;\;" + r"x_2=\frac{" + f"{k}" + r"}{" + f"{l}" + r"}}")
-            else:
-                # TODO figure out what the hell to do here
-                latex = r"\frac{" + f"{-b}" + r"\pm" + f"{int(sqrt(square_root_value))}" + r"}{" + f"{int(2 * a)}" + r"}"
-                return await ctx.respond(
-                    r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}" + latex + "}")
-
-            # Find perfect squares that are factors of n
-        factors = [square for square in self.perfect_square(square_root_value / 2) if
-                   square_root_value % square == 0 and square > 1]
-        if len(factors) == 0:
-            print('\u221A', square_root_value)
-            return await ctx.respond(
-                r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}" + r"x=\frac{" + f"{-b}" + rf"\pm\sqrt" + f"{square_root_value}" + r"}{" + f"{bottom}" + r"}" + "}")
-        else:
-            x = int(sqrt(max(factors)))  # Coefficient
-            y = int(square_root_value / max(factors))  # Argument of the square root
-            return await ctx.respond(
-                r"https://latex.codecogs.com/png.latex?\dpi{175}{\color{White}" + r"x=\frac{" + f"{-b}" + rf"\pm{x}\sqrt" + f"{y}" + r"}{" + f"{bottom}" + r"}" + "}")
-
+        if a == 0:
+            return await ctx.respond('Lead coefficient of `0` is **not** a quadratic!!')
+
+        log.debug("Solving quadratic", extra={"a": a, "b": b, "c": c})
+        await ctx.defer()
+        try:
+            _, latex = await SYMBOLIC.run("solve", f"({a})*x^2 + ({b})*x + ({c})", "x")
+        except MathError as e:
+            return await ctx.respond(str(e))
+        await respond_latex(ctx, latex)
 
 def setup(bot):
     bot.add_cog(General(bot))
@@ -1,15 +1,11 @@
-import datetime
-import inspect
-import itertools
-import os
-import pygit2
+from typing import Dict, Optional
 
 import discord
 from discord.ext import commands
 
 from utils.checks import is_not_blacklisted
+from utils.repo import BRANCH, REPO_INFO, REPO_URL, SourceLocation, build_source_map
 from utils.variables import *
-from utils import times
 
 
 class Github(commands.Cog):
@@ -18,6 +14,7 @@ class Github(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self._source_map: Optional[Dict[str, SourceLocation]] = None
 
     async def cog_check(self, ctx):
         return await is_not_blacklisted(ctx)
@@ -26,21 +23,21 @@ class Github(commands.Cog):
     def display_emoji(self) -> discord.PartialEmoji:
         return discord.PartialEmoji(name='github', id=902367446986543116)
 
-    def get_last_commits(self, count: int):
-        repo = pygit2.Repository("tms-scioly-bots")
-        commits = list(itertools.islice(repo.walk(repo.head.target, pygit2.GIT_SORT_TOPOLOGICAL), count))
-        return '\n'.join(self.format_commit(c) for c in commits)
+    async def get_last_commits(self, count: int) -> str:
+        return await REPO_INFO.last_commits(count)
 
-    @staticmethod
-    def format_commit(commit):
-        short, _, _ = commit.message.partition('\n')
-        short_sha2 = commit.hex[0:6]
-        commit_tz = datetime.timezone(datetime.timedelta(minutes=commit.commit_time_offset))
-        commit_time = datetime.datetime.fromtimestamp(commit.commit_time).astimezone(commit_tz)
+    async def source_map(self) -> Dict[str, SourceLocation]:
+        """The command source map, built in an executor the first time it's needed after a (re)load."""
+        if self._source_map is None:
+            self._source_map = await self.bot.loop.run_in_executor(None, build_source_map, self.bot)
+        return self._source_map
 
-        # [`hash`](url) message (offset)
-        offset = times.format_relative(commit_time.astimezone(datetime.timezone.utc))
-        return f'[`{short_sha2}`](https://github.com/pandabear189/tms-scioly-bots/commit/{commit.hex}) {short} ({offset})'
+    def invalidate_source_map(self) -> None:
+        self._source_map = None
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await self.source_map()
 
     github = discord.SlashCommandGroup(
         "github",
@@ -52,7 +49,7 @@ class Github(commands.Cog):
     async def commits(self, ctx):
         '''Shows all the recent bot commits'''
         count = 20
-        revisions = self.get_last_commits(count)
+        revisions = await self.get_last_commits(count)
         embed = discord.Embed(title="Recent Changes", description=f"Displaying {count} changes \n" + revisions)
         await ctx.respond(embed=embed)
 
@@ -63,37 +60,16 @@ class Github(commands.Cog):
         periods, e.g. tag.create for the create subcommand of the tag command
         or by spaces.
         """
-        source_url = 'https://github.com/pandabear189/tms-scioly-bots'
-        branch = 'master'
         if command is None:
-            return await ctx.respond(source_url)
-
-        if command == 'help':
-            src = type(self.bot.help_command)
-            module = src.__module__
-            filename = inspect.getsourcefile(src)
-        else:
-            obj = self.bot.get_application_command(command.replace('.', ' '))
-            if obj is None:
-                return await ctx.respond('Could not find command.')
-
-            # since we found the command we're looking for, presumably anyway, let's
-            # try to access the code itself
-            src = obj.callback.__code__
-            module = obj.callback.__module__
-            filename = src.co_filename
-
-        lines, firstlineno = inspect.getsourcelines(src)
-        if not module.startswith('discord'):
-            # not a built-in command
-            location = os.path.relpath(filename).replace('\\', '/')
-        else:
-            location = module.replace('.', '/') + '.py'
-            source_url = 'https://github.com/Rapptz/discord.py'
-            branch = 'master'
-
-        final_url = f'<{source_url}/blob/{branch}/{location}#L{firstlineno}-L{firstlineno + len(lines) - 1}>'
-        await ctx.respond(final_url)
+            return await ctx.respond(REPO_URL)
+
+        source_map = await self.source_map()
+        entry = source_map.get(command.replace('.', ' ').strip().lower())
+        if entry is None:
+            return await ctx.respond('Could not find command.')
+
+        location, first, last, source_url = entry
+        await ctx.respond(f'<{source_url}/blob/{BRANCH}/{location}#L{first}-L{last}>')
 
 
 def setup(bot):
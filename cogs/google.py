@@ -15,7 +15,7 @@ from discord.ext import commands
 from html2text import html2text as h2t
 
 from utils.variables import SERVER_ID
-from utils.paginate import Pages, Source
+from utils.paginate import LazyPageSource, Pages, Source
 
 s = namedtuple("searchres", "url title desc")
 
@@ -107,9 +107,10 @@ class Google(commands.Cog):
         isnsfw = self.nsfwcheck(ctx)
         await ctx.defer()
         response, kwargs = await self.get_result(query, nsfw=isnsfw)
-        pages = []
         groups = [response[n: n + 3] for n in range(0, len(response), 3)]
-        for num, group in enumerate(groups, 1):
+
+        def render(group, page_number: int) -> discord.Embed:
+            num = page_number + 1
             emb = discord.Embed(
                 title="Google Search: {}".format(
                     query[:44] + "\N{HORIZONTAL ELLIPSIS}" if len(query) > 45 else query
@@ -139,9 +140,10 @@ class Google(commands.Cog):
 
             if "image" in kwargs and num == 1:
                 emb.set_image(url=kwargs["image"])
-            pages.append(emb)
-        if pages:
-            menu = Pages(ctx=ctx, source=Source(pages, per_page=1), compact=True)
+            return emb
+
+        if groups:
+            menu = Pages(ctx=ctx, source=LazyPageSource(groups, render=render), compact=True)
             await menu.start()
         else:
             await ctx.respond("No results.")
@@ -1,55 +1,228 @@
+import asyncio
+import datetime
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
 import discord
 from discord.ext import commands
 
+from utils.raid import DIGEST_INTERVAL, JoinRateDetector, RoleGrantWorker, age_histogram, format_histogram
+from utils.search import SEARCH_INDEX
 from utils.variables import *
 
+log = logging.getLogger(__name__)
+
+# Welcome digests mention at most this many members per message, keeping well under the 2000 character limit
+DIGEST_MENTIONS = 40
+# How long a checked name is remembered per member, so repeated updates don't re-scan it or file duplicate reports
+NAME_CHECK_TTL = 6 * 60 * 60
+# The startup scan lists at most this many offending names in its report
+SCAN_REPORT_LIMIT = 30
+
+
+class CheckedNames:
+    """Remembers which (member, name) pairs were censor checked recently, forgetting them after a TTL."""
+
+    def __init__(self, ttl: float = NAME_CHECK_TTL):
+        self.ttl = ttl
+        self._expiry: Dict[Tuple[int, str], float] = {}
+
+    def seen(self, member_id: int, name: str) -> bool:
+        """Returns true if the name was checked within the TTL, and otherwise records it as checked now."""
+        now = time.monotonic()
+        key = (member_id, name)
+        expiry = self._expiry.get(key)
+        if expiry is not None and expiry > now:
+            return True
+        if len(self._expiry) > 10000:
+            self._expiry = {k: v for k, v in self._expiry.items() if v > now}
+        self._expiry[key] = now + self.ttl
+        return False
+
 
 class Listeners(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.joins = JoinRateDetector()
+        self.role_grants = RoleGrantWorker()
+        self._member_role_id: Optional[int] = None
+        self._digest: List[discord.Member] = []
+        self._raid_ages: List[datetime.datetime] = []
+        self._digest_task: Optional[asyncio.Task] = None
+        self.checked_names = CheckedNames()
+        self._scanned_names = False
+
+    def cog_unload(self):
+        if self._digest_task is not None:
+            self._digest_task.cancel()
+        self.role_grants.cancel()
+
+    async def check_name(self, member: discord.Member, name: str) -> None:
+        """Reports a member's name if it needs censoring, unless the same name was checked recently."""
+        if self.checked_names.seen(member.id, name):
+            return
+        censor_cog = self.bot.get_cog("Censor")
+        if censor_cog.censor_needed(name):
+            reporter_cog = self.bot.get_cog('Reporter')
+            await reporter_cog.create_inappropriate_username_report(member=member, offending_username=name)
 
     @commands.Cog.listener()
     async def on_member_update(
             self, before, after
     ) -> None:
-
-        if after.nick is None:
+        # Most updates are role, avatar, timeout or pending changes, which leave the name alone
+        if before.display_name == after.display_name:
             return
-        censor_cog = self.bot.get_cog("Censor")
-        censor_found = censor_cog.censor_needed(after.nick)
-        if censor_found:
-            # If name contains a censored link
-            reporter_cog = self.bot.get_cog('Reporter')
-            await reporter_cog.create_inappropriate_username_report(member=after, offending_username=after.nick)
+        await self.check_name(after, after.display_name)
 
     @commands.Cog.listener()
-    async def on_member_join(
-            self, member: discord.Member
-    ):
-        if member.guild.id != SERVER_ID:
+    async def on_ready(self):
+        if self._scanned_names:
+            return
+        self._scanned_names = True
+        guild = self.bot.get_guild(SERVER_ID)
+        if guild is None:
             return
 
-        name = member.name
-        censor_cog = self.bot.get_cog('Censor')
-        if censor_cog.censor_needed(name):
-            reporter_cog: commands.Cog = self.bot.get_cog('Reporter')
-            await reporter_cog.create_inappropriate_username_report(member, member.name)
+        censor_cog = self.bot.get_cog("Censor")
+        offenders = []
+        for index, member in enumerate(guild.members):
+            for name in {member.name, member.display_name}:
+                # Mark every name as checked, so the first update after startup doesn't report it a second time
+                self.checked_names.seen(member.id, name)
+                if censor_cog.censor_needed(name):
+                    offenders.append((member, name))
+            if index % 1000 == 999:
+                await asyncio.sleep(0)
 
-        role: discord.Role = discord.utils.get(member.guild.roles, name=ROLE_MR)
-        join_channel: discord.TextChannel = discord.utils.get(member.guild.text_channels, id=WELCOME_CHANNEL)
-        await member.add_roles(role)
+        log.info("Scanned %d member names at startup, %d need censoring", len(guild.members), len(offenders))
+        if not offenders:
+            return
+        lines = [f"{member.mention} (`{member.id}`): `{name}`" for member, name in offenders[:SCAN_REPORT_LIMIT]]
+        if len(offenders) > SCAN_REPORT_LIMIT:
+            lines.append(f"...and {len(offenders) - SCAN_REPORT_LIMIT} more")
         embed = discord.Embed(
+            title="Inappropriate Usernames Found",
+            color=discord.Color.brand_red(),
+            description=f"A startup scan of {len(guild.members)} members found {len(offenders)} names that need "
+                        f"censoring:\n" + "\n".join(lines),
+            timestamp=discord.utils.utcnow()
+        )
+        reporter_cog = self.bot.get_cog('Reporter')
+        await reporter_cog.create_staff_message(embed)
+
+    @staticmethod
+    def welcome_embed(mentions: str) -> discord.Embed:
+        return discord.Embed(
             title="Welcome!",
-            description=f"{member.mention}! Welcome to the TMS Scio Discord. If you need any help "
+            description=f"{mentions}! Welcome to the TMS Scio Discord. If you need any help "
                         "feel free to open a ticket in <#848996283288518718> or use `/help` for "
                         "bot-command help! Please state your name, JV or Varsity, and add your "
                         "events in <#863054629787664464> ! ",
             timestamp=discord.utils.utcnow(),
             color=discord.Color.fuchsia()
         )
+
+    def member_role(self, guild: discord.Guild) -> Optional[discord.Role]:
+        role = guild.get_role(self._member_role_id) if self._member_role_id else None
+        if role is None:
+            role = discord.utils.get(guild.roles, name=ROLE_MR)
+            self._member_role_id = role.id if role else None
+        return role
+
+    @commands.Cog.listener()
+    async def on_member_join(
+            self, member: discord.Member
+    ):
+        if member.guild.id != SERVER_ID:
+            return
+
+        await self.check_name(member, member.name)
+
+        if self.joins.record(member.created_at):
+            await self.start_raid_mode()
+
+        role = self.member_role(member.guild)
+        if self.joins.active:
+            self.ensure_digests()
+            # Welcome in the next digest and grant the role from the queue, rather than two requests per join
+            self._raid_ages.append(member.created_at)
+            self._digest.append(member)
+            self.role_grants.enqueue(member, role)
+            return
+
+        join_channel = member.guild.get_channel(WELCOME_CHANNEL)
+        await member.add_roles(role)
         await join_channel.send(
-            embed=embed, content=f"{member.mention}"
+            embed=self.welcome_embed(member.mention), content=f"{member.mention}"
+        )
+
+    def ensure_digests(self):
+        """Starts the digest task unless it's already running; it's what eventually lifts raid mode."""
+        if self._digest_task is None or self._digest_task.done():
+            self._digest_task = asyncio.create_task(self.run_digests())
+
+    async def start_raid_mode(self):
+        # Count the joins that tripped the detector as part of the raid; the latest is added by on_member_join
+        self._raid_ages = self.joins.window_ages()[:-1]
+        self.ensure_digests()
+        embed = discord.Embed(
+            title="Raid mode enabled",
+            color=discord.Color.brand_red(),
+            description=f"**{self.joins.rate}** members joined in the last {int(self.joins.window)} seconds.\n"
+                        f"Welcomes are now sent as a digest every {int(DIGEST_INTERVAL)} seconds, and the Member role "
+                        f"is granted from a queue. Normal welcomes will resume once the join rate drops.\n"
+                        f"**Account ages**\n```\n{format_histogram(age_histogram(self.joins.window_ages()))}\n```",
+            timestamp=discord.utils.utcnow()
+        )
+        await self.alert_staff(embed)
+
+    async def alert_staff(self, embed: discord.Embed):
+        try:
+            reporter_cog = self.bot.get_cog('Reporter')
+            await reporter_cog.create_staff_message(embed)
+        except Exception:
+            log.exception("Failed to send the raid mode alert")
+
+    async def send_digest(self):
+        members, self._digest = self._digest, []
+        guild = self.bot.get_guild(SERVER_ID)
+        join_channel = guild.get_channel(WELCOME_CHANNEL)
+        # Skip anyone who left (or was banned) before their welcome went out
+        mentions = [member.mention for member in members if guild.get_member(member.id) is not None]
+        for index in range(0, len(mentions), DIGEST_MENTIONS):
+            chunk = " ".join(mentions[index:index + DIGEST_MENTIONS])
+            await join_channel.send(embed=self.welcome_embed(chunk), content=chunk)
+
+    async def run_digests(self):
+        # Nothing but cancellation may end this loop early, or raid mode would never be lifted
+        while True:
+            await asyncio.sleep(DIGEST_INTERVAL)
+            try:
+                await self.send_digest()
+            except Exception:
+                log.exception("Failed to send the welcome digest")
+            if self.joins.settle():
+                break
+        # Members who joined while the last digest was being sent
+        if self._digest:
+            try:
+                await self.send_digest()
+            except Exception:
+                log.exception("Failed to send the welcome digest")
+
+        embed = discord.Embed(
+            title="Raid mode lifted",
+            color=discord.Color.brand_green(),
+            description=f"The join rate has dropped, so members are being welcomed individually again.\n"
+                        f"**{len(self._raid_ages)}** members joined during the raid, and "
+                        f"**{self.role_grants.pending}** Member role grants are still queued.\n"
+                        f"**Account ages**\n```\n{format_histogram(age_histogram(self._raid_ages))}\n```",
+            timestamp=discord.utils.utcnow()
         )
+        self._raid_ages = []
+        await self.alert_staff(embed)
 
     @commands.Cog.listener()
     async def on_raw_message_edit(self, payload):
@@ -59,6 +232,14 @@ class Listeners(commands.Cog):
     async def on_raw_message_delete(self, payload):
         return await self.log_delete_message_payload(payload)
 
+    @staticmethod
+    async def index_logged(kind: str, content: str, **kwargs):
+        """Adds a logged edit or delete to the search index. Logging never fails because indexing did."""
+        try:
+            await SEARCH_INDEX.add(kind, content, **kwargs)
+        except Exception:
+            log.exception("Failed to index a %s log", kind)
+
     async def log_edit_message_payload(self, payload):
         """
         Logs a payload for the 'Edit Message' event.
@@ -210,6 +391,15 @@ class Listeners(commands.Cog):
                 )
 
             await edited_channel.send(embed=embed)
+            await self.index_logged("edit", message_now.content, user_id=message_now.author.id,
+                                    channel_id=channel.id, created_at=message_now.edited_at,
+                                    url=message_now.jump_url)
+
+        else:
+            # Outside the try, so an indexing failure can't send the log a second time through the fallback
+            await self.index_logged("edit", f"{message.content}\n{message_now.content}", user_id=message.author.id,
+                                    channel_id=channel.id, created_at=message_now.edited_at,
+                                    url=message_now.jump_url)
 
     async def log_delete_message_payload(self, payload):
         """
@@ -321,6 +511,9 @@ class Listeners(commands.Cog):
 
             await deleted_channel.send(embed=embed)
 
+        else:
+            await self.index_logged("delete", message.content, user_id=message.author.id, channel_id=channel.id)
+
 
 def setup(bot):
     bot.add_cog(Listeners(bot))
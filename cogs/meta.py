@@ -2,9 +2,8 @@ from discord.ext import commands, menus
 from typing import Union, List, Any, Dict, Optional
 import discord
 import utils.times as time
-from utils.paginate import RoboPages
+from utils.paginate import Pages
 import inspect
-import itertools
 
 from utils.variables import SERVER_ID
 
@@ -67,8 +66,7 @@ class GroupHelpPageSource(menus.ListPageSource):
 
         return ' '.join(result)
 
-    async def format_page(self, menu, commands: List[Union[discord.SlashCommand, discord.SlashCommandGroup]]):
-
+    def render(self, commands: List[Union[discord.SlashCommand, discord.SlashCommandGroup]], page: int) -> discord.Embed:
         embed = discord.Embed(title=self.title, description=self.description, colour=discord.Color.fuchsia())
         for command in commands:
             signature = f'{command.name} {self.signature(command)}'
@@ -76,24 +74,128 @@ class GroupHelpPageSource(menus.ListPageSource):
 
         maximum = self.get_max_pages()
         if maximum > 1:
-            embed.set_author(name=f'Page {menu.current_page + 1}/{maximum} ({len(self.entries)} commands)')
+            embed.set_author(name=f'Page {page + 1}/{maximum} ({len(self.entries)} commands)')
 
         embed.set_footer(text=f'Use "/help command" for more info on a command.')
         return embed
 
+    def render_all(self) -> List[discord.Embed]:
+        """Renders every page up front."""
+        return [
+            self.render(self.entries[i:i + self.per_page], i // self.per_page)
+            for i in range(0, len(self.entries), self.per_page)
+        ]
+
+    async def format_page(self, menu, commands: List[Union[discord.SlashCommand, discord.SlashCommandGroup]]):
+        return self.render(commands, menu.current_page)
+
+
+class RenderedPageSource(menus.ListPageSource):
+    """A page source over embeds that have already been rendered."""
+
+    def __init__(self, pages: List[discord.Embed]):
+        super().__init__(entries=pages, per_page=1)
+
+    async def format_page(self, menu, page: discord.Embed):
+        return page
+
+
+class HelpIndex:
+    """
+    Everything /help shows, built once from the loaded commands.
+    Holds the rendered pages for each category and command group, the embed for each command, and a prefix index of
+    command names and description words for autocomplete. It is marked stale whenever a module is loaded, unloaded or
+    reloaded, and rebuilt on the next lookup.
+    """
+
+    MAX_SUGGESTIONS = 25
+
+    def __init__(self, help_cog: 'Help'):
+        self.help_cog = help_cog
+        self.stale = True
+        self.categories: Dict[str, commands.Cog] = {}
+        self.category_commands: Dict[str, List[discord.SlashCommand]] = {}
+        self.category_pages: Dict[str, List[discord.Embed]] = {}
+        self.commands: Dict[str, Union[discord.SlashCommand, discord.SlashCommandGroup]] = {}
+        self.command_embeds: Dict[str, discord.Embed] = {}
+        self.group_pages: Dict[str, List[discord.Embed]] = {}
+        self.prefixes: Dict[str, List[str]] = {}
+
+    def invalidate(self) -> None:
+        self.stale = True
+
+    def ensure(self) -> 'HelpIndex':
+        if self.stale:
+            self.build()
+        return self
+
+    def _index_prefixes(self, word: str, name: str) -> None:
+        for i in range(1, len(word) + 1):
+            names = self.prefixes.setdefault(word[:i], [])
+            if name not in names and len(names) < self.MAX_SUGGESTIONS:
+                names.append(name)
+
+    def build(self) -> None:
+        bot = self.help_cog.bot
+        self.categories.clear()
+        self.category_commands.clear()
+        self.category_pages.clear()
+        self.commands.clear()
+        self.command_embeds.clear()
+        self.group_pages.clear()
+        self.prefixes.clear()
+
+        slash_commands = sorted(
+            (x for x in bot.application_commands if isinstance(x, (discord.SlashCommand, discord.SlashCommandGroup))),
+            key=lambda c: c.name
+        )
+        for command in slash_commands:
+            name = command.name.lower()
+            self.commands[name] = command
+            embed = discord.Embed(colour=discord.Colour.fuchsia())
+            self.help_cog.common_command_formatting(embed, command)
+            self.command_embeds[name] = embed
+
+            if isinstance(command, discord.SlashCommandGroup) and command.subcommands:
+                source = GroupHelpPageSource(command, sorted(command.subcommands, key=lambda c: c.name), prefix="/")
+                self.help_cog.common_command_formatting(source, command)
+                self.group_pages[name] = source.render_all()
+
+            if command.cog is not None:
+                self.category_commands.setdefault(command.cog.qualified_name, []).append(command)
+
+        for cog_name in sorted(self.category_commands):
+            cog = bot.get_cog(cog_name)
+            self.categories[cog_name.lower()] = cog
+            source = GroupHelpPageSource(cog, self.category_commands[cog_name], prefix="/")
+            self.category_pages[cog_name.lower()] = source.render_all()
+
+        # Exact name matches are indexed before description words so they are suggested first
+        for name in self.commands:
+            self._index_prefixes(name, name)
+        for name, command in self.commands.items():
+            for word in (command.description or '').lower().split():
+                self._index_prefixes(word.strip('.,!?()`\'"'), name)
+
+        self.stale = False
+
+    def suggest(self, text: str) -> List[str]:
+        """Returns command names starting with, or described by a word starting with, the given text."""
+        text = text.strip().lower()
+        if not text:
+            return list(self.commands)[:self.MAX_SUGGESTIONS]
+        return self.prefixes.get(text, [])
+
 
 class HelpSelectMenu(discord.ui.Select['HelpMenu']):
-    def __init__(self,
-                 commands: Dict[commands.Cog, List[Union[commands.Command, discord.commands.SlashCommand]]],
-                 bot: Union[commands.AutoShardedBot, commands.Bot]):
+    def __init__(self, index: HelpIndex):
         super().__init__(
             placeholder='Select a category...',
             min_values=1,
             max_values=1,
             row=0,
         )
-        self.commands = commands
-        self.bot = bot
+        self.index = index
         self.__fill_options()
 
     def __fill_options(self) -> None:
@@ -103,12 +205,10 @@ class HelpSelectMenu(discord.ui.Select['HelpMenu']):
             value='__index',
             description='The help page showing how to use the bot.',
         )
-        for cog, commands in self.commands.items():
-            if not commands:
-                continue
+        for name, cog in self.index.categories.items():
             description = cog.description.split('\n', 1)[0] or None
             emoji = getattr(cog, 'display_emoji', None)
-            self.add_option(label=cog.qualified_name, value=cog.qualified_name, description=description, emoji=emoji)
+            self.add_option(label=cog.qualified_name, value=name, description=description, emoji=emoji)
 
     async def callback(self, interaction: discord.Interaction):
         assert self.view is not None
@@ -116,46 +216,23 @@ class HelpSelectMenu(discord.ui.Select['HelpMenu']):
         if value == '__index':
             await self.view.rebind(FrontPageSource(), interaction)
         else:
-            cog = self.bot.get_cog(value)
-            if cog is None:
+            pages = self.index.ensure().category_pages.get(value)
+            if not pages:
                 await interaction.response.send_message('Somehow this category does not exist?', ephemeral=True)
                 return
 
-            commands = self.commands[cog]
-            if not commands:
-                await interaction.response.send_message('This category has no commands for you', ephemeral=True)
-                return
-
-            source = GroupHelpPageSource(cog, commands, prefix="/")
-            await self.view.rebind(source, interaction)
+            await self.view.rebind(RenderedPageSource(pages), interaction)
 
 
-class HelpMenu(RoboPages):
+class HelpMenu(Pages):
     def __init__(self, source: menus.PageSource, ctx: discord.ApplicationContext):
         super().__init__(source, ctx=ctx, compact=True)
 
-    def add_categories(
-            self,
-            commands: Dict[commands.Cog, List[Union[commands.Command, discord.commands.SlashCommand]]]
-    ) -> None:
+    def add_categories(self, index: HelpIndex) -> None:
         self.clear_items()
-        self.add_item(HelpSelectMenu(commands, self.ctx.bot))
+        self.add_item(HelpSelectMenu(index))
         self.fill_items()
 
-    async def rebind(
-            self,
-            source: menus.PageSource,
-            interaction: discord.Interaction
-    ) -> None:
-        self.source = source
-        self.current_page = 0
-
-        await self.source._prepare_once()
-        page = await self.source.get_page(0)
-        kwargs = await self._get_kwargs_from_page(page)
-        self._update_labels(0)
-        await interaction.response.edit_message(**kwargs, view=self)
-
 
 class FrontPageSource(menus.PageSource):
     def is_paginating(self) -> bool:
@@ -217,11 +294,16 @@ class FrontPageSource(menus.PageSource):
         return embed
 
 
+async def help_autocomplete(ctx: discord.AutocompleteContext) -> List[str]:
+    return ctx.bot.get_cog("Help").index.ensure().suggest(ctx.value or "")
+
+
 class Help(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.old_help_command = bot.help_command
         bot.help_command.cog = self
+        self.index = HelpIndex(self)
 
     @property
     def display_emoji(self) -> discord.PartialEmoji:
@@ -309,37 +391,19 @@ class Help(commands.Cog):
             await ctx.send(str(error.original))
 
     def get_command_signature(self, command: discord.SlashCommand):
-        alias = command.qualified_name()
+        alias = command.qualified_name
         return f'{alias} {self.signature(command)}'
 
     async def send_bot_help(self, ctx, mapping):
-        bot = self.bot
-
-        def key(command: discord.SlashCommand) -> str:
-            cog = command.cog
-            return '\U0010ffff' if not cog else cog.qualified_name
-
-        entries = await self.filter_commands(
-            [x for x in bot.application_commands if isinstance(x, (discord.SlashCommand, discord.SlashCommandGroup))],
-            sort=True,
-            key=key)
-
-        all_commands: Dict[commands.Cog, List[discord.SlashCommand]] = {}
-        for name, children in itertools.groupby(entries, key=key):
-            if name == '\U0010ffff':
-                continue
-
-            cog = bot.get_cog(name)
-            all_commands[cog] = sorted(children, key=lambda c: c.name)
-
         menu = HelpMenu(FrontPageSource(), ctx=ctx)
-        menu.add_categories(all_commands)
+        menu.add_categories(self.index.ensure())
         await menu.start()
 
     async def send_cog_help(self, ctx, cog: commands.Cog):
-        cmd_list = [x for x in cog.get_commands() if isinstance(x, (discord.SlashCommand, discord.SlashCommandGroup))]
-        entries = await self.filter_commands(cmd_list, sort=True)
-        menu = HelpMenu(GroupHelpPageSource(cog, entries, prefix="/"), ctx=ctx)
+        pages = self.index.ensure().category_pages.get(cog.qualified_name.lower())
+        if not pages:
+            return await ctx.respond("This category has no commands.")
+        menu = HelpMenu(RenderedPageSource(pages), ctx=ctx)
         await menu.start()
 
     def common_command_formatting(
@@ -359,27 +423,22 @@ class Help(commands.Cog):
             command: discord.SlashCommand
     ):
         # No pagination necessary for a single command.
-        embed = discord.Embed(colour=discord.Colour.fuchsia())
-        self.common_command_formatting(embed, command)
-        context = ctx
-        await context.respond(embed=embed)
+        embed = self.index.ensure().command_embeds.get(command.name.lower())
+        if embed is None:
+            embed = discord.Embed(colour=discord.Colour.fuchsia())
+            self.common_command_formatting(embed, command)
+        await ctx.respond(embed=embed)
 
     async def send_group_help(
             self,
             ctx: discord.ApplicationContext,
             group: Union[discord.SlashCommandGroup, discord.SlashCommand]
     ):
-        subcommands = group.subcommands
-        if len(subcommands) == 0:
+        pages = self.index.ensure().group_pages.get(group.name.lower())
+        if not pages:
             return await self.send_command_help(ctx, group)
 
-        entries = await self.filter_commands(subcommands, sort=True)
-        if len(entries) == 0:
-            return await self.send_command_help(ctx, group)
-
-        source = GroupHelpPageSource(group, entries, prefix="/")
-        self.common_command_formatting(source, group)
-        menu = HelpMenu(source, ctx=ctx)
+        menu = HelpMenu(RenderedPageSource(pages), ctx=ctx)
         await menu.start()
 
     async def command_callback(self, ctx: discord.ApplicationContext, *, command=None):
@@ -399,29 +458,26 @@ class Help(commands.Cog):
         - :meth:`prepare_help_command`
         """
         await self.prepare_help_command(ctx, command)
-        bot = self.bot
 
         if command is None:
             mapping = self.get_bot_mapping()
             return await self.send_bot_help(ctx=ctx, mapping=mapping)
 
+        index = self.index.ensure()
+        name = command.strip().lower()
+
         # Check if it's a cog
-        cog = bot.get_cog(command)
+        cog = index.categories.get(name)
         if cog is not None:
             return await self.send_cog_help(ctx=ctx, cog=cog)
 
-        # If it's not a cog then it's a command.
-        # Since we want to have detailed errors when someone
-        # passes an invalid subcommand, we need to walk through
-        # the command group chain ourselves.
-        slash_cmd: discord.SlashCommand = bot.get_application_command(command)
-        slash_group: discord.SlashCommandGroup = bot.get_application_command(command, type=discord.SlashCommandGroup)
+        # If it's not a cog then it's a command or a command group
+        slash_cmd = index.commands.get(name)
+        if isinstance(slash_cmd, discord.SlashCommandGroup):
+            return await self.send_group_help(ctx, slash_cmd)
         if slash_cmd:
             return await self.send_command_help(ctx, slash_cmd)
-        if slash_group:
-            return await self.send_group_help(ctx, slash_group)
-        if not slash_group and not slash_cmd:
-            return await ctx.respond("Couldn't find command")
+        return await ctx.respond("Couldn't find command")
 
     async def prepare_help_command(self, ctx: discord.ApplicationContext, command=None):
         """|coro|
@@ -452,11 +508,16 @@ class Help(commands.Cog):
         mapping[None] = [c for c in bot.commands if c.cog is None]
         return mapping
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        self.index.build()
+
     @discord.slash_command(guild_ids=[SERVER_ID])
     async def help(
             self,
             ctx,
-            command: Optional[str]
+            command: discord.Option(str, description="A command or category", required=False,
+                                    autocomplete=help_autocomplete)
     ):
         await ctx.defer()
         await self.command_callback(ctx, command=command)
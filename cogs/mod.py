@@ -1,6 +1,9 @@
 import asyncio
 import datetime
 import json
+import logging
+import re
+from typing import List, Optional
 
 import discord
 from discord import ApplicationContext, CommandPermission
@@ -9,11 +12,21 @@ from discord.commands.commands import Option
 from discord.ext import commands
 
 from cogs.censor import CENSORED
+from utils.cases import CASE_LEDGER
 from utils.checks import is_staff
+from utils.logs import LEVELS, LOGS
+from utils.paginate import FieldPageSource, Pages
+from utils.purge import PurgeJob, message_filter
+from utils.search import SEARCH_INDEX
+from utils.times import parse_duration, parse_time
 from utils.variables import *
 from utils.views import Confirm, CronView, ReportView, Nuke
 
-STOPNUKE = datetime.datetime.utcnow()
+log = logging.getLogger(__name__)
+
+# Per-channel caps for /nuke: messages deleted, and history read when filtering without a time window
+MAX_NUKE = 10000
+NUKE_SCAN_LIMIT = 20000
 
 
 class Moderation(commands.Cog):
@@ -35,6 +48,25 @@ class Moderation(commands.Cog):
         closed_reports = discord.utils.get(ctx.guild.channels, id=CHANNEL_CLOSED_REPORTS)
         await closed_reports.send(embed=embed)
 
+    @staticmethod
+    async def record_action(kind: str, member: discord.abc.User, moderator: discord.abc.User, reason: str,
+                            url: str = None) -> Optional[int]:
+        """
+        Records a moderation action as a case and in the search index, returning the case ID.
+        The action has already been taken by the time this runs, so a failed write is logged rather than raised.
+        """
+        try:
+            case_id = await CASE_LEDGER.add(member.id, kind, reason, moderator_id=moderator.id)
+        except Exception:
+            log.exception("Failed to record a %s case for %s", kind, member.id)
+            return None
+        try:
+            await SEARCH_INDEX.add(kind, f"Case #{case_id}: {reason}\nResponsible moderator: {moderator}",
+                                   user_id=member.id, url=url)
+        except Exception:
+            log.exception("Failed to index case #%s", case_id)
+        return case_id
+
     @slash_command(guild_ids=[SERVER_ID])
     @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
     async def cron(self, ctx):
@@ -92,7 +124,6 @@ class Moderation(commands.Cog):
             return await ctx.respond(f"`{phrase}` is already in the censored words list. Operation cancelled.")
         else:
             CENSORED['words'].append(phrase)
-            self.bot.reload_extension("cogs.censor")
             return await ctx.respond(f"Added Word to censored list")
 
     @censor.command()
@@ -108,9 +139,53 @@ class Moderation(commands.Cog):
             return await ctx.respond(f"`{phrase}` is not in the list of censored words.")
         else:
             CENSORED["words"].remove(phrase)
-            self.bot.reload_extension("cogs.censor")
             return await ctx.respond(f"Removed {phrase} from list of censored words")
 
+    logs = discord.SlashCommandGroup(
+        "logs",
+        "Configure the bot's logging",
+        guild_ids=[SERVER_ID],
+        permissions=[CommandPermission(
+            823929718717677568,
+            1,
+            True
+        )],
+        default_permission=False
+    )
+
+    @logs.command()
+    @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
+    async def level(
+            self,
+            ctx,
+            logger: Option(str, description="The logger to configure, e.g. `utils.pipeline` or `cogs.tasks`"),
+            level: Option(str, description="The lowest level to record", choices=LEVELS)
+    ):
+        '''Sets the level of a logger'''
+        await LOGS.set_level(logger, level)
+        await ctx.respond(f"`{logger}` now logs at `{level}` and above.")
+
+    @logs.command()
+    @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
+    async def sample(
+            self,
+            ctx,
+            logger: Option(str, description="The logger to sample, e.g. `utils.pipeline`"),
+            percent: Option(float, description="Percentage of records to keep (100 turns sampling off)")
+    ):
+        '''Samples a high volume logger'''
+        await LOGS.set_sampling(logger, percent / 100)
+        await ctx.respond(f"Keeping {percent:g}% of `{logger}` records below WARNING.")
+
+    @logs.command()
+    @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
+    async def status(self, ctx):
+        '''Shows the configured loggers'''
+        status = LOGS.status()
+        if not status:
+            return await ctx.respond("Every logger is using the default level with no sampling.")
+        await ctx.respond("\n".join(f"`{name}`: {value}" for name, value in status.items()))
+
     @slash_command(guild_ids=[SERVER_ID])
     @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
     async def slowmode(self,
@@ -158,19 +233,6 @@ class Moderation(commands.Cog):
                                               )
                   ):
         """Bans a user."""
-        times = {
-            "10 minutes": datetime.datetime.now() + datetime.timedelta(minutes=10),
-            "30 minutes": datetime.datetime.now() + datetime.timedelta(minutes=30),
-            "1 hour": datetime.datetime.now() + datetime.timedelta(hours=1),
-            "2 hours": datetime.datetime.now() + datetime.timedelta(hours=2),
-            "4 hours": datetime.datetime.now() + datetime.timedelta(hours=4),
-            "8 hours": datetime.datetime.now() + datetime.timedelta(hours=8),
-            "1 day": datetime.datetime.now() + datetime.timedelta(days=1),
-            "4 days": datetime.datetime.now() + datetime.timedelta(days=4),
-            "7 days": datetime.datetime.now() + datetime.timedelta(days=7),
-            "1 month": datetime.datetime.now() + datetime.timedelta(days=30),
-            "1 year": datetime.datetime.now() + datetime.timedelta(days=365),
-        }
         delete_length = {
             "Previous 24 hours": 1,
             "Previous 7 days": 7,
@@ -180,7 +242,8 @@ class Moderation(commands.Cog):
         if ban_length == "Indefinitely":
             time_statement = f"They will never be automatically unbanned."
         else:
-            time_statement = f"They will be banned until {discord.utils.format_dt(times[ban_length], 'F')}."
+            until = parse_time(ban_length)
+            time_statement = f"They will be banned until {discord.utils.format_dt(until, 'F')}."
 
         original_shown_embed = discord.Embed(
             title="Ban Confirmation",
@@ -218,11 +281,12 @@ class Moderation(commands.Cog):
 
                 await member.send(embed=embed)
                 await ctx.guild.ban(member, reason=reason, delete_message_days=delete_message)
+                await self.record_action("ban", member, ctx.author, reason)
                 await ctx.interaction.edit_original_message(embed=original_shown_embed, content=None)
                 await reports_channel.send(embed=original_shown_embed)
                 if ban_length != "Indefinitely":
                     cron_cog = self.bot.get_cog("CronTasks")
-                    await cron_cog.schedule_unban(member, times[ban_length])
+                    await cron_cog.schedule_unban(member, until)
 
             elif member not in guild.members:
                 original_shown_embed.colour = discord.Color.brand_green()
@@ -232,9 +296,10 @@ class Moderation(commands.Cog):
                 await ctx.interaction.edit_original_message(embed=original_shown_embed, content=None)
                 await reports_channel.send(embed=original_shown_embed)
                 await ctx.guild.ban(member, reason=reason, delete_message_days=delete_message)
+                await self.record_action("ban", member, ctx.author, reason)
                 if ban_length != "Indefinitely":
                     cron_cog = self.bot.get_cog("CronTasks")
-                    await cron_cog.schedule_unban(member, times[ban_length])
+                    await cron_cog.schedule_unban(member, until)
             else:
                 await ctx.interaction.edit_original_message(
                     content="The user was not successfully banned because of an error. They remain in the server.",
@@ -292,6 +357,7 @@ class Moderation(commands.Cog):
             if member.id in TMS_BOT_IDS:
                 return await ctx.respond("Hey! You can't kick me!!")
             await member.kick(reason=reason)
+            await self.record_action("kick", member, ctx.author, reason)
 
             em6 = discord.Embed(title="",
                                 description=f"{member.mention} was kicked for {reason}.",
@@ -323,24 +389,13 @@ class Moderation(commands.Cog):
                                 ])
     ):
 
-        times = {
-            "10 minutes": datetime.datetime.now() + datetime.timedelta(minutes=10),
-            "30 minutes": datetime.datetime.now() + datetime.timedelta(minutes=30),
-            "1 hour": datetime.datetime.now() + datetime.timedelta(hours=1),
-            "2 hours": datetime.datetime.now() + datetime.timedelta(hours=2),
-            "4 hours": datetime.datetime.now() + datetime.timedelta(hours=4),
-            "8 hours": datetime.datetime.now() + datetime.timedelta(hours=8),
-            "1 day": datetime.datetime.now() + datetime.timedelta(days=1),
-            "4 days": datetime.datetime.now() + datetime.timedelta(days=4),
-            "7 days": datetime.datetime.now() + datetime.timedelta(days=7),
-            "1 month": datetime.datetime.now() + datetime.timedelta(days=30),
-            "1 year": datetime.datetime.now() + datetime.timedelta(days=365),
-        }
 
         if mute_length == "Indefinitely":
+            until = None
             time_statement = "The user will never be automatically unmuted."
         else:
-            time_statement = f"The user will be muted until {discord.utils.format_dt(times[mute_length], 'F')}."
+            until = parse_time(mute_length)
+            time_statement = f"The user will be muted until {discord.utils.format_dt(until, 'F')}."
 
         original_shown_embed = discord.Embed(
             title="Mute Confirmation",
@@ -362,10 +417,11 @@ class Moderation(commands.Cog):
         role = discord.utils.get(user.guild.roles, name=ROLE_MUTED)
         if view.value is True:
             await user.add_roles(role)
+            await self.record_action("mute", user, ctx.author, reason)
             await user.send(message)
             if mute_length != "Indefinitely":
                 cron_cog = self.bot.get_cog("CronTasks")
-                await cron_cog.schedule_unmute(user, times[mute_length])
+                await cron_cog.schedule_unmute(user, until)
 
             original_shown_embed.colour = discord.Colour.brand_green()
             original_shown_embed.title = "Successfully Muted"
@@ -374,9 +430,9 @@ class Moderation(commands.Cog):
             await ctx.interaction.edit_original_message(embed=original_shown_embed, view=None, content=None)
             close_embed = discord.Embed(
                 title=f"Successfully Muted {user}",
-                description=f"{user.mention} was successfully muted until "
-                            f"{discord.utils.format_dt(times[mute_length], 'F')} \n\n"
-                            f"Use `/cron` to modify this mute.",
+                description=f"{user.mention} was successfully muted "
+                            f"{'indefinitely' if until is None else 'until ' + discord.utils.format_dt(until, 'F')}"
+                            f" \n\nUse `/cron` to modify this mute.",
                 timestamp=discord.utils.utcnow(),
                 color=discord.Color.brand_green()
             )
@@ -389,69 +445,139 @@ class Moderation(commands.Cog):
             original_shown_embed.timestamp = discord.utils.utcnow()
             await ctx.interaction.edit_original_message(embed=original_shown_embed, view=None, content=None)
 
+    def _nuke_channels(self, ctx, channels: Optional[str]) -> List[discord.TextChannel]:
+        """Resolves the channels option: channel mentions, `all`, or the current channel when left empty."""
+        if not channels:
+            return [ctx.channel]
+        if channels.strip().lower() == "all":
+            found = ctx.guild.text_channels
+        else:
+            found = [ctx.guild.get_channel(int(channel_id)) for channel_id in re.findall(r"<#(\d+)>", channels)]
+        return [
+            channel for channel in found
+            if isinstance(channel, discord.TextChannel) and channel.permissions_for(ctx.guild.me).manage_messages
+        ]
+
     @slash_command(guild_ids=[SERVER_ID])
     @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
-    async def nuke(self, ctx, count: Option(int, description="The amount of messages to delete")):
-        """Nukes (deletes) a specified amount of messages."""
-        global STOPNUKE
-        MAX_DELETE = 100
-        if int(count) > MAX_DELETE:
-            return await ctx.respond("Chill. No more than deleting 100 messages at a time.")
-        channel = ctx.channel
-        if int(count) < 0:
-            history = await channel.history(limit=105).flatten()
-            message_count = len(history)
-            if message_count > 100:
-                count = 100
-            else:
-                count = message_count + int(count) - 1
-            if count <= 0:
-                return await ctx.respond(
-                    "Sorry, you can not delete a negative amount of messages. This is likely because you are asking "
-                    "to save more messages than there are in the channel.")
+    async def nuke(
+            self,
+            ctx,
+            count: Option(int, description="The most messages to delete from each channel"),
+            user: Option(discord.Member, description="Only delete messages from this user", required=False),
+            pattern: Option(str, description="Only delete messages matching this regex", required=False),
+            within: Option(str, description="Only delete messages sent within this long, e.g. 30m or 2 hours",
+                           required=False),
+            attachments: Option(bool, description="Only delete messages with (or without) attachments",
+                                required=False),
+            links: Option(bool, description="Only delete messages with (or without) links", required=False),
+            channels: Option(str, description="Channel mentions to nuke, or `all`. Defaults to this channel",
+                             required=False)
+    ):
+        """Nukes (deletes) messages, optionally filtered by user, content, age, attachments and links."""
+        if count <= 0:
+            return await ctx.respond("Sorry, you can only nuke a positive amount of messages.", ephemeral=True)
+        if count > MAX_NUKE:
+            return await ctx.respond(f"Chill. No more than {MAX_NUKE} messages per channel at a time.",
+                                     ephemeral=True)
+
+        compiled = None
+        if pattern:
+            try:
+                compiled = re.compile(pattern, re.IGNORECASE)
+            except re.error as e:
+                return await ctx.respond(f"That pattern is not a valid regex: `{e}`", ephemeral=True)
+
+        after = None
+        if within:
+            window = parse_duration(within)
+            if window is None:
+                return await ctx.respond(f"Sorry, I couldn't understand `{within}` as a length of time.",
+                                         ephemeral=True)
+            after = discord.utils.utcnow() - window
+
+        targets = self._nuke_channels(ctx, channels)
+        if not targets:
+            return await ctx.respond("I can't delete messages in any of those channels.", ephemeral=True)
+
+        filtered = any(option is not None for option in (user, compiled, attachments, links))
+        check = message_filter(
+            author_id=user.id if user else None,
+            pattern=compiled,
+            attachments=attachments,
+            links=links
+        )
+        # Unfiltered nukes only need the newest `count` messages; filtered ones have to look further back
+        limit = count if not filtered else (None if after else NUKE_SCAN_LIMIT)
+
+        filters = []
+        if user:
+            filters.append(f"from {user.mention}")
+        if compiled:
+            filters.append(f"matching `{pattern}`")
+        if after:
+            filters.append(f"sent since {discord.utils.format_dt(after, 'R')}")
+        if attachments is not None:
+            filters.append("with attachments" if attachments else "without attachments")
+        if links is not None:
+            filters.append("with links" if links else "without links")
+        scope = ", ".join(channel.mention for channel in targets[:10])
+        if len(targets) > 10:
+            scope += f" and {len(targets) - 10} more"
+        summary = f"Up to {count} messages {' '.join(filters)} will be deleted from each of {scope}"
 
         original_shown_embed = discord.Embed(
             title="NUKE COMMAND PANEL",
             color=discord.Color.brand_red(),
             description=f"""
-            {count} messages will be deleted from {channel.mention} in `10` seconds...
+            {summary} {discord.utils.format_dt(discord.utils.utcnow() + datetime.timedelta(seconds=10), 'R')}...
             To stop this nuke, press the red button below!
             """
         )
         view = Nuke(ctx)
         await ctx.respond(embed=original_shown_embed, view=view)
-        await asyncio.sleep(1)
+        # The countdown is rendered by the client, so there's nothing to edit until it's over or someone aborts
+        try:
+            await asyncio.wait_for(view.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            pass
+        if view.stopped:
+            return
 
-        for i in range(9, 0, -1):
+        async def progress(job: PurgeJob):
             if view.stopped:
-                break
+                return
             original_shown_embed.description = f"""
-            {count} messages will be deleted from {channel.mention} in `{i}` seconds...
+            Now nuking... scanned {job.scanned} messages and removed {job.matched} so far.
             To stop this nuke, press the red button below!
             """
             await ctx.interaction.edit_original_message(embed=original_shown_embed, view=view)
-            await asyncio.sleep(1)
-
-        if not view.stopped:
-            original_shown_embed.description = f"""
-            Now nuking {count} messages from the channel...
-            """
-            await ctx.interaction.edit_original_message(embed=original_shown_embed, view=None)
-
-            # Nuke has not been stopped, proceed with deleting messages
-            def nuke_check(msgs: discord.Message) -> bool:
-                return not msgs.pinned
-
-            new_embed = discord.Embed(
-                title="NUKE COMMAND PANEL",
-                color=discord.Color.brand_green(),
-                description=f"""
-                        {count} messages have been deleted from {channel.mention} 
-                        """
-            )
-
-            await channel.purge(limit=count + 3, check=nuke_check)
-            await channel.send(embed=new_embed)
+            if view.stopped and view.aborted is not None:
+                # The abort landed while this edit was in flight and was overwritten by it
+                await ctx.interaction.edit_original_message(embed=view.aborted, view=None)
+
+        # Only nuke what came before the panel, so the panel stays up to show progress and `count` is exact
+        panel = await ctx.interaction.original_message()
+        job = view.job = PurgeJob(targets, check, limit=limit, max_matches=count, before=panel.created_at,
+                                  after=after, progress=progress)
+        await job.run()
+        view.stop()
+        if job.cancelled:
+            # The abort button already replaced the panel
+            return
+
+        new_embed = discord.Embed(
+            title="NUKE COMMAND PANEL",
+            color=discord.Color.brand_green(),
+            description=f"{job.matched} messages have been deleted from {scope}"
+        )
+        if job.queued:
+            new_embed.description += f"\n{job.queued} of them are older than two weeks and will be deleted in the " \
+                                     f"background."
+        top = job.authors.most_common(10)
+        if top:
+            new_embed.add_field(name="Authors", value="\n".join(f"**{author}**: {n}" for author, n in top))
+        await ctx.interaction.edit_original_message(embed=new_embed, view=None)
 
     @slash_command(guild_ids=[SERVER_ID])
     @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
@@ -533,10 +659,80 @@ class Moderation(commands.Cog):
         embed2.set_author(name=f"{mod}",
                           icon_url=avatar)
 
-        await reports_channel.send(embed=embed, view=ReportView())
+        report_message = await reports_channel.send(embed=embed, view=ReportView())
+        await self.record_action("warn", member, mod, reason, url=report_message.jump_url)
         await ctx.respond(embed=embed1)
         await member.send(embed=embed2)
 
+    @slash_command(guild_ids=[SERVER_ID])
+    @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
+    async def cases(self, ctx, user: Option(discord.User, description="The user to show the moderation history of")):
+        '''Shows the moderation cases recorded against a user'''
+        rows = await CASE_LEDGER.cases_for(user.id)
+        if not rows:
+            return await ctx.respond(f"`{user}` has no recorded cases.")
+
+        entries = []
+        for case in rows:
+            created_at = datetime.datetime.fromtimestamp(case["created_at"], tz=datetime.timezone.utc)
+            moderator = "Automatic" if case["automatic"] else f"<@{case['moderator_id']}>"
+            entries.append((
+                f"Case #{case['id']} - {case['action'].title()}",
+                f"{case['reason'] or 'No reason given'}\n"
+                f"By: {moderator} | {discord.utils.format_dt(created_at, 'R')}"
+            ))
+
+        source = FieldPageSource(entries, per_page=6)
+        source.embed.title = f"Cases for {user} ({CASE_LEDGER.recent_count(user.id)} in the last day)"
+        menu = Pages(ctx=ctx, source=source)
+        await menu.start()
+
+    @slash_command(guild_ids=[SERVER_ID])
+    @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
+    async def modsearch(
+            self,
+            ctx,
+            keywords: Option(str, description="Words to search for", required=False),
+            user: Option(discord.User, description="Only show results about this user", required=False),
+            after: Option(str, description="Only show results from this date onwards (YYYY-MM-DD)", required=False),
+            before: Option(str, description="Only show results from before this date (YYYY-MM-DD)", required=False),
+            kind: Option(str, description="Only show one kind of result", required=False,
+                         choices=["report", "warn", "ban", "kick", "mute", "edit", "delete", "transcript"])
+    ):
+        '''Searches logged messages, reports, moderation actions and ticket transcripts'''
+        try:
+            after = datetime.datetime.strptime(after, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc) \
+                if after else None
+            before = datetime.datetime.strptime(before, "%Y-%m-%d").replace(tzinfo=datetime.timezone.utc) \
+                if before else None
+        except ValueError:
+            return await ctx.respond("Dates need to be written as `YYYY-MM-DD`.", ephemeral=True)
+
+        rows = await SEARCH_INDEX.search(keywords=keywords, user_id=user.id if user else None, after=after,
+                                         before=before, kind=kind)
+        if not rows:
+            return await ctx.respond("No results found.")
+
+        entries = []
+        for row_kind, user_id, channel_id, created_at, url, content in rows:
+            created_at = datetime.datetime.fromtimestamp(created_at, tz=datetime.timezone.utc)
+            details = []
+            if user_id:
+                details.append(f"<@{user_id}>")
+            if channel_id:
+                details.append(f"<#{channel_id}>")
+            if url and url.startswith("https://"):
+                details.append(f"[jump!]({url})")
+            elif url:
+                details.append(f"`{url}`")
+            value = f"{content[:800]}\n{' | '.join(details)}" if details else content[:1000]
+            entries.append((f"{row_kind.title()} - {created_at:%Y-%m-%d %H:%M} UTC", value))
+
+        source = FieldPageSource(entries, per_page=5)
+        source.embed.title = f"Moderation Search ({len(rows)} results)"
+        menu = Pages(ctx=ctx, source=source)
+        await menu.start()
+
     @slash_command(guild_ids=[SERVER_ID])
     @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
     async def blacklist(self, ctx,
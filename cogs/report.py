@@ -3,6 +3,8 @@ import json
 
 import discord
 from discord.ext import commands
+from utils.search import SEARCH_INDEX, embed_text
+from utils.store import next_report_id
 from utils.variables import *
 
 """
@@ -135,7 +137,8 @@ class Reporter(commands.Cog):
     async def create_staff_message(self, embed: discord.Embed):
         guild = self.bot.get_guild(SERVER_ID)
         reports_channel = discord.utils.get(guild.text_channels, id=CHANNEL_REPORTS)
-        await reports_channel.send(embed=embed)
+        message = await reports_channel.send(embed=embed)
+        await SEARCH_INDEX.add("report", embed_text(embed), url=message.jump_url)
 
     async def create_inappropriate_username_report(self, member: discord.Member, offending_username: str):
         guild = self.bot.get_guild(SERVER_ID)
@@ -149,16 +152,11 @@ class Reporter(commands.Cog):
             You can take some action by using the buttons below.
             """
         )
-        with open("data.json") as f:
-            data = json.load(f)
-
-            report_id = int(data["report_id"])
-            report_id += 1
-
-        await reports_channel.send(embed=embed, view=InappropriateUsername(member, report_id, offending_username))
-        data["report_id"] = int(report_id)
-        with open("data.json", 'w') as f:
-            json.dump(data, f)
+        report_id = await next_report_id()
+        message = await reports_channel.send(embed=embed,
+                                             view=InappropriateUsername(member, report_id, offending_username))
+        await SEARCH_INDEX.add("report", f"Inappropriate username: {offending_username}", user_id=member.id,
+                               url=message.jump_url)
 
     async def create_cron_task_report(self, task: dict):
         guild = self.bot.get_guild(SERVER_ID)
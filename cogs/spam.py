@@ -1,6 +1,10 @@
+import collections
 import discord
 import datetime
 from discord.ext import commands
+from typing import Union
+from utils.cases import CASE_LEDGER
+from utils.pipeline import NormalizedMessage
 from utils.variables import *
 
 
@@ -17,30 +21,32 @@ class SpamManager(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.recent_messages = []
+        # Only store 20 recent messages at once
+        self.recent_messages = collections.deque(maxlen=20)
+        bot.pipeline.register("spam", self.store_and_validate)
 
-    def has_caps(self, message: discord.Message) -> bool:
+    def cog_unload(self):
+        self.bot.pipeline.unregister("spam")
+
+    @staticmethod
+    def has_caps(message: NormalizedMessage) -> bool:
         """
         Returns true if the message has caps (more capitalized letters than lowercase letters)
         """
-        caps = False
-        upper_count = sum(1 for c in message.content if c.isupper())
-        lower_count = sum(1 for c in message.content if c.islower())
-        if upper_count > (lower_count + 3):
-            caps = True
-
-        return caps
+        return message.has_caps
 
-    async def check_for_repetition(self, message: discord.Message):
+    async def check_for_repetition(self, normalized: NormalizedMessage):
         """
         Checks to see if the message has been repeated often recently, and takes action if action is needed.
         """
-        matching_messages = filter(
-            lambda m: m.author == message.author and m.content.lower() == message.content.lower(), self.recent_messages)
-        matching_messages_count = len(list(matching_messages))
+        message = normalized.message
+        matching_messages_count = sum(
+            1 for m in self.recent_messages if m.author == message.author and m.folded == normalized.folded)
 
         if matching_messages_count >= self.mute_limit:
             await self.mute(message.author)
+            await CASE_LEDGER.add(message.author.id, "mute", "Automatic mute for repeatedly spamming similar messages",
+                                  automatic=True)
 
             # Send info message to channel about mute
             info_message = await message.channel.send(f"Successfully muted {message.author.mention} for 1 hour.")
@@ -58,19 +64,27 @@ class SpamManager(commands.Cog):
             reporter_cog = self.bot.get_cog('Reporter')
             await reporter_cog.create_staff_message(staff_embed_message)
         elif matching_messages_count >= self.warning_limit:
+            if matching_messages_count == self.warning_limit:
+                # Only the first warning of a burst counts as an infraction
+                await CASE_LEDGER.add(message.author.id, "spam warning", "Repeatedly sending similar messages",
+                                      automatic=True)
+                if CASE_LEDGER.should_escalate(message.author.id):
+                    return await self.escalate(message, "repeatedly spamming similar messages")
             await message.author.send(
                 f"{message.author.mention}, please avoid spamming. Additional spam will lead to your account being temporarily muted.")
 
-    async def check_for_caps(self, message: discord.Message):
+    async def check_for_caps(self, normalized: NormalizedMessage):
         """
         Checks the message to see if it and recent messages contain a lot of capital letters.
         """
-        caps_messages = filter(lambda m: m.author == message.author and self.has_caps(m) and len(m.content) > 5,
-                               self.recent_messages)
-        caps_messages_count = len(list(caps_messages))
+        message = normalized.message
+        caps_messages_count = sum(
+            1 for m in self.recent_messages if m.author == message.author and m.has_caps and len(m.content) > 5)
 
-        if caps_messages_count >= self.caps_limit and self.has_caps(message):
+        if caps_messages_count >= self.caps_limit and normalized.has_caps:
             await self.mute(message.author)
+            await CASE_LEDGER.add(message.author.id, "mute", "Automatic mute for repeatedly using caps",
+                                  automatic=True)
 
             # Send info message to channel about mute
             info_message = await message.channel.send(f"Successfully muted {message.author.mention} for 1 hour.")
@@ -87,11 +101,38 @@ class SpamManager(commands.Cog):
             )
             reporter_cog = self.bot.get_cog('Reporter')
             await reporter_cog.create_staff_message(staff_embed_message)
-        elif caps_messages_count >= self.warning_limit and self.has_caps(message):
+        elif caps_messages_count >= self.warning_limit and normalized.has_caps:
+            if caps_messages_count == self.warning_limit:
+                # Only the first warning of a burst counts as an infraction
+                await CASE_LEDGER.add(message.author.id, "caps warning", "Repeatedly using caps", automatic=True)
+                if CASE_LEDGER.should_escalate(message.author.id):
+                    return await self.escalate(message, "repeatedly using caps")
             await message.author.send(
                 f"{message.author.mention}, please avoid using all caps in your messages. Repeatedly doing so will "
                 f"cause your account to be temporarily muted.")
 
+    async def escalate(self, message: discord.Message, reason: str):
+        """
+        Mutes a user whose recent infractions in the case ledger have passed the escalation threshold.
+        """
+        await self.mute(message.author)
+        case_id = await CASE_LEDGER.add(message.author.id, "mute", f"Automatic escalation for {reason}",
+                                        automatic=True)
+
+        info_message = await message.channel.send(f"Successfully muted {message.author.mention} for 1 hour.")
+
+        staff_embed_message = discord.Embed(
+            title=f"Automatic mute occurred (Case #{case_id})",
+            color=discord.Color.yellow(),
+            description=f"""
+            {message.author.mention} was automatically muted in {message.channel} for **{reason}**. The user had **{CASE_LEDGER.recent_count(message.author.id) - 1} recent infractions** before this mute was applied.
+            Their mute will automatically expire in: {discord.utils.format_dt(discord.utils.utcnow() + datetime.timedelta(hours=1), 'R')}.
+            Use `/cases` to view their full history. To teleport to the issue, please [click here]({info_message.jump_url}).
+            """
+        )
+        reporter_cog = self.bot.get_cog('Reporter')
+        await reporter_cog.create_staff_message(staff_embed_message)
+
     async def mute(self, member: discord.Member):
         """
         Mutes the user and schedules an unmute for an hour later in CRON.
@@ -103,20 +144,20 @@ class SpamManager(commands.Cog):
         await cron_cog.schedule_unmute(member, unmute_time)
         await member.add_roles(muted_role)
 
-    async def store_and_validate(self, message: discord.Message):
+    async def store_and_validate(self, message: Union[NormalizedMessage, discord.Message]):
         """
         Stores a message in recent_messages and validates whether the message is spam or not.
         """
+        normalized = message if isinstance(message, NormalizedMessage) else NormalizedMessage(message)
         # No need to take action for bots
-        if message.author.bot:
+        if normalized.author.bot:
             return
 
         # Store message
-        self.recent_messages.insert(0, message)
-        self.recent_messages = self.recent_messages[:20]  # Only store 20 recent messages at once
+        self.recent_messages.appendleft(normalized)
 
-        await self.check_for_repetition(message)
-        await self.check_for_caps(message)
+        await self.check_for_repetition(normalized)
+        await self.check_for_caps(normalized)
 
 
 def setup(bot):
@@ -7,7 +7,8 @@ from discord.commands import permissions
 from discord.ext import commands
 from utils.variables import *
 from utils.checks import is_staff
-from utils.autocomplete import CSS_COLORS
+from utils.autocomplete import INDEXES, autocomplete
+from utils.suggestions import STATUSES, SUGGESTIONS
 from discord.commands import Option
 from typing import Union, Optional
 
@@ -50,6 +51,8 @@ class Staff(commands.Cog):
             description = embed.description
             embed.description = (description + "\n ```This suggestion has been denied```")
             embed.colour = discord.Colour.brand_red()
+            # Freeze the tally before the reactions are cleared
+            await SUGGESTIONS.set_status(message.id, "denied")
             await message.edit(embed=embed)
             await message.clear_reactions()
             await ctx.respond("Successfully denied suggestion")
@@ -67,6 +70,7 @@ class Staff(commands.Cog):
             description = embed.description
             embed.description = (description + "\n ```This suggestion has been approved```")
             embed.colour = discord.Colour.brand_green()
+            await SUGGESTIONS.set_status(message.id, "approved")
             await message.edit(embed=embed)
             await ctx.respond("Successfully approved suggestion")
         else:
@@ -83,11 +87,54 @@ class Staff(commands.Cog):
             for i in range(4, 0, -1):
                 await msg.edit(f"Deleting suggestion in `{i}` seconds")
                 await asyncio.sleep(1)
+            await SUGGESTIONS.set_status(message.id, "deleted")
             await message.delete()
             await msg.edit(content="Deleted suggestion")
         else:
             await ctx.respond("Not a valid suggestion message")
 
+    @suggestion.command()
+    @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
+    async def top(
+            self,
+            ctx,
+            status: Option(str, description="Which suggestions to rank", choices=STATUSES[:3],
+                           required=False),
+            count: Option(int, description="How many suggestions to show, up to 25", required=False)
+    ):
+        '''Shows the highest voted suggestions'''
+        status = status or "open"
+        suggestions = SUGGESTIONS.top(max(1, min(count or 10, 25)), status)
+        if not suggestions:
+            return await ctx.respond(f"There are no {status} suggestions being tracked.")
+
+        embed = discord.Embed(title=f"Top {status.title()} Suggestions", color=discord.Color.blurple())
+        lines = []
+        for rank, suggestion in enumerate(suggestions, start=1):
+            content = suggestion.content if len(suggestion.content) <= 80 else suggestion.content[:77] + "..."
+            url = f"https://discord.com/channels/{SERVER_ID}/{CHANNEL_SUGGESTIONS}/{suggestion.message_id}"
+            lines.append(f"**{rank}.** `{suggestion.score:+}` ({suggestion.up} \U0001f44d {suggestion.down} "
+                         f"\U0001f44e) [{discord.utils.escape_markdown(content)}]({url})")
+        embed.description = "\n".join(lines)
+        await ctx.respond(embed=embed)
+
+    # Suggestion votes are tallied from raw reaction events, so they count on uncached messages too
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        if payload.channel_id == CHANNEL_SUGGESTIONS and payload.user_id != self.bot.user.id:
+            await SUGGESTIONS.vote(payload.message_id, str(payload.emoji), 1)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        if payload.channel_id == CHANNEL_SUGGESTIONS and payload.user_id != self.bot.user.id:
+            await SUGGESTIONS.vote(payload.message_id, str(payload.emoji), -1)
+
+    @commands.Cog.listener()
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        if payload.channel_id == CHANNEL_SUGGESTIONS:
+            await SUGGESTIONS.set_status(payload.message_id, "deleted")
+
     @slash_command(guild_ids=[SERVER_ID])
     @permissions.has_any_role(ROLE_SERVERLEADER, guild_id=SERVER_ID)
     async def trial(self,
@@ -127,7 +174,7 @@ class Staff(commands.Cog):
     async def embed(
             self,
             ctx,
-            color: Option(str, autocomplete=discord.utils.basic_autocomplete(values=CSS_COLORS)),
+            color: Option(str, autocomplete=autocomplete(INDEXES["colors"])),
             channel: Option(discord.TextChannel, description="The channel to send the embed to", required=False),
             title: Option(str, description="Embed title", required=False),
             description: Option(str, description="Embed description", required=False),
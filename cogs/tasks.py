@@ -3,6 +3,9 @@ import discord
 from utils.variables import *
 import datetime
 from typing import Union
+import logging
+
+log = logging.getLogger(__name__)
 
 
 class CronTasks(commands.Cog):
@@ -15,7 +18,7 @@ class CronTasks(commands.Cog):
 
     @tasks.loop(minutes=1)
     async def cron(self):
-        print("Executed cron.")
+        log.debug("Executed cron", extra={"tasks": len(CRON_LIST)})
         cron_list: list[dict[str, Union[datetime.datetime, Union[str, discord.User.id]]]] = CRON_LIST
 
         for task in cron_list:
@@ -26,7 +29,7 @@ class CronTasks(commands.Cog):
                         member = await self.bot.fetch_user(task['user'])
                         await server.unban(member)
                         CRON_LIST.remove(task)
-                        print(f"Unbanned user ID: {member.id}")
+                        log.info("Unbanned user ID: %s", member.id)
 
                     elif task['type'] == "UNMUTE":
                         server = self.bot.get_guild(SERVER_ID)
@@ -35,18 +38,19 @@ class CronTasks(commands.Cog):
                         self_role = discord.utils.get(server.roles, name=ROLE_SELFMUTE)
                         await member.remove_roles(role, self_role)
                         CRON_LIST.remove(task)
-                        print(f"Unmuted user ID: {member.id}")
+                        log.info("Unmuted user ID: %s", member.id)
 
                     elif task['type'] == "UNSTEALCANDYBAN":
                         STEALFISH_BAN.remove(task['user'])
                         CRON_LIST.remove(task)
-                        print(f"Un-stealcandybanneded user ID: {task['user']}")
+                        log.info("Un-stealcandybanned user ID: %s", task['user'])
 
                     else:
-                        print("ERROR:")
+                        log.error("Unknown cron task type %s", task['type'])
                         reporter_cog = self.bot.get_cog('Reporter')
                         await reporter_cog.create_cron_task_report(task)
                 except Exception:
+                    log.exception("Cron task %s failed", task['type'])
                     reporter_cog = self.bot.get_cog('Reporter')
                     await reporter_cog.create_cron_task_report(task)
 
@@ -56,7 +60,7 @@ class CronTasks(commands.Cog):
         Adds the given document to the CRON list.
         """
         CRON_LIST.append(item_dict)
-        print(f"Added item: {item_dict} to CRON_LIST")
+        log.info("Added item to CRON_LIST", extra={"task": item_dict})
 
     async def schedule_unban(self, user: discord.User, time: datetime.datetime):
         item_dict = {
@@ -1,10 +1,11 @@
 import discord
 from discord.ext import commands
-from utils.paginate import Pages, Source
+from utils.autocomplete import INDEXES, autocomplete
+from utils.paginate import LazyPageSource, Pages
 import aiohttp
 import re
 from typing import List
-from discord import slash_command
+from discord import Option, slash_command
 from utils.variables import *
 from dateutil.parser import isoparse
 
@@ -23,24 +24,28 @@ class Wikipedia(commands.Cog):
     NEWLINES = re.compile(r"\n+")
 
     @slash_command(guild_ids=[SERVER_ID])
-    async def wikipedia(self, ctx: discord.ApplicationContext, query: str):
+    async def wikipedia(
+            self,
+            ctx: discord.ApplicationContext,
+            query: Option(str, description="What to look up", autocomplete=autocomplete(INDEXES["wikipedia"]))
+    ):
         """Get information from Wikipedia."""
         await ctx.defer()
-        embeds, url = await self.perform_search(query)
-
-        if not embeds:
-            await ctx.send(f"I'm sorry, I couldn't find \"{query}\" on Wikipedia")
-            await ctx.send(embed=embeds[0])
-            await ctx.send(embed=embeds[0])
-        elif len(embeds) == 1:
-            embeds[0].set_author(name="Result 1 of 1")
-            await ctx.send(embed=embeds[0])
+        pages = await self.search_pages(query)
+        if not pages:
+            return await ctx.send(f"I'm sorry, I couldn't find \"{query}\" on Wikipedia")
+
+        INDEXES["wikipedia"].record(query)
+
+        def render(page_json, page_number: int) -> discord.Embed:
+            embed = self.generate_embed(page_json)
+            embed.set_author(name=f"Result {page_number + 1} of {len(pages)}")
+            return embed
+
+        if len(pages) == 1:
+            await ctx.send(embed=render(pages[0], 0))
         else:
-            count = 0
-            for embed in embeds:
-                count += 1
-                embed.set_author(name=f"Result {count} of {len(embeds)}")
-            menu = Pages(ctx=ctx, source=Source(embeds, per_page=1), compact=True)
+            menu = Pages(ctx=ctx, source=LazyPageSource(pages, render=render), compact=True)
             await menu.start()
 
     #
@@ -76,8 +81,8 @@ class Wikipedia(commands.Cog):
         }
         return payload
 
-    async def perform_search(self, query, only_first_result: bool = False):
-        """Query Wikipedia."""
+    async def search_pages(self, query) -> List[dict]:
+        """Query Wikipedia, returning the JSON of every result that is not a disambiguation page."""
         payload = self.generate_payload(query)
         async with aiohttp.ClientSession() as session:
             async with session.get(
@@ -86,26 +91,29 @@ class Wikipedia(commands.Cog):
             ) as res:
                 result = await res.json()
 
-        embeds: List[discord.Embed] = []
+        pages = []
         if "query" in result and "pages" in result["query"]:
             result["query"]["pages"].sort(
                 key=lambda unsorted_page: unsorted_page["index"]
             )
             for page in result["query"]["pages"]:
-                try:
-                    if (
-                            "categories" in page
-                            and page["categories"]
-                            and "title" in page["categories"][0]
-                            and page["categories"][0]["title"] == self.DISAMBIGUATION_CAT
-                    ):
-                        continue  # Skip disambiguation pages
-                    embeds.append(self.generate_embed(page))
-                    if only_first_result:
-                        return embeds, page["fullurl"]
-                except KeyError:
-                    pass
-        return embeds, None
+                if (
+                        "categories" in page
+                        and page["categories"]
+                        and "title" in page["categories"][0]
+                        and page["categories"][0]["title"] == self.DISAMBIGUATION_CAT
+                ):
+                    continue  # Skip disambiguation pages
+                if "title" in page and "extract" in page and "fullurl" in page:
+                    pages.append(page)
+        return pages
+
+    async def perform_search(self, query, only_first_result: bool = False):
+        """Query Wikipedia."""
+        pages = await self.search_pages(query)
+        if only_first_result:
+            return ([self.generate_embed(pages[0])], pages[0]["fullurl"]) if pages else ([], None)
+        return [self.generate_embed(page) for page in pages], None
 
     def generate_embed(self, page_json):
         """Generate the embed for the json page."""
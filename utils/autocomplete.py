@@ -1,20 +1,183 @@
+import collections
+import heapq
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import discord
 from discord.ext import commands
 
+from utils.element_info import IMAGES
+
+# Discord shows at most 25 autocomplete choices
+MAX_CHOICES = 25
+
+
+class TrieNode:
+    __slots__ = ("children", "terms")
+
+    def __init__(self):
+        self.children: Dict[str, "TrieNode"] = {}
+        self.terms: List[str] = []
+
+
+class AutocompleteIndex:
+    """
+    A prefix trie over a set of choices, with a fuzzy fallback for typos.
+    Every choice is indexed under its full text and under each of its words, so `simp` finds
+    `chinese (simplified)`. Results are ranked: exact matches, then choices starting with the text, then choices with a
+    word starting with it. Only when nothing matches the prefix are fuzzy matches tried, ranked by edit distance.
+    Ties go to the heavier choice, then the shorter one.
+    """
+
+    def __init__(self, terms: Iterable[str] = (), *, max_distance: int = 2):
+        self.root = TrieNode()
+        self.max_distance = max_distance
+        self.weights: Dict[str, float] = {}
+        for term in terms:
+            self.add(term)
+
+    @staticmethod
+    def _keys(term: str) -> List[str]:
+        folded = term.casefold()
+        words = [w.strip("()[],.-") for w in folded.split()]
+        return [folded] + [w for w in words[1:] if w]
+
+    def _walk(self, key: str, create: bool = False) -> Optional[TrieNode]:
+        node = self.root
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = TrieNode()
+            node = child
+        return node
+
+    def add(self, term: str, weight: float = 0.0) -> None:
+        if term not in self.weights:
+            for key in self._keys(term):
+                self._walk(key, create=True).terms.append(term)
+        self.weights[term] = weight
+
+    def remove(self, term: str) -> None:
+        if self.weights.pop(term, None) is None:
+            return
+        for key in self._keys(term):
+            node = self._walk(key)
+            if node is not None and term in node.terms:
+                node.terms.remove(term)
+
+    def clear(self) -> None:
+        self.root = TrieNode()
+        self.weights.clear()
+
+    def _below(self, node: TrieNode) -> Iterable[str]:
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            yield from node.terms
+            stack.extend(node.children.values())
+
+    def _fuzzy(self, text: str, max_distance: int) -> Dict[str, int]:
+        """
+        Finds keys whose prefix is within `max_distance` edits of the text, walking the trie with one Levenshtein row
+        per node and abandoning any branch whose row is already out of range. A term's distance is that of the closest
+        prefix of its key.
+        """
+        found: Dict[str, int] = {}
+        first_row = list(range(len(text) + 1))
+
+        def record(terms: Iterable[str], distance: int):
+            for term in terms:
+                if distance < found.get(term, max_distance + 1):
+                    found[term] = distance
+
+        def visit(node: TrieNode, char: str, previous: List[int], best: int):
+            row = [previous[0] + 1]
+            for i in range(1, len(text) + 1):
+                row.append(min(row[i - 1] + 1, previous[i] + 1, previous[i - 1] + (text[i - 1] != char)))
+            best = min(best, row[-1])
+            # No row deeper in this branch can go below this one's minimum, so every key below ends up at `best`
+            if min(row) >= best:
+                record(self._below(node), best)
+                return
+            record(node.terms, best)
+            if min(row) <= max_distance:
+                for next_char, child in node.children.items():
+                    visit(child, next_char, row, best)
+
+        for char, child in self.root.children.items():
+            visit(child, char, first_row, max_distance + 1)
+        return found
+
+    def complete(self, text: str, limit: int = MAX_CHOICES) -> List[str]:
+        """Returns up to `limit` ranked choices for the text typed so far."""
+        text = (text or "").strip().casefold()
+        if not text:
+            return sorted(self.weights, key=lambda t: -self.weights[t])[:limit]
+
+        ranked: Dict[str, Tuple[int, int]] = {}
+        node = self._walk(text)
+        if node is not None:
+            for term in self._below(node):
+                folded = term.casefold()
+                tier = 0 if folded == text else 1 if folded.startswith(text) else 2
+                if tier < ranked.get(term, (4,))[0]:
+                    ranked[term] = (tier, 0)
+        # Allow roughly one typo per three characters typed, so short input doesn't match everything
+        max_distance = min(self.max_distance, len(text) // 3)
+        if not ranked and max_distance:
+            for term, distance in self._fuzzy(text, max_distance).items():
+                ranked[term] = (3, distance)
+
+        return heapq.nsmallest(limit, ranked, key=lambda t: (*ranked[t], -self.weights[t], len(t), t))
+
+
+class RecentIndex(AutocompleteIndex):
+    """An autocomplete index of the most recent things users have entered, weighted by how often they were used."""
+
+    def __init__(self, maxlen: int = 500, **kwargs):
+        super().__init__(**kwargs)
+        self.maxlen = maxlen
+        self.order: "collections.OrderedDict[str, None]" = collections.OrderedDict()
+
+    def record(self, term: str) -> None:
+        term = term.strip()
+        if not term:
+            return
+        self.add(term, self.weights.get(term, 0.0) + 1)
+        self.order[term] = None
+        self.order.move_to_end(term)
+        while len(self.order) > self.maxlen:
+            oldest, _ = self.order.popitem(last=False)
+            self.remove(oldest)
+
+
+def autocomplete(index: AutocompleteIndex) -> Callable:
+    """Wraps an index as an option autocomplete callback."""
+
+    async def callback(ctx: discord.AutocompleteContext) -> List[str]:
+        return index.complete(ctx.value)
+
+    return callback
+
 
 class AutoCompleteCog(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         '''Loaded Autocomplete'''
 
-    def bot_command_list(self):
-        commands_list = self.bot.commands
-        return commands_list
+    def bot_command_list(self) -> List[str]:
+        return [c.qualified_name for c in self.bot.commands] + [c.name for c in self.bot.application_commands]
 
     async def commands_list_autocomplete(self, interaction, value):
-        return [x for x in self.bot_command_list() if x.startswith(value.lower())]
+        index = INDEXES["commands"]
+        if not index.weights:
+            for name in self.bot_command_list():
+                index.add(name)
+        return index.complete(value)
 
     async def language_autocomplete(self, interaction, value):
-        return [x for x in GOOGLE_LANGUAGES if x.startswith(value.lower())]
+        return INDEXES["languages"].complete(value)
 
 
 def setup(bot):
@@ -232,7 +395,7 @@ CSS_COLORS = [
     "navy",
     "oldlace",
     "olive",
-    "olivedrab"
+    "olivedrab",
     "orange",
     "orangered",
     "orchid",
@@ -285,4 +448,20 @@ image_filters = ["equations",
                  "hearts",
                  "patpat",
                  "cartoon",
-                 "earthquake"]
+                 "earthquake",
+                 "invert",
+                 "grayscale",
+                 "sepia",
+                 "pixelate",
+                 "rainbow",
+                 "shake",
+                 "pulse"]
+
+INDEXES: Dict[str, AutocompleteIndex] = {
+    "languages": AutocompleteIndex(GOOGLE_LANGUAGES),
+    "colors": AutocompleteIndex(CSS_COLORS),
+    "image_filters": AutocompleteIndex(image_filters),
+    "elements": AutocompleteIndex(IMAGES),
+    "commands": AutocompleteIndex(),
+    "wikipedia": RecentIndex(),
+}
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+from discord.http import Route
+
+from utils.store import edit_data, load_data
+
+
+class PlannedEdit:
+    """A single pending edit to a guild channel."""
+
+    __slots__ = ("channel_id", "fields")
+
+    def __init__(self, channel_id: int, **fields):
+        self.channel_id = channel_id
+        self.fields = fields
+
+    @property
+    def bucket(self) -> str:
+        # Channel edits are rate limited per channel, which is the major parameter of the route
+        return Route("PATCH", "/channels/{channel_id}", channel_id=self.channel_id).bucket
+
+    def is_noop(self, channel) -> bool:
+        """Returns true if the channel already matches every field of the edit."""
+        return all(getattr(channel, key, None) == value for key, value in self.fields.items())
+
+    def to_dict(self) -> dict:
+        return {"channel": self.channel_id, "fields": self.fields}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PlannedEdit":
+        return cls(data["channel"], **data["fields"])
+
+
+class BulkEditor:
+    """
+    Runs a planned list of channel edits against a guild.
+    Edits which would not change anything are skipped, edits in different rate limit buckets run concurrently, and
+    the remaining plan, including any edits that failed, is checkpointed to data.json so an interrupted or partly
+    failed run can be resumed.
+    """
+
+    def __init__(
+            self,
+            guild: discord.Guild,
+            edits: List[PlannedEdit],
+            *,
+            job: str,
+            concurrency: int = 4,
+            progress: Optional[Callable[[int, int, int], Awaitable[None]]] = None,
+            progress_interval: float = 2.0,
+            checkpoint_key: str = "pending-edits"
+    ):
+        self.guild = guild
+        self.edits = edits
+        self.job = job
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.checkpoint_key = checkpoint_key
+        self.done = 0
+        self.skipped = 0
+        self.failed: List[int] = []
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._buckets: Dict[str, asyncio.Lock] = {}
+        self._remaining: Dict[int, PlannedEdit] = {}
+        self._last_progress = 0.0
+
+    @classmethod
+    def resume(cls, guild: discord.Guild, job: str, *, checkpoint_key: str = "pending-edits",
+               **kwargs) -> Optional["BulkEditor"]:
+        """Rebuilds an editor from the checkpoint left by an interrupted run of the same job, if there is one."""
+        pending = load_data().get(checkpoint_key)
+        if not pending or pending.get("job") != job:
+            return None
+        edits = [PlannedEdit.from_dict(e) for e in pending["edits"]]
+        return cls(guild, edits, job=job, checkpoint_key=checkpoint_key, **kwargs)
+
+    @property
+    def total(self) -> int:
+        return len(self.edits)
+
+    async def _save_checkpoint(self) -> None:
+        async with edit_data() as data:
+            if self._remaining:
+                data[self.checkpoint_key] = {
+                    "job": self.job,
+                    "edits": [e.to_dict() for e in self._remaining.values()]
+                }
+            else:
+                data.pop(self.checkpoint_key, None)
+
+    async def _report(self, force: bool = False) -> None:
+        if self.progress is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_progress < self.progress_interval:
+            return
+        self._last_progress = now
+        try:
+            await self.progress(self.done + self.skipped + len(self.failed), self.total, len(self.failed))
+        except discord.HTTPException:
+            pass
+
+    async def _apply(self, index: int, edit: PlannedEdit) -> None:
+        channel = self.guild.get_channel(edit.channel_id)
+        if channel is None or edit.is_noop(channel):
+            self.skipped += 1
+        else:
+            lock = self._buckets.setdefault(edit.bucket, asyncio.Lock())
+            async with lock, self._semaphore:
+                try:
+                    await channel.edit(**edit.fields)
+                    self.done += 1
+                except discord.HTTPException:
+                    # Left in the checkpoint, so resuming the job retries it
+                    self.failed.append(edit.channel_id)
+                    await self._report()
+                    return
+        del self._remaining[index]
+        await self._save_checkpoint()
+        await self._report()
+
+    async def run(self) -> "BulkEditor":
+        """Runs every edit in the plan, returning the editor so the counters can be inspected."""
+        self._remaining = dict(enumerate(self.edits))
+        await self._save_checkpoint()
+        await self._report(force=True)
+        await asyncio.gather(*(self._apply(i, e) for i, e in enumerate(self.edits)))
+        await self._report(force=True)
+        return self
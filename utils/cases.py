@@ -0,0 +1,109 @@
+import collections
+import time
+from typing import Deque, Dict, List, Optional
+
+import aiosqlite
+
+CASES_DB = "cases.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    moderator_id INTEGER,
+    action TEXT NOT NULL,
+    reason TEXT,
+    automatic INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS cases_user ON cases(user_id, id);
+"""
+
+# Infractions within this many seconds count towards automatic escalation
+RECENT_WINDOW = 24 * 60 * 60
+# Number of recent infractions after which the spam and censor systems escalate to a mute
+ESCALATION_THRESHOLD = 3
+
+
+class CaseLedger:
+    """
+    A persistent ledger of moderation cases.
+    Cases are stored in SQLite with an index on (user_id, id), so looking up a user's history is a B-tree search. The
+    timestamps of recent infractions are also kept in memory per user, so automated systems can check how often a
+    user has misbehaved lately without touching the database.
+    """
+
+    def __init__(self, path: str = CASES_DB, window: int = RECENT_WINDOW):
+        self.path = path
+        self.window = window
+        self._db: Optional[aiosqlite.Connection] = None
+        self._recent: Dict[int, Deque[float]] = collections.defaultdict(collections.deque)
+
+    async def connect(self) -> aiosqlite.Connection:
+        if self._db is None:
+            self._db = await aiosqlite.connect(self.path)
+            self._db.row_factory = aiosqlite.Row
+            await self._db.executescript(SCHEMA)
+            await self._db.commit()
+            # Warm the in-memory window from the ledger so escalation survives restarts
+            async with self._db.execute("SELECT user_id, created_at FROM cases WHERE created_at >= ? ORDER BY id",
+                                        (time.time() - self.window,)) as cursor:
+                async for row in cursor:
+                    self._recent[row["user_id"]].append(row["created_at"])
+        return self._db
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+    async def add(
+            self,
+            user_id: int,
+            action: str,
+            reason: Optional[str] = None,
+            *,
+            moderator_id: Optional[int] = None,
+            automatic: bool = False
+    ) -> int:
+        """Records a new case and returns its case ID."""
+        db = await self.connect()
+        created_at = time.time()
+        cursor = await db.execute(
+            "INSERT INTO cases (user_id, moderator_id, action, reason, automatic, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (user_id, moderator_id, action, reason, int(automatic), created_at)
+        )
+        await db.commit()
+        self._recent[user_id].append(created_at)
+        return cursor.lastrowid
+
+    async def get(self, case_id: int) -> Optional[aiosqlite.Row]:
+        db = await self.connect()
+        async with db.execute("SELECT * FROM cases WHERE id = ?", (case_id,)) as cursor:
+            return await cursor.fetchone()
+
+    async def cases_for(self, user_id: int, limit: int = 100) -> List[aiosqlite.Row]:
+        """Returns a user's most recent cases, newest first."""
+        db = await self.connect()
+        async with db.execute("SELECT * FROM cases WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                              (user_id, limit)) as cursor:
+            return list(await cursor.fetchall())
+
+    def recent_count(self, user_id: int) -> int:
+        """Returns how many cases the user has received within the recent window."""
+        recent = self._recent.get(user_id)
+        if not recent:
+            return 0
+        cutoff = time.time() - self.window
+        while recent and recent[0] < cutoff:
+            recent.popleft()
+        if not recent:
+            del self._recent[user_id]
+            return 0
+        return len(recent)
+
+    def should_escalate(self, user_id: int) -> bool:
+        return self.recent_count(user_id) >= ESCALATION_THRESHOLD
+
+
+CASE_LEDGER = CaseLedger()
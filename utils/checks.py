@@ -22,7 +22,6 @@ async def is_staff(ctx):
     member = guild.get_member(ctx.message.author.id)
     staffRole = discord.utils.get(guild.roles, name=ROLE_SERVERLEADER)
     vipRole = discord.utils.get(guild.roles, name=ROLE_COACH)
-    print(any(r in [staffRole, vipRole] for r in member.roles))
     if any(r in [staffRole, vipRole] for r in member.roles):
         return True
     raise commands.MissingAnyRole([staffRole, vipRole])
@@ -58,7 +57,6 @@ async def is_dev(ctx):
     guild = ctx.bot.get_guild(SERVER_ID)
     member = guild.get_member(ctx.message.author.id)
     devRole = discord.utils.get(guild.roles, name=ROLE_DEVELOPER)
-    print(any(r in [devRole] for r in member.roles))
     if any(r in [devRole] for r in member.roles):
         return True
     raise commands.MissingAnyRole([devRole])
@@ -2,7 +2,7 @@ import discord
 from utils.variables import *
 from utils.embed import assemble_embed
 from cogs.censor import CENSORED
-import dateparser
+from utils.times import parse_time
 import pytz
 import re
 
@@ -42,7 +42,7 @@ async def _mute(ctx, user: discord.Member, time: str, self: bool):
         role = discord.utils.get(user.guild.roles, name=ROLE_MUTED)
     parsed = "indef"
     if time != "indef":
-        parsed = dateparser.parse(time, settings={"PREFER_DATES_FROM": "future"})
+        parsed = parse_time(time)
         if parsed is None:
             return await ctx.send("Sorry, but I don't understand that length of time.")
         CRON_LIST.append({"date": parsed, "do": f"unmute {user.id}"})
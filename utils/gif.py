@@ -0,0 +1,89 @@
+import struct
+from typing import List, Tuple
+
+import numpy as np
+
+HEADER = b"GIF89a"
+TRAILER = b"\x3b"
+# Loop forever
+NETSCAPE_LOOP = b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00"
+
+MIN_CODE_SIZE = 8
+CLEAR = 1 << MIN_CODE_SIZE
+END = CLEAR + 1
+CODE_WIDTH = MIN_CODE_SIZE + 1
+# Literals between clear codes. Each code after the first adds a table entry, and once the table reaches 512 entries the
+# decoder would start reading 10-bit codes; clearing before then keeps every code 9 bits wide.
+CLEAR_EVERY = (1 << CODE_WIDTH) - END - 2
+TRANSPARENT = 255
+# Opacity below which a pixel is transparent, since GIF transparency is all or nothing
+ALPHA_THRESHOLD = 128
+
+
+def _quantize(frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, bool]:
+    """
+    Reduces an RGBA frame to a palette of at most 255 colours plus a transparent index.
+    Colours are bucketed at 4 bits per channel and the most common buckets become the palette, each as the mean of the
+    pixels in it; every other bucket maps to its nearest palette colour. Everything is a histogram or a table lookup.
+    """
+    rgb = frame[..., :3].reshape(-1, 3)
+    opaque = frame[..., 3].reshape(-1) >= ALPHA_THRESHOLD
+    buckets = ((rgb[:, 0] >> 4).astype(np.int32) << 8) | ((rgb[:, 1] >> 4).astype(np.int32) << 4) | (rgb[:, 2] >> 4)
+    visible = buckets[opaque]
+    counts = np.bincount(visible, minlength=4096)
+    present = np.flatnonzero(counts)
+    means = np.stack(
+        [np.bincount(visible, weights=rgb[opaque, channel], minlength=4096)[present] for channel in range(3)], axis=1
+    ) / counts[present, None]
+
+    top = present[np.argsort(counts[present])[::-1][:TRANSPARENT]]
+    palette = np.zeros((256, 3), np.uint8)
+    table = np.zeros(4096, np.uint8)
+    if len(present):
+        colours = means[np.searchsorted(present, top)]
+        palette[:len(top)] = np.round(colours)
+        distances = ((means[:, None, :] - colours[None, :, :]) ** 2).sum(axis=2)
+        table[present] = np.argmin(distances, axis=1)
+
+    indices = table[buckets]
+    transparent = not opaque.all()
+    if transparent:
+        indices[~opaque] = TRANSPARENT
+    return palette, indices.reshape(frame.shape[:2]), transparent
+
+
+def _image_data(indices: np.ndarray) -> bytes:
+    """
+    LZW encodes palette indices using literal codes only, with a clear code every CLEAR_EVERY pixels.
+    That's valid LZW that any decoder reads, and unlike real LZW it's built with array operations instead of a Python
+    loop per pixel, at the cost of 9 bits per pixel.
+    """
+    pixels = indices.reshape(-1).astype(np.uint16)
+    chunks = -(-len(pixels) // CLEAR_EVERY)
+    padded = np.full(chunks * CLEAR_EVERY, END, np.uint16)
+    padded[:len(pixels)] = pixels
+    codes = np.concatenate([np.full((chunks, 1), CLEAR, np.uint16), padded.reshape(chunks, CLEAR_EVERY)], axis=1)
+    codes = codes.reshape(-1)[:chunks + len(pixels)]
+    codes = np.append(codes, np.uint16(END))
+
+    bits = ((codes[:, None] >> np.arange(CODE_WIDTH, dtype=np.uint16)) & 1).astype(np.uint8).reshape(-1)
+    data = np.packbits(bits, bitorder="little").tobytes()
+    blocks = b"".join(bytes([len(data[i:i + 255])]) + data[i:i + 255] for i in range(0, len(data), 255))
+    return bytes([MIN_CODE_SIZE]) + blocks + b"\x00"
+
+
+def encode_animated(frames: List[np.ndarray], delay_ms: int) -> bytes:
+    """Encodes equally sized RGBA frames as a looping animated GIF, with a palette per frame."""
+    height, width, _ = frames[0].shape
+    parts = [HEADER, struct.pack("<HHBBB", width, height, 0, 0, 0), NETSCAPE_LOOP]
+    for frame in frames:
+        palette, indices, transparent = _quantize(frame)
+        # Transparent frames clear back to the background, so the previous frame doesn't show through
+        disposal = 2 if transparent else 1
+        parts.append(struct.pack("<BBBBHBB", 0x21, 0xF9, 4, (disposal << 2) | transparent, max(2, delay_ms // 10),
+                                 TRANSPARENT, 0))
+        parts.append(struct.pack("<BHHHHB", 0x2C, 0, 0, width, height, 0x87))
+        parts.append(palette.tobytes())
+        parts.append(_image_data(indices))
+    parts.append(TRAILER)
+    return b"".join(parts)
@@ -0,0 +1,152 @@
+import asyncio
+import collections
+import hashlib
+import logging
+import os
+from typing import Awaitable, Callable, Dict, Optional
+
+import aiohttp
+
+log = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.join("cache", "images")
+# Total size of the cache before the least recently used images are evicted
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+# Largest single image that will be downloaded; anything bigger couldn't be uploaded to Discord anyway
+MAX_IMAGE_BYTES = 8 * 1024 * 1024
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(total=30, sock_read=15)
+CHUNK_SIZE = 64 * 1024
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+class ImageCache:
+    """
+    A content addressed, size bounded disk cache for downloaded and locally rendered images.
+    Files are named after a hash of their key, which should identify the content (an avatar hash and a filter,
+    rather than a user), so a changed avatar is a new entry and never a stale hit. Downloads are streamed straight to
+    disk and abandoned once they pass `max_image` bytes, and concurrent requests for the same key share one download.
+    The least recently used files are evicted once the cache passes `max_bytes`.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES, max_image: int = MAX_IMAGE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_image = max_image
+        self.hits = 0
+        self.misses = 0
+        self._entries: Optional["collections.OrderedDict[str, int]"] = None
+        self._size = 0
+        self._pending: Dict[str, asyncio.Task] = {}
+
+    def _load(self) -> "collections.OrderedDict[str, int]":
+        """Indexes the files already on disk, oldest access first, the first time the cache is used."""
+        if self._entries is None:
+            os.makedirs(self.directory, exist_ok=True)
+            files = []
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and not entry.name.endswith(".part"):
+                    stat = entry.stat()
+                    files.append((stat.st_atime, entry.name, stat.st_size))
+            self._entries = collections.OrderedDict((name, size) for _, name, size in sorted(files))
+            self._size = sum(self._entries.values())
+        return self._entries
+
+    @staticmethod
+    def filename(key: str, extension: str) -> str:
+        return f"{hashlib.sha256(key.encode()).hexdigest()}.{extension}"
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _evict(self) -> None:
+        entries = self._load()
+        while self._size > self.max_bytes and entries:
+            name, size = entries.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(self._path(name))
+            except FileNotFoundError:
+                pass
+
+    def _add(self, name: str, size: int) -> str:
+        self._entries[name] = size
+        self._size += size
+        self._evict()
+        return self._path(name)
+
+    async def _download(self, session: aiohttp.ClientSession, name: str, url: str, params: Optional[dict]) -> str:
+        path = self._path(name)
+        part = f"{path}.part"
+        size = 0
+        try:
+            async with session.get(url, params=params, timeout=DOWNLOAD_TIMEOUT) as response:
+                response.raise_for_status()
+                if (response.content_length or 0) > self.max_image:
+                    raise ImageTooLarge(f"The image is larger than {self.max_image // (1024 * 1024)} MB")
+                with open(part, "wb") as f:
+                    async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_image:
+                            raise ImageTooLarge(f"The image is larger than {self.max_image // (1024 * 1024)} MB")
+                        f.write(chunk)
+            os.replace(part, path)
+        finally:
+            if os.path.exists(part):
+                os.remove(part)
+        return self._add(name, size)
+
+    async def _create(self, name: str, create: Callable[[], Awaitable[bytes]]) -> str:
+        data = await create()
+        if len(data) > self.max_image:
+            raise ImageTooLarge(f"The image is larger than {self.max_image // (1024 * 1024)} MB")
+        path = self._path(name)
+        with open(f"{path}.part", "wb") as f:
+            f.write(data)
+        os.replace(f"{path}.part", path)
+        return self._add(name, len(data))
+
+    def _lookup(self, name: str) -> Optional[str]:
+        entries = self._load()
+        path = self._path(name)
+        if name in entries and os.path.exists(path):
+            self.hits += 1
+            entries.move_to_end(name)
+            # Keep the access time current so recency survives restarts, even on noatime mounts
+            os.utime(path)
+            return path
+        if name in entries:
+            self._size -= entries.pop(name)
+        return None
+
+    async def _coalesce(self, name: str, factory: Callable[[], Awaitable[str]]) -> str:
+        task = self._pending.get(name)
+        if task is None:
+            self.misses += 1
+            task = self._pending[name] = asyncio.create_task(factory())
+            task.add_done_callback(lambda _: self._pending.pop(name, None))
+        # Shield the shared task, so one cancelled command doesn't cancel it for everyone waiting
+        return await asyncio.shield(task)
+
+    async def fetch(
+            self,
+            session: aiohttp.ClientSession,
+            key: str,
+            url: str,
+            *,
+            params: Optional[dict] = None,
+            extension: str = "gif"
+    ) -> str:
+        """Returns the path of the cached image for a key, downloading it from `url` first if needed."""
+        name = self.filename(key, extension)
+        return self._lookup(name) or await self._coalesce(name, lambda: self._download(session, name, url, params))
+
+    async def produce(self, key: str, extension: str, create: Callable[[], Awaitable[bytes]]) -> str:
+        """Returns the path of the cached image for a key, calling `create` for its contents first if needed."""
+        name = self.filename(key, extension)
+        return self._lookup(name) or await self._coalesce(name, lambda: self._create(name, create))
+
+
+IMAGE_CACHE = ImageCache()
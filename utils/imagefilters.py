@@ -0,0 +1,242 @@
+"""
+Local avatar effects, computed with vectorised NumPy operations in a pool of worker processes.
+
+Run `python -m utils.imagefilters` to benchmark every filter locally, in process and through the pool, and
+optionally against the remote API with `--remote AVATAR_URL`.
+"""
+import argparse
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from utils import gif, png
+from utils.workers import JobError, WorkerPool
+
+# Limits for a single render
+MAX_PIXELS = 1024 * 1024
+JOB_TIMEOUT = 10.0
+JOB_MEMORY = 512 * 1024 * 1024
+WORKERS = 2
+
+FRAME_DELAY_MS = 80
+LUMA = np.array([0.299, 0.587, 0.114], np.float32)
+SEPIA = np.array([
+    [0.393, 0.769, 0.189],
+    [0.349, 0.686, 0.168],
+    [0.272, 0.534, 0.131],
+], np.float32)
+
+
+class FilterError(Exception):
+    pass
+
+
+Frames = Union[np.ndarray, List[np.ndarray]]
+
+
+def _with_rgb(image: np.ndarray, rgb: np.ndarray) -> np.ndarray:
+    out = image.copy()
+    out[..., :3] = np.clip(rgb, 0, 255)
+    return out
+
+
+def invert(image: np.ndarray) -> np.ndarray:
+    out = image.copy()
+    out[..., :3] = 255 - image[..., :3]
+    return out
+
+
+def grayscale(image: np.ndarray) -> np.ndarray:
+    luma = image[..., :3].astype(np.float32) @ LUMA
+    return _with_rgb(image, luma[..., None])
+
+
+def sepia(image: np.ndarray) -> np.ndarray:
+    return _with_rgb(image, image[..., :3].astype(np.float32) @ SEPIA.T)
+
+
+def _box(array: np.ndarray, radius: int, axis: int) -> np.ndarray:
+    """A box blur along one axis, from the difference of a running sum so its cost doesn't depend on the radius."""
+    padding = [(0, 0)] * array.ndim
+    padding[axis] = (radius + 1, radius)
+    summed = np.cumsum(np.pad(array, padding, mode="edge"), axis=axis)
+    size = array.shape[axis]
+    upper = np.take(summed, np.arange(2 * radius + 1, 2 * radius + 1 + size), axis=axis)
+    lower = np.take(summed, np.arange(size), axis=axis)
+    return (upper - lower) / (2 * radius + 1)
+
+
+def blur(image: np.ndarray, radius: Optional[int] = None) -> np.ndarray:
+    # Three box passes in each direction approximate a gaussian blur
+    radius = radius or max(1, min(image.shape[:2]) // 64)
+    out = image.astype(np.float32)
+    for _ in range(3):
+        out = _box(_box(out, radius, 0), radius, 1)
+    return np.clip(out, 0, 255).astype(np.uint8)
+
+
+def pixelate(image: np.ndarray, blocks: int = 24) -> np.ndarray:
+    height, width, channels = image.shape
+    block = max(1, min(height, width) // blocks)
+    padded = np.pad(image, ((0, -height % block), (0, -width % block), (0, 0)), mode="edge").astype(np.float32)
+    rows, columns = padded.shape[0] // block, padded.shape[1] // block
+    means = padded.reshape(rows, block, columns, block, channels).mean(axis=(1, 3))
+    out = np.repeat(np.repeat(means, block, axis=0), block, axis=1)
+    return out[:height, :width].astype(np.uint8)
+
+
+def _hue_rotation(degrees: float) -> np.ndarray:
+    """The matrix rotating RGB colours around the gray axis, as used by CSS hue-rotate()."""
+    c, s = np.cos(np.radians(degrees)), np.sin(np.radians(degrees))
+    return np.array([
+        [0.213 + c * 0.787 - s * 0.213, 0.715 - c * 0.715 - s * 0.715, 0.072 - c * 0.072 + s * 0.928],
+        [0.213 - c * 0.213 + s * 0.143, 0.715 + c * 0.285 + s * 0.140, 0.072 - c * 0.072 - s * 0.283],
+        [0.213 - c * 0.213 - s * 0.787, 0.715 - c * 0.715 + s * 0.715, 0.072 + c * 0.928 + s * 0.072],
+    ], np.float32)
+
+
+def rainbow(image: np.ndarray, frames: int = 12) -> List[np.ndarray]:
+    rgb = image[..., :3].astype(np.float32)
+    return [_with_rgb(image, rgb @ _hue_rotation(360 * i / frames).T) for i in range(frames)]
+
+
+def shake(image: np.ndarray, frames: int = 8) -> List[np.ndarray]:
+    amplitude = max(2, min(image.shape[:2]) // 32)
+    angles = np.linspace(0, 2 * np.pi, frames, endpoint=False)
+    return [np.roll(image, (int(amplitude * np.sin(a)), int(amplitude * np.cos(a))), axis=(0, 1)) for a in angles]
+
+
+def pulse(image: np.ndarray, frames: int = 10) -> List[np.ndarray]:
+    rgb = image[..., :3].astype(np.float32)
+    inverted = 255 - rgb
+    weights = (1 - np.cos(np.linspace(0, 2 * np.pi, frames, endpoint=False))) / 2
+    return [_with_rgb(image, rgb + (inverted - rgb) * w) for w in weights]
+
+
+FILTERS: Dict[str, Callable[[np.ndarray], Frames]] = {
+    "invert": invert,
+    "grayscale": grayscale,
+    "sepia": sepia,
+    "blur": blur,
+    "pixelate": pixelate,
+    "rainbow": rainbow,
+    "shake": shake,
+    "pulse": pulse,
+}
+
+
+# Filters that make frames. Discord only plays GIFs, so these are encoded as GIFs rather than animated PNGs
+ANIMATED = frozenset({"rainbow", "shake", "pulse"})
+
+
+def extension(name: str) -> str:
+    """The file extension of a filter's output."""
+    return "gif" if name in ANIMATED else "png"
+
+
+def apply(data: bytes, name: str, max_pixels: int = MAX_PIXELS) -> bytes:
+    """Decodes a PNG, applies a filter and encodes the result, as an animated GIF if the filter makes frames."""
+    result = FILTERS[name](png.decode(data, max_pixels))
+    if isinstance(result, list):
+        return gif.encode_animated(result, FRAME_DELAY_MS)
+    return png.encode(result)
+
+
+def _job(data: bytes, name: str, max_pixels: int) -> bytes:
+    try:
+        return apply(data, name, max_pixels)
+    except png.PNGError as e:
+        raise FilterError(str(e))
+
+
+class FilterEngine:
+    """Runs filters in a WorkerPool, with each job's time and memory limited."""
+
+    def __init__(self, workers: int = WORKERS, timeout: float = JOB_TIMEOUT, memory: int = JOB_MEMORY,
+                 max_pixels: int = MAX_PIXELS):
+        self.max_pixels = max_pixels
+        self.workers = WorkerPool(workers, timeout, memory)
+
+    async def render(self, data: bytes, name: str) -> bytes:
+        if name not in FILTERS:
+            raise FilterError(f"Unknown filter {name}")
+        try:
+            return await self.workers.run(_job, data, name, self.max_pixels)
+        except JobError as e:
+            raise FilterError(str(e))
+
+    def shutdown(self) -> None:
+        self.workers.shutdown()
+
+
+FILTER_ENGINE = FilterEngine()
+
+
+def _sample(size: int) -> bytes:
+    """A gradient test image with some noise, so it compresses roughly like a real avatar."""
+    y, x = np.mgrid[0:size, 0:size]
+    rng = np.random.default_rng(0)
+    image = np.stack([x * 255 // size, y * 255 // size, (x + y) * 127 // size, np.full_like(x, 255)], axis=2)
+    image[..., :3] += rng.integers(0, 24, (size, size, 3))
+    return png.encode(np.clip(image, 0, 255).astype(np.uint8))
+
+
+async def _remote(url: str, avatar: str, iterations: int) -> List[float]:
+    import aiohttp
+    timings = []
+    async with aiohttp.ClientSession() as session:
+        for _ in range(iterations):
+            start = time.perf_counter()
+            async with session.get(url, params={"image_url": avatar}) as response:
+                await response.read()
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def _pooled(data: bytes, name: str, iterations: int) -> List[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await FILTER_ENGINE.render(data, name)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def benchmark(size: int = 256, iterations: int = 5, remote: Optional[str] = None) -> None:
+    data = _sample(size)
+    print(f"{size}x{size} avatar, median of {iterations} runs")
+    print(f"{'filter':<12}{'in process':>12}{'pool':>12}{'output':>12}")
+
+    async def run() -> List[Tuple[str, float, float, int]]:
+        # Warm the pool up first, so process start up isn't counted against the first filter
+        await FILTER_ENGINE.render(data, "invert")
+        rows = []
+        for name in FILTERS:
+            local = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                output = apply(data, name)
+                local.append(time.perf_counter() - start)
+            pooled = await _pooled(data, name, iterations)
+            rows.append((name, float(np.median(local)), float(np.median(pooled)), len(output)))
+        if remote:
+            timings = await _remote("https://api.jeyy.xyz/image/blur", remote, iterations)
+            rows.append(("remote blur", float("nan"), float(np.median(timings)), 0))
+        return rows
+
+    try:
+        for name, local, pooled, output in asyncio.run(run()):
+            print(f"{name:<12}{local * 1000:>10.1f}ms{pooled * 1000:>10.1f}ms{output / 1024:>10.1f}KB")
+    finally:
+        FILTER_ENGINE.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the local image filters")
+    parser.add_argument("--size", type=int, default=256)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--remote", metavar="AVATAR_URL", help="Also time the remote API on this avatar")
+    args = parser.parse_args()
+    benchmark(args.size, args.iterations, args.remote)
@@ -0,0 +1,113 @@
+import asyncio
+import importlib.util
+import io
+import logging
+
+import aiohttp
+import discord
+
+from utils.imagecache import IMAGE_CACHE, ImageTooLarge
+from utils.workers import JobError, WorkerPool
+
+log = logging.getLogger(__name__)
+
+LATEX_DPI = 175
+LATEX_COLOR = "white"
+LATEX_SIZE = 12
+REMOTE_URL = r"https://latex.codecogs.com/png.latex?\dpi{%d}{\color{White}%s}"
+MAX_EXPRESSION = 1000
+
+# Matplotlib isn't a hard requirement; without it every expression is rendered remotely (and still cached)
+HAS_MATHTEXT = importlib.util.find_spec("matplotlib") is not None
+
+
+class LatexError(Exception):
+    pass
+
+
+class MathtextUnsupported(Exception):
+    """The expression uses LaTeX that mathtext can't parse."""
+
+
+def normalize(expression: str) -> str:
+    """Collapses whitespace, so expressions that only differ in spacing share a cache entry."""
+    return " ".join(expression.split())
+
+
+def _render(expression: str, dpi: int, color: str) -> bytes:
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+    from matplotlib.font_manager import FontProperties
+    from matplotlib.mathtext import MathTextParser
+
+    # Like mathtext.math_to_image, but on a transparent background so light text shows up in dark mode
+    text = f"${expression}$"
+    prop = FontProperties(size=LATEX_SIZE)
+    try:
+        width, height, depth, _, _ = MathTextParser("path").parse(text, dpi=72, prop=prop)
+    except ValueError as e:
+        raise MathtextUnsupported(str(e))
+    # Blank expressions like `\,` or `{}` parse to less than a pixel, which can't be saved
+    if min(width, height) * dpi < 72:
+        raise LatexError("There's nothing to render")
+    figure = Figure(figsize=(width / 72, height / 72))
+    figure.text(0, depth / height, text, fontproperties=prop, color=color)
+    buffer = io.BytesIO()
+    figure.savefig(buffer, dpi=dpi, format="png", transparent=True)
+    return buffer.getvalue()
+
+
+class LatexRenderer:
+    """
+    Renders LaTeX to PNG files, keyed in the image cache by the normalized expression.
+    Expressions are rendered with matplotlib's mathtext in a WorkerPool. Anything mathtext doesn't understand, and
+    everything when matplotlib isn't installed, is rendered by codecogs instead; either way the result is cached, so
+    a repeated formula is always served from disk.
+    """
+
+    def __init__(self, dpi: int = LATEX_DPI, color: str = LATEX_COLOR):
+        self.dpi = dpi
+        self.color = color
+        self.workers = WorkerPool(1, timeout=10.0, memory=256 * 1024 * 1024)
+
+    async def _local(self, expression: str) -> bytes:
+        try:
+            return await self.workers.run(_render, expression, self.dpi, self.color)
+        except JobError as e:
+            raise LatexError(str(e))
+
+    async def render(self, session: aiohttp.ClientSession, expression: str) -> str:
+        expression = normalize(expression)
+        if not expression:
+            raise LatexError("There's nothing to render")
+        if len(expression) > MAX_EXPRESSION:
+            raise LatexError(f"Expressions can be at most {MAX_EXPRESSION} characters")
+        key = f"latex:{self.dpi}:{self.color}:{expression}"
+        if HAS_MATHTEXT:
+            try:
+                return await IMAGE_CACHE.produce(key, "png", lambda: self._local(expression))
+            except MathtextUnsupported:
+                log.debug("Rendering remotely, mathtext can't parse %s", expression)
+        url = REMOTE_URL % (self.dpi, expression.replace(" ", "&space;"))
+        try:
+            return await IMAGE_CACHE.fetch(session, key, url, extension="png")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ImageTooLarge) as e:
+            raise LatexError(f"The LaTeX couldn't be rendered: {e}")
+
+    def shutdown(self) -> None:
+        self.workers.shutdown()
+
+
+LATEX = LatexRenderer()
+
+
+async def respond_latex(ctx: discord.ApplicationContext, expression: str) -> None:
+    """Renders an expression and responds with it attached."""
+    if not ctx.response.is_done():
+        await ctx.defer()
+    try:
+        path = await LATEX.render(ctx.bot.session, expression)
+    except LatexError as e:
+        return await ctx.respond(f"Sorry, I couldn't render that. {e}.")
+    await ctx.respond(file=discord.File(path, "latex.png"))
@@ -0,0 +1,143 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from typing import Dict, Optional
+
+from utils.store import edit_data, load_data
+
+LOG_DIR = "logs"
+LOG_FILE = os.path.join(LOG_DIR, "bot.jsonl")
+MAX_BYTES = 10 * 1024 * 1024
+BACKUP_COUNT = 5
+
+# Attributes every LogRecord has; anything else on a record was passed through `extra` and is written as a field
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+
+# Loggers that log once per message start out quiet; staff can turn them up and sample them at runtime
+DEFAULT_LEVELS = {
+    "utils.pipeline": "WARNING",
+}
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats records as single JSON lines, including any fields passed through `extra`."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps only a fraction of the records from high volume loggers.
+    A rate applies to the named logger and all of its children, e.g. a rate for "cogs" also samples "cogs.spam".
+    """
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.rates: Dict[str, float] = dict(rates or {})
+
+    def rate_for(self, name: str) -> float:
+        while name:
+            if name in self.rates:
+                return self.rates[name]
+            name = name.rpartition(".")[0]
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.rates or record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class LogManager:
+    """
+    The bot's logging setup.
+    Records are put on a queue by a QueueHandler, so the event loop never waits on disk or stdout; a QueueListener
+    thread formats them and writes them to the console and to rotating JSON lines files.
+    """
+
+    def __init__(self):
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.sampler = SamplingFilter()
+        self.listener: Optional[logging.handlers.QueueListener] = None
+        self.levels: Dict[str, str] = {}
+
+    def start(self, level: int = logging.INFO) -> None:
+        if self.listener is not None:
+            return
+        os.makedirs(LOG_DIR, exist_ok=True)
+
+        file_handler = logging.handlers.RotatingFileHandler(LOG_FILE, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT,
+                                                            encoding="utf-8")
+        file_handler.setFormatter(JSONFormatter())
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+        queue_handler = logging.handlers.QueueHandler(self.queue)
+        queue_handler.addFilter(self.sampler)
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(queue_handler)
+
+        self.listener = logging.handlers.QueueListener(self.queue, console_handler, file_handler,
+                                                       respect_handler_level=True)
+        self.listener.start()
+
+        saved = load_data().get("logging", {})
+        for name, name_level in {**DEFAULT_LEVELS, **saved.get("levels", {})}.items():
+            self._apply_level(name, name_level)
+        self.sampler.rates.update(saved.get("sampling", {}))
+
+    def stop(self) -> None:
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def _apply_level(self, name: str, level: str) -> None:
+        self.levels[name] = level
+        logging.getLogger(name).setLevel(level)
+
+    async def _save(self) -> None:
+        async with edit_data() as data:
+            data["logging"] = {"levels": self.levels, "sampling": self.sampler.rates}
+
+    async def set_level(self, name: str, level: str) -> None:
+        """Sets the level of a logger (and its children) and remembers it across restarts."""
+        self._apply_level(name, level.upper())
+        await self._save()
+
+    async def set_sampling(self, name: str, rate: float) -> None:
+        """Keeps only `rate` of a logger's records below WARNING. A rate of 1 turns sampling off."""
+        if rate >= 1.0:
+            self.sampler.rates.pop(name, None)
+        else:
+            self.sampler.rates[name] = max(rate, 0.0)
+        await self._save()
+
+    def status(self) -> Dict[str, str]:
+        """Returns a description of each configured logger's level and sampling rate."""
+        names = sorted(set(self.levels) | set(self.sampler.rates))
+        return {
+            name: f"{self.levels.get(name, 'inherited')}, sampling {self.sampler.rate_for(name):.0%}"
+            for name in names
+        }
+
+
+LOGS = LogManager()
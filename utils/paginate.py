@@ -1,10 +1,49 @@
 import discord
 from discord.ext import menus, commands
-from typing import Optional, Dict, Any
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Sequence, Union
 import asyncio
+import functools
+import logging
+
+log = logging.getLogger(__name__)
+
+
+# Paginators are dropped after this many seconds without anyone pressing a button
+IDLE_TIMEOUT = 180.0
+
+
+class PageState:
+    """The per-paginator state. Kept separate from the view, and slotted, so each open paginator stays small."""
+
+    __slots__ = ("source", "ctx", "message", "current_page", "compact", "check_embeds", "input_lock")
+
+    def __init__(self, source: menus.PageSource, ctx: discord.ApplicationContext, compact: bool, check_embeds: bool):
+        self.source: Optional[menus.PageSource] = source
+        self.ctx: discord.ApplicationContext = ctx
+        self.message: Optional[discord.Message] = None
+        self.current_page: int = 0
+        self.compact: bool = compact
+        self.check_embeds: bool = check_embeds
+        self.input_lock: Optional[asyncio.Lock] = None
+
+
+# Shared by every paginator: the page each navigation button moves to, given the paginator's current state
+NAVIGATION: Dict[str, Callable[[PageState], int]] = {
+    "go_to_first_page": lambda state: 0,
+    "go_to_previous_page": lambda state: state.current_page - 1,
+    "go_to_next_page": lambda state: state.current_page + 1,
+    "go_to_last_page": lambda state: state.source.get_max_pages() - 1,
+}
 
 
 class Pages(discord.ui.View):
+    """
+    The paginator used by every menu in the bot.
+    All state lives in a slotted PageState, and navigation goes through the shared NAVIGATION table. A paginator
+    that sits idle for IDLE_TIMEOUT seconds removes its buttons and releases its page source.
+    """
+
     def __init__(
             self,
             source: menus.PageSource,
@@ -13,17 +52,41 @@ class Pages(discord.ui.View):
             check_embeds: bool = True,
             compact: bool = False,
     ):
-        super().__init__()
-        self.source: menus.PageSource = source
-        self.check_embeds: bool = check_embeds
-        self.ctx: discord.ApplicationContext = ctx
-        self.message: Optional[discord.Message] = None
-        self.current_page: int = 0
-        self.compact: bool = compact
-        self.input_lock = asyncio.Lock()
+        super().__init__(timeout=IDLE_TIMEOUT)
+        self.state = PageState(source, ctx, compact, check_embeds)
         self.clear_items()
         self.fill_items()
 
+    # The state is exposed through properties so menus built on top of this one can keep using view attributes
+
+    @property
+    def source(self) -> menus.PageSource:
+        return self.state.source
+
+    @source.setter
+    def source(self, value: menus.PageSource) -> None:
+        self.state.source = value
+
+    @property
+    def ctx(self) -> discord.ApplicationContext:
+        return self.state.ctx
+
+    @property
+    def message(self) -> Optional[discord.Message]:
+        return self.state.message
+
+    @property
+    def current_page(self) -> int:
+        return self.state.current_page
+
+    @current_page.setter
+    def current_page(self, value: int) -> None:
+        self.state.current_page = value
+
+    @property
+    def compact(self) -> bool:
+        return self.state.compact
+
     def fill_items(self) -> None:
         if not self.compact:
             self.numbered_page.row = 1
@@ -105,6 +168,21 @@ class Pages(discord.ui.View):
             # An error happened that can be handled, so ignore it.
             pass
 
+    async def navigate(self, action: str, interaction: discord.Interaction) -> None:
+        """Handles every navigation button by looking up its target page in NAVIGATION."""
+        await self.show_checked_page(interaction, NAVIGATION[action](self.state))
+
+    async def rebind(self, source: menus.PageSource, interaction: discord.Interaction) -> None:
+        """Swaps in a new page source and shows its first page."""
+        self.source = source
+        self.current_page = 0
+
+        await self.source._prepare_once()
+        page = await self.source.get_page(0)
+        kwargs = await self._get_kwargs_from_page(page)
+        self._update_labels(0)
+        await interaction.response.edit_message(**kwargs, view=self)
+
     async def interaction_check(self, interaction: discord.Interaction) -> bool:
         if interaction.user and interaction.user.id in (self.ctx.bot.owner_id, self.ctx.author.id):
             return True
@@ -115,15 +193,19 @@ class Pages(discord.ui.View):
     async def on_timeout(self) -> None:
         if self.message:
             await self.message.edit(view=None)
+        # Let the page source, and any pages it has cached, be garbage collected
+        self.state.source = None
+        self.state.message = None
 
     async def on_error(self, error: Exception, item: discord.ui.Item, interaction: discord.Interaction) -> None:
         if interaction.response.is_done():
             await interaction.followup.send('An unknown error occurred, sorry', ephemeral=True)
         else:
             await interaction.response.send_message('An unknown error occurred, sorry', ephemeral=True)
+        log.error("Error in pagination view", exc_info=error)
 
     async def start(self) -> None:
-        if self.check_embeds and not self.ctx.channel.permissions_for(self.ctx.me).embed_links:
+        if self.state.check_embeds and not self.ctx.channel.permissions_for(self.ctx.me).embed_links:
             await self.ctx.send('Bot does not have embed links permission in this channel.')
             return
 
@@ -132,19 +214,19 @@ class Pages(discord.ui.View):
         kwargs = await self._get_kwargs_from_page(page)
         self._update_labels(0)
         try:
-            self.message = await self.ctx.respond(**kwargs, view=self)
+            self.state.message = await self.ctx.respond(**kwargs, view=self)
         except discord.InteractionResponded:
-            self.message = await self.ctx.followup(**kwargs, view=self)
+            self.state.message = await self.ctx.followup(**kwargs, view=self)
 
     @discord.ui.button(label='≪', style=discord.ButtonStyle.grey)
     async def go_to_first_page(self, button: discord.ui.Button, interaction: discord.Interaction):
         """go to the first page"""
-        await self.show_page(interaction, 0)
+        await self.navigate("go_to_first_page", interaction)
 
     @discord.ui.button(label='Back', style=discord.ButtonStyle.blurple)
     async def go_to_previous_page(self, button: discord.ui.Button, interaction: discord.Interaction):
         """go to the previous page"""
-        await self.show_checked_page(interaction, self.current_page - 1)
+        await self.navigate("go_to_previous_page", interaction)
 
     @discord.ui.button(label='Current', style=discord.ButtonStyle.grey, disabled=True)
     async def go_to_current_page(self, button: discord.ui.Button, interaction: discord.Interaction):
@@ -153,25 +235,26 @@ class Pages(discord.ui.View):
     @discord.ui.button(label='Next', style=discord.ButtonStyle.blurple)
     async def go_to_next_page(self, button: discord.ui.Button, interaction: discord.Interaction):
         """go to the next page"""
-        await self.show_checked_page(interaction, self.current_page + 1)
+        await self.navigate("go_to_next_page", interaction)
 
     @discord.ui.button(label='≫', style=discord.ButtonStyle.grey)
     async def go_to_last_page(self, button: discord.ui.Button, interaction: discord.Interaction):
         """go to the last page"""
-        # The call here is safe because it's guarded by skip_if
-        await self.show_page(interaction, self.source.get_max_pages() - 1)
+        await self.navigate("go_to_last_page", interaction)
 
     @discord.ui.button(label='Skip to page...', style=discord.ButtonStyle.grey)
     async def numbered_page(self, button: discord.ui.Button, interaction: discord.Interaction):
         """lets you type a page number to go to"""
-        if self.input_lock.locked():
+        if self.state.input_lock is None:
+            self.state.input_lock = asyncio.Lock()
+        if self.state.input_lock.locked():
             await interaction.response.send_message('Already waiting for your response...', ephemeral=True)
             return
 
         if self.message is None:
             return
 
-        async with self.input_lock:
+        async with self.state.input_lock:
             channel = self.message.channel
             author_id = interaction.user and interaction.user.id
             await interaction.response.send_message('What page do you want to go to?', ephemeral=True)
@@ -195,21 +278,16 @@ class Pages(discord.ui.View):
         await interaction.response.defer()
         await interaction.delete_original_message()
         self.stop()
+        self.state.source = None
 
 
 class ResultPages(Pages):
     def __init__(self, source: menus.PageSource, ctx: discord.ApplicationContext):
         super().__init__(source, ctx=ctx, compact=True)
 
-    async def rebind(self, source: menus.PageSource, interaction: discord.Interaction) -> None:
-        self.source = source
-        self.current_page = 0
 
-        await self.source._prepare_once()
-        page = await self.source.get_page(0)
-        kwargs = await self._get_kwargs_from_page(page)
-        self._update_labels(0)
-        await interaction.response.edit_message(**kwargs, view=self)
+# Kept for the menus that were written against the old duplicate of Pages
+RoboPages = Pages
 
 
 class Source(menus.ListPageSource):
@@ -217,196 +295,102 @@ class Source(menus.ListPageSource):
         return embeds
 
 
-class RoboPages(discord.ui.View):
+class LazyPageSource(menus.PageSource):
+    """
+    A page source that renders each page only when it is first shown.
+    Pages either come from `items` (a list or an async iterator, consumed only as far as needed) turned into pages by
+    `render(item, page_number)`, or from `fetch(page_number)`, which raises IndexError past the last page. Recently
+    shown pages are kept in a small LRU, and the page after the one being shown is rendered in the background.
+    """
+
     def __init__(
-        self,
-        source: menus.PageSource,
-        *,
-        ctx: discord.ApplicationContext,
-        check_embeds: bool = True,
-        compact: bool = False,
+            self,
+            items: Union[Sequence[Any], AsyncIterator[Any], None] = None,
+            *,
+            render: Optional[Callable[[Any, int], Any]] = None,
+            fetch: Optional[Callable[[int], Awaitable[Any]]] = None,
+            max_pages: Optional[int] = None,
+            cache_size: int = 8,
+            prefetch: bool = True,
     ):
-        super().__init__()
-        self.source: menus.PageSource = source
-        self.check_embeds: bool = check_embeds
-        self.ctx: discord.ApplicationContext = ctx
-        self.message: Optional[discord.Message] = None
-        self.current_page: int = 0
-        self.compact: bool = compact
-        self.input_lock = asyncio.Lock()
-        self.clear_items()
-        self.fill_items()
-
-    def fill_items(self) -> None:
-        if not self.compact:
-            self.numbered_page.row = 1
-            self.stop_pages.row = 1
-
-        if self.source.is_paginating():
-            max_pages = self.source.get_max_pages()
-            use_last_and_first = max_pages is not None and max_pages >= 2
-            if use_last_and_first:
-                self.add_item(self.go_to_first_page)  # type: ignore
-            self.add_item(self.go_to_previous_page)  # type: ignore
-            if not self.compact:
-                self.add_item(self.go_to_current_page)  # type: ignore
-            self.add_item(self.go_to_next_page)  # type: ignore
-            if use_last_and_first:
-                self.add_item(self.go_to_last_page)  # type: ignore
-            if not self.compact:
-                self.add_item(self.numbered_page)  # type: ignore
-            self.add_item(self.stop_pages)  # type: ignore
-
-    async def _get_kwargs_from_page(self, page: int) -> Dict[str, Any]:
-        value = await discord.utils.maybe_coroutine(self.source.format_page, self, page)
-        if isinstance(value, dict):
-            return value
-        elif isinstance(value, str):
-            return {'content': value, 'embed': None}
-        elif isinstance(value, discord.Embed):
-            return {'embed': value, 'content': None}
+        if (items is None) == (fetch is None):
+            raise TypeError("Pass either items or fetch")
+        self.render = render
+        self.fetch = fetch
+        self.max_pages = max_pages
+        self.cache_size = cache_size
+        self.prefetch = prefetch
+        self._cache: "OrderedDict[int, Any]" = OrderedDict()
+        self._pending: Dict[int, asyncio.Task] = {}
+        self._iter_lock = asyncio.Lock()
+        if items is None or isinstance(items, Sequence):
+            self._items: List[Any] = list(items or [])
+            self._iterator: Optional[AsyncIterator[Any]] = None
         else:
-            return {}
-
-    async def show_page(self, interaction: discord.Interaction, page_number: int) -> None:
-        page = await self.source.get_page(page_number)
-        self.current_page = page_number
-        kwargs = await self._get_kwargs_from_page(page)
-        self._update_labels(page_number)
-        if kwargs:
-            if interaction.response.is_done():
-                if self.message:
-                    await self.message.edit(**kwargs, view=self)
-            else:
-                await interaction.response.edit_message(**kwargs, view=self)
-
-    def _update_labels(self, page_number: int) -> None:
-        self.go_to_first_page.disabled = page_number == 0
-        if self.compact:
-            max_pages = self.source.get_max_pages()
-            self.go_to_last_page.disabled = max_pages is None or (page_number + 1) >= max_pages
-            self.go_to_next_page.disabled = max_pages is not None and (page_number + 1) >= max_pages
-            self.go_to_previous_page.disabled = page_number == 0
-            return
-
-        self.go_to_current_page.label = str(page_number + 1)
-        self.go_to_previous_page.label = str(page_number)
-        self.go_to_next_page.label = str(page_number + 2)
-        self.go_to_next_page.disabled = False
-        self.go_to_previous_page.disabled = False
-        self.go_to_first_page.disabled = False
-
-        max_pages = self.source.get_max_pages()
-        if max_pages is not None:
-            self.go_to_last_page.disabled = (page_number + 1) >= max_pages
-            if (page_number + 1) >= max_pages:
-                self.go_to_next_page.disabled = True
-                self.go_to_next_page.label = '…'
-            if page_number == 0:
-                self.go_to_previous_page.disabled = True
-                self.go_to_previous_page.label = '…'
-
-    async def show_checked_page(self, interaction: discord.Interaction, page_number: int) -> None:
-        max_pages = self.source.get_max_pages()
-        try:
-            if max_pages is None:
-                # If it doesn't give maximum pages, it cannot be checked
-                await self.show_page(interaction, page_number)
-            elif max_pages > page_number >= 0:
-                await self.show_page(interaction, page_number)
-        except IndexError:
-            # An error happened that can be handled, so ignore it.
-            pass
-
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user and interaction.user.id in (self.ctx.bot.owner_id, self.ctx.author.id):
-            return True
-        await interaction.response.send_message('This pagination menu cannot be controlled by you, sorry!', ephemeral=True)
-        return False
-
-    async def on_timeout(self) -> None:
-        if self.message:
-            await self.message.edit(view=None)
-
-    async def on_error(self, error: Exception, item: discord.ui.Item, interaction: discord.Interaction) -> None:
-        if interaction.response.is_done():
-            await interaction.followup.send(f'An unknown error occurred, sorry {error}', ephemeral=True)
-            print(error)
+            self._items = []
+            self._iterator = items.__aiter__()
+
+    def is_paginating(self) -> bool:
+        max_pages = self.get_max_pages()
+        return max_pages is None or max_pages > 1
+
+    def get_max_pages(self) -> Optional[int]:
+        if self.max_pages is not None:
+            return self.max_pages
+        if self.fetch is not None or self._iterator is not None:
+            return None
+        return len(self._items)
+
+    async def _item(self, page_number: int) -> Any:
+        async with self._iter_lock:
+            while self._iterator is not None and len(self._items) <= page_number:
+                try:
+                    self._items.append(await self._iterator.__anext__())
+                except StopAsyncIteration:
+                    self._iterator = None
+        return self._items[page_number]
+
+    async def _load(self, page_number: int) -> Any:
+        if self.fetch is not None:
+            page = await self.fetch(page_number)
         else:
-            await interaction.response.send_message(f'An unknown error occurred, sorry {error}', ephemeral=True)
-            print(error)
-
-    async def start(self) -> None:
-        if self.check_embeds and not self.ctx.channel.permissions_for(self.ctx.me).embed_links:
-            await self.ctx.send('Bot does not have embed links permission in this channel.')
-            return
-
-        await self.source._prepare_once()
-        page = await self.source.get_page(0)
-        kwargs = await self._get_kwargs_from_page(page)
-        self._update_labels(0)
-        self.message = await self.ctx.respond(**kwargs, view=self)
-
-    @discord.ui.button(label='≪', style=discord.ButtonStyle.grey)
-    async def go_to_first_page(self, button: discord.ui.Button, interaction: discord.Interaction):
-        """go to the first page"""
-        await self.show_page(interaction, 0)
-
-    @discord.ui.button(label='Back', style=discord.ButtonStyle.blurple)
-    async def go_to_previous_page(self, button: discord.ui.Button, interaction: discord.Interaction):
-        """go to the previous page"""
-        await self.show_checked_page(interaction, self.current_page - 1)
-
-    @discord.ui.button(label='Current', style=discord.ButtonStyle.grey, disabled=True)
-    async def go_to_current_page(self, button: discord.ui.Button, interaction: discord.Interaction):
-        pass
-
-    @discord.ui.button(label='Next', style=discord.ButtonStyle.blurple)
-    async def go_to_next_page(self, button: discord.ui.Button, interaction: discord.Interaction):
-        """go to the next page"""
-        await self.show_checked_page(interaction, self.current_page + 1)
-
-    @discord.ui.button(label='≫', style=discord.ButtonStyle.grey)
-    async def go_to_last_page(self, button: discord.ui.Button, interaction: discord.Interaction):
-        """go to the last page"""
-        # The call here is safe because it's guarded by skip_if
-        await self.show_page(interaction, self.source.get_max_pages() - 1)
-
-
-    @discord.ui.button(label='Skip to page...', style=discord.ButtonStyle.grey)
-    async def numbered_page(self, button: discord.ui.Button, interaction: discord.Interaction):
-        """lets you type a page number to go to"""
-        if self.input_lock.locked():
-            await interaction.response.send_message('Already waiting for your response...', ephemeral=True)
-            return
-
-        if self.message is None:
-            return
-
-        async with self.input_lock:
-            channel = self.message.channel
-            author_id = interaction.user and interaction.user.id
-            await interaction.response.send_message('What page do you want to go to?', ephemeral=True)
-
-            def message_check(m):
-                return m.author.id == author_id and channel == m.channel and m.content.isdigit()
+            item = await self._item(page_number)
+            page = await discord.utils.maybe_coroutine(self.render, item, page_number) if self.render else item
+        self._cache[page_number] = page
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return page
+
+    def _finished(self, page_number: int, task: asyncio.Task) -> None:
+        self._pending.pop(page_number, None)
+        if not task.cancelled():
+            # Mark the exception as retrieved; a failed prefetch is retried when the page is actually shown
+            task.exception()
+
+    def _schedule(self, page_number: int) -> asyncio.Task:
+        task = self._pending.get(page_number)
+        if task is None:
+            task = self._pending[page_number] = asyncio.create_task(self._load(page_number))
+            task.add_done_callback(functools.partial(self._finished, page_number))
+        return task
+
+    async def get_page(self, page_number: int) -> Any:
+        max_pages = self.get_max_pages()
+        if page_number < 0 or (max_pages is not None and page_number >= max_pages):
+            raise IndexError(page_number)
+        if page_number in self._cache:
+            self._cache.move_to_end(page_number)
+            page = self._cache[page_number]
+        else:
+            page = await self._schedule(page_number)
 
-            try:
-                msg = await self.ctx.bot.wait_for('message', check=message_check, timeout=30.0)
-            except asyncio.TimeoutError:
-                await interaction.followup.send('Took too long.', ephemeral=True)
-                await asyncio.sleep(5)
-            else:
-                page = int(msg.content)
-                await msg.delete()
-                await self.show_checked_page(interaction, page - 1)
+        next_page = page_number + 1
+        if self.prefetch and next_page not in self._cache and (max_pages is None or next_page < max_pages):
+            self._schedule(next_page)
+        return page
 
-    @discord.ui.button(label='Quit', style=discord.ButtonStyle.red)
-    async def stop_pages(self, button: discord.ui.Button, interaction: discord.Interaction):
-        """stops the pagination session."""
-        await interaction.response.defer()
-        await interaction.delete_original_message()
-        self.stop()
+    async def format_page(self, menu, page):
+        return page
 
 
 class FieldPageSource(menus.ListPageSource):
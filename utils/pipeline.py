@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import time
+import unicodedata
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+log = logging.getLogger(__name__)
+
+
+class NormalizedMessage:
+    """
+    The derived forms of a message's content that the message stages need.
+    Everything is computed once when the message enters the pipeline and shared by every stage.
+    """
+
+    __slots__ = ("message", "author", "content", "folded", "tokens", "upper_count", "lower_count", "mention_count")
+
+    def __init__(self, message: discord.Message):
+        self.message = message
+        self.author = message.author
+        self.content = message.content
+        self.folded = unicodedata.normalize("NFKC", message.content).casefold()
+        self.tokens = self.folded.split()
+        self.upper_count = sum(1 for c in message.content if c.isupper())
+        self.lower_count = sum(1 for c in message.content if c.islower())
+        self.mention_count = len(message.raw_mentions) + len(message.raw_role_mentions) + message.mention_everyone
+
+    @property
+    def caps_ratio(self) -> float:
+        letters = self.upper_count + self.lower_count
+        return self.upper_count / letters if letters else 0.0
+
+    @property
+    def has_caps(self) -> bool:
+        """True if the message has noticeably more capitalized letters than lowercase letters."""
+        return self.upper_count > (self.lower_count + 3)
+
+
+Stage = Callable[[NormalizedMessage], Awaitable[Optional[bool]]]
+
+
+class StageStats:
+    __slots__ = ("calls", "total", "slowest")
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.slowest = 0.0
+
+    def record(self, elapsed: float) -> None:
+        self.calls += 1
+        self.total += elapsed
+        if elapsed > self.slowest:
+            self.slowest = elapsed
+
+    @property
+    def average(self) -> float:
+        return self.total / self.calls if self.calls else 0.0
+
+
+class MessagePipeline:
+    """
+    Runs every incoming message through the registered message stages.
+    Gate stages run first, one at a time in registration order; if one returns True the message has been dealt with
+    (for example, it was censored) and no further stages run. The remaining stages are independent of each other and
+    run concurrently.
+    """
+
+    def __init__(self):
+        self.gates: Dict[str, Stage] = {}
+        self.stages: Dict[str, Stage] = {}
+        self.stats: Dict[str, StageStats] = {}
+
+    def register(self, name: str, stage: Stage, *, gate: bool = False) -> None:
+        """Registers a stage under a name, replacing any stage already registered with that name."""
+        self.unregister(name)
+        (self.gates if gate else self.stages)[name] = stage
+        self.stats.setdefault(name, StageStats())
+
+    def unregister(self, name: str) -> None:
+        self.gates.pop(name, None)
+        self.stages.pop(name, None)
+
+    async def _run_stage(self, name: str, stage: Stage, normalized: NormalizedMessage) -> Optional[bool]:
+        start = time.perf_counter()
+        try:
+            return await stage(normalized)
+        finally:
+            self.stats[name].record(time.perf_counter() - start)
+
+    async def process(self, message: discord.Message) -> NormalizedMessage:
+        """Normalizes a message once and runs it through every stage."""
+        normalized = NormalizedMessage(message)
+        for name, gate in list(self.gates.items()):
+            if await self._run_stage(name, gate, normalized):
+                log.debug("Message stopped", extra={"stage": name, "channel_id": message.channel.id,
+                                                    "author_id": message.author.id})
+                return normalized
+        await asyncio.gather(*(self._run_stage(name, stage, normalized) for name, stage in list(self.stages.items())))
+        log.debug("Message processed", extra={"channel_id": message.channel.id, "author_id": message.author.id,
+                                              "length": len(normalized.content)})
+        return normalized
+
+    def timings(self) -> List[str]:
+        """Returns a human readable line of timing information for each stage."""
+        return [
+            f"{name}: {s.calls} calls, {s.average * 1000:.2f} ms avg, {s.slowest * 1000:.2f} ms max"
+            for name, s in self.stats.items()
+        ]
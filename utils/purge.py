@@ -0,0 +1,189 @@
+import asyncio
+import collections
+import datetime
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Counter, Iterable, List, Optional
+
+import discord
+
+log = logging.getLogger(__name__)
+
+# Discord only bulk deletes messages younger than 14 days; keep a margin for messages that age out mid-run
+BULK_DELETE_MAX_AGE = datetime.timedelta(days=14) - datetime.timedelta(minutes=5)
+BULK_DELETE_BATCH = 100
+# Seconds between single deletes, which share a tight per-channel rate limit
+SINGLE_DELETE_INTERVAL = 1.2
+
+MessageCheck = Callable[[discord.Message], bool]
+Progress = Callable[["PurgeJob"], Awaitable[None]]
+
+LINK = re.compile(r"https?://\S+", re.IGNORECASE)
+
+
+def message_filter(
+        *,
+        author_id: Optional[int] = None,
+        pattern: Optional["re.Pattern[str]"] = None,
+        attachments: Optional[bool] = None,
+        links: Optional[bool] = None
+) -> MessageCheck:
+    """
+    Builds a check out of the given filters; every filter that is set must match. The cheap comparisons run before the
+    regex, so most messages are rejected without it.
+    """
+    def check(message: discord.Message) -> bool:
+        if author_id is not None and message.author.id != author_id:
+            return False
+        if attachments is not None and bool(message.attachments) != attachments:
+            return False
+        if links is not None and (LINK.search(message.content) is not None) != links:
+            return False
+        return pattern is None or pattern.search(message.content) is not None
+
+    return check
+
+
+class SingleDeleteWorker:
+    """
+    Deletes messages that can't be bulk deleted, one at a time and well under the rate limit, in the background.
+    Commands queue their messages and return straight away instead of waiting minutes for the deletes to finish.
+    """
+
+    def __init__(self, interval: float = SINGLE_DELETE_INTERVAL):
+        self.interval = interval
+        self.queue: "asyncio.Queue[discord.Message]" = asyncio.Queue()
+        self.deleted = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(self, messages: Iterable[discord.Message]) -> int:
+        count = 0
+        for message in messages:
+            self.queue.put_nowait(message)
+            count += 1
+        if count and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._run())
+        return count
+
+    @property
+    def pending(self) -> int:
+        return self.queue.qsize()
+
+    async def _run(self) -> None:
+        while not self.queue.empty():
+            message = self.queue.get_nowait()
+            try:
+                await message.delete()
+                self.deleted += 1
+            except discord.NotFound:
+                pass
+            except discord.HTTPException:
+                log.exception("Failed to delete message %s", message.id)
+            await asyncio.sleep(self.interval)
+
+
+SINGLE_DELETES = SingleDeleteWorker()
+
+
+class PurgeJob:
+    """
+    Deletes the messages matching a check from one or more channels.
+    Each channel's history is streamed once, concurrently with the other channels. Matching messages younger than 14
+    days are deleted in batches of 100 as soon as a batch fills up; older ones are handed to the background
+    SingleDeleteWorker. Progress is reported at most every `progress_interval` seconds, and the job can be cancelled
+    between messages. `limit` caps how much of each channel's history is read and `max_matches` how many messages are
+    deleted from each channel.
+    """
+
+    def __init__(
+            self,
+            channels: List[discord.TextChannel],
+            check: MessageCheck,
+            *,
+            limit: Optional[int] = None,
+            max_matches: Optional[int] = None,
+            before: Optional[datetime.datetime] = None,
+            after: Optional[datetime.datetime] = None,
+            bulk: bool = True,
+            progress: Optional[Progress] = None,
+            progress_interval: float = 2.0
+    ):
+        self.channels = channels
+        self.check = check
+        self.limit = limit
+        self.max_matches = max_matches
+        self.before = before
+        self.after = after
+        self.bulk = bulk
+        self.progress = progress
+        self.progress_interval = progress_interval
+        self.scanned = 0
+        self.deleted = 0
+        self.queued = 0
+        self.authors: Counter[str] = collections.Counter()
+        self.cancelled = False
+        self._last_progress = 0.0
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    @property
+    def matched(self) -> int:
+        return self.deleted + self.queued
+
+    async def _report(self, force: bool = False) -> None:
+        if self.progress is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_progress >= self.progress_interval:
+            self._last_progress = now
+            await self.progress(self)
+
+    async def _flush(self, channel: discord.TextChannel, batch: List[discord.Message]) -> None:
+        if not batch:
+            return
+        try:
+            await channel.delete_messages(batch)
+            self.deleted += len(batch)
+        except discord.NotFound:
+            # Someone else deleted one of the messages first; fall back to deleting the rest one by one
+            self.queued += SINGLE_DELETES.enqueue(batch)
+        batch.clear()
+        await self._report()
+
+    async def _purge_channel(self, channel: discord.TextChannel) -> None:
+        cutoff = discord.utils.utcnow() - BULK_DELETE_MAX_AGE
+        batch: List[discord.Message] = []
+        legacy: List[discord.Message] = []
+        matched = 0
+        # history() walks oldest first whenever `after` is set; always start from the newest messages instead
+        history = channel.history(limit=self.limit, before=self.before, after=self.after, oldest_first=False)
+        async for message in history:
+            if self.cancelled:
+                break
+            self.scanned += 1
+            # Report on reads too, so a filtered scan that matches little still shows it's making progress
+            if self.scanned % BULK_DELETE_BATCH == 0:
+                await self._report()
+            if message.pinned or not self.check(message):
+                continue
+            self.authors[message.author.display_name] += 1
+            matched += 1
+            if self.bulk and message.created_at > cutoff:
+                batch.append(message)
+                if len(batch) == BULK_DELETE_BATCH:
+                    await self._flush(channel, batch)
+            else:
+                legacy.append(message)
+            if self.max_matches is not None and matched >= self.max_matches:
+                break
+
+        if not self.cancelled:
+            await self._flush(channel, batch)
+            self.queued += SINGLE_DELETES.enqueue(legacy)
+
+    async def run(self) -> "PurgeJob":
+        await asyncio.gather(*(self._purge_channel(channel) for channel in self.channels))
+        await self._report(force=True)
+        return self
@@ -0,0 +1,138 @@
+import asyncio
+import collections
+import datetime
+import logging
+import time
+from typing import Deque, Iterable, List, Optional, Tuple
+
+import discord
+
+log = logging.getLogger(__name__)
+
+# Raid mode starts once RAID_THRESHOLD members join within RAID_WINDOW seconds, and ends once the same window holds
+# no more than CALM_THRESHOLD joins, so a raid that slows down for a moment doesn't flap in and out of raid mode
+RAID_WINDOW = 60.0
+RAID_THRESHOLD = 10
+CALM_THRESHOLD = 3
+# Seconds between welcome digests, and between Member role grants while in raid mode
+DIGEST_INTERVAL = 30.0
+ROLE_GRANT_INTERVAL = 1.0
+
+AGE_BUCKETS: List[Tuple[Optional[datetime.timedelta], str]] = [
+    (datetime.timedelta(hours=1), "< 1 hour"),
+    (datetime.timedelta(days=1), "< 1 day"),
+    (datetime.timedelta(weeks=1), "< 1 week"),
+    (datetime.timedelta(days=30), "< 1 month"),
+    (datetime.timedelta(days=365), "< 1 year"),
+    (None, "older"),
+]
+
+
+def age_histogram(created: Iterable[datetime.datetime], now: Optional[datetime.datetime] = None) -> List[int]:
+    """Counts accounts into AGE_BUCKETS by how long ago they were created."""
+    now = now or discord.utils.utcnow()
+    counts = [0] * len(AGE_BUCKETS)
+    for created_at in created:
+        age = now - created_at
+        for index, (limit, _) in enumerate(AGE_BUCKETS):
+            if limit is None or age < limit:
+                counts[index] += 1
+                break
+    return counts
+
+
+def format_histogram(counts: List[int], width: int = 20) -> str:
+    most = max(counts) or 1
+    lines = []
+    for (_, label), count in zip(AGE_BUCKETS, counts):
+        bar = "#" * round(count / most * width)
+        lines.append(f"{label:>10} | {bar} {count}")
+    return "\n".join(lines)
+
+
+class JoinRateDetector:
+    """
+    Keeps a sliding window of recent joins and decides when raid mode should start and end.
+    Each join is stored with its account's creation date, so the window can also be summarised as an age histogram.
+    """
+
+    def __init__(self, window: float = RAID_WINDOW, threshold: int = RAID_THRESHOLD, calm: int = CALM_THRESHOLD):
+        self.window = window
+        self.threshold = threshold
+        self.calm = calm
+        self.active = False
+        self._joins: Deque[Tuple[float, datetime.datetime]] = collections.deque()
+
+    def _prune(self, now: float) -> None:
+        while self._joins and self._joins[0][0] <= now - self.window:
+            self._joins.popleft()
+
+    @property
+    def rate(self) -> int:
+        """The number of joins currently in the window."""
+        return len(self._joins)
+
+    def window_ages(self) -> List[datetime.datetime]:
+        return [created_at for _, created_at in self._joins]
+
+    def record(self, created_at: datetime.datetime, now: Optional[float] = None) -> bool:
+        """Records a join, returning true if it started raid mode."""
+        now = time.monotonic() if now is None else now
+        self._joins.append((now, created_at))
+        self._prune(now)
+        if not self.active and len(self._joins) >= self.threshold:
+            self.active = True
+            return True
+        return False
+
+    def settle(self, now: Optional[float] = None) -> bool:
+        """Returns true if the join rate has dropped enough to end raid mode."""
+        self._prune(time.monotonic() if now is None else now)
+        if self.active and len(self._joins) <= self.calm:
+            self.active = False
+            return True
+        return False
+
+
+class RoleGrantWorker:
+    """
+    Grants roles one at a time in the background, well under the member edit rate limit.
+    Members who leave or already have the role by the time their turn comes are skipped.
+    """
+
+    def __init__(self, interval: float = ROLE_GRANT_INTERVAL):
+        self.interval = interval
+        self.queue: "asyncio.Queue[Tuple[discord.Member, discord.Role]]" = asyncio.Queue()
+        self.granted = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def enqueue(self, member: discord.Member, role: Optional[discord.Role]) -> None:
+        if role is None:
+            log.warning("Not queueing a role grant for %s, the role doesn't exist", member.id)
+            return
+        self.queue.put_nowait((member, role))
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    @property
+    def pending(self) -> int:
+        return self.queue.qsize()
+
+    def cancel(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        while not self.queue.empty():
+            member, role = self.queue.get_nowait()
+            # One bad grant is logged and skipped; it must never stop the rest of the queue
+            try:
+                if member.guild.get_member(member.id) is None or role in member.roles:
+                    continue
+                await member.add_roles(role)
+                self.granted += 1
+            except discord.NotFound:
+                pass
+            except Exception:
+                log.exception("Failed to give %s the %s role", member.id, role)
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,441 @@
+"""
+Offline replay harness for the message path.
+
+Replays a recorded or synthetic message stream through the bot without a Discord connection, using stand-in guild,
+channel, member and message objects and a fake HTTP layer that only counts the REST calls the bot would have made.
+Each suite reports throughput, per-message latency percentiles, per-stage timings and allocations, and results can be
+saved and compared against a previous run to catch regressions.
+
+Usage:
+    python -m utils.replay [--messages N] [--stream recorded.jsonl] [--suite pipeline censor spam logging]
+                           [--output results.json] [--compare previous.json]
+
+A recorded stream is a JSON lines file with one {"author": id, "channel": id, "content": "..."} object per line.
+"""
+import argparse
+import collections
+import datetime
+import json
+import os
+import random
+import re
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+import discord
+
+from utils.variables import *
+
+CHAT_CHANNEL_IDS = [900000000000000001 + i for i in range(5)]
+BOT_USER_ID = 900000000000000100
+
+SAMPLE_TEXT = [
+    "does anyone have notes for anatomy?",
+    "what time is practice on saturday",
+    "i think the answer to number 4 is mitochondria",
+    "good luck at invitationals everyone!",
+    "can someone explain how the mousetrap vehicle scoring works",
+    "lol",
+    "thanks for the help",
+    "has anyone started the codebusters packet yet",
+    "the rocks and minerals id list got updated",
+    "ok",
+]
+
+
+class FakeHTTP:
+    """Counts the REST calls that would have been sent to Discord."""
+
+    def __init__(self):
+        self.calls = collections.Counter()
+
+    def record(self, name: str) -> None:
+        self.calls[name] += 1
+
+
+class FakeRole:
+    def __init__(self, role_id: int, name: str):
+        self.id = role_id
+        self.name = name
+        self.mention = f"<@&{role_id}>"
+
+    def __str__(self):
+        return self.name
+
+
+class FakeMember:
+    def __init__(self, http: FakeHTTP, guild, member_id: int, name: str, bot: bool = False):
+        self._http = http
+        self.guild = guild
+        self.id = member_id
+        self.name = name
+        self.nick = None
+        self.discriminator = f"{member_id % 10000:04d}" if member_id % 10000 else "0001"
+        self.bot = bot
+        self.avatar = None
+        self.roles = []
+        self.mention = f"<@{member_id}>"
+        self.created_at = discord.utils.utcnow() - datetime.timedelta(days=365)
+        self.joined_at = discord.utils.utcnow() - datetime.timedelta(days=30)
+
+    @property
+    def display_name(self) -> str:
+        return self.nick or self.name
+
+    def __str__(self):
+        return f"{self.name}#{self.discriminator}"
+
+    async def send(self, *args, **kwargs):
+        self._http.record("POST /users/@me/channels/messages")
+
+    async def add_roles(self, *roles, **kwargs):
+        self._http.record("PUT /guilds/members/roles")
+        self.roles.extend(r for r in roles if r is not None)
+
+    async def remove_roles(self, *roles, **kwargs):
+        self._http.record("DELETE /guilds/members/roles")
+
+
+class FakeWebhook:
+    def __init__(self, http: FakeHTTP):
+        self._http = http
+
+    async def send(self, *args, **kwargs):
+        self._http.record("POST /webhooks")
+
+    async def delete(self):
+        self._http.record("DELETE /webhooks")
+
+
+class FakeMessage:
+    _next_id = 910000000000000000
+    # Command contexts copy the message's connection state; nothing in the replay reads it
+    _state = None
+
+    def __init__(self, http: FakeHTTP, channel, author: FakeMember, content: str,
+                 created_at: Optional[datetime.datetime] = None):
+        FakeMessage._next_id += 1
+        self._http = http
+        self.id = FakeMessage._next_id
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.created_at = created_at or discord.utils.utcnow()
+        self.edited_at = None
+        self.attachments = []
+        self.embeds = []
+        self.pinned = False
+        self.webhook_id = None
+        self.type = discord.MessageType.default
+        self.raw_mentions = [int(m) for m in re.findall(r"<@!?(\d+)>", content)]
+        self.raw_role_mentions = [int(m) for m in re.findall(r"<@&(\d+)>", content)]
+        self.mention_everyone = "@everyone" in content or "@here" in content
+        self.mentions = []
+        self.role_mentions = []
+        self.jump_url = f"https://discord.com/channels/{self.guild.id}/{channel.id}/{self.id}"
+
+    async def delete(self, **kwargs):
+        self._http.record("DELETE /channels/messages")
+
+    async def add_reaction(self, emoji):
+        self._http.record("PUT /channels/messages/reactions")
+
+
+class FakeChannel:
+    def __init__(self, http: FakeHTTP, guild, channel_id: int, name: str):
+        self._http = http
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.type = discord.ChannelType.text
+        self.mention = f"<#{channel_id}>"
+        self._messages: Dict[int, FakeMessage] = {}
+
+    def __str__(self):
+        return self.name
+
+    async def send(self, content=None, **kwargs):
+        self._http.record("POST /channels/messages")
+        return FakeMessage(self._http, self, self.guild.me, content or "")
+
+    async def create_webhook(self, **kwargs):
+        self._http.record("POST /channels/webhooks")
+        return FakeWebhook(self._http)
+
+    async def fetch_message(self, message_id: int):
+        self._http.record("GET /channels/messages")
+        return self._messages[message_id]
+
+
+class FakeGuild:
+    def __init__(self, http: FakeHTTP, guild_id: int = SERVER_ID):
+        self.id = guild_id
+        self.name = "TMS SciOly (replay)"
+        self.unavailable = False
+        self.roles = [FakeRole(i + 1, name) for i, name in enumerate(
+            [ROLE_MR, ROLE_MUTED, ROLE_SELFMUTE, ROLE_SERVERLEADER, ROLE_COACH])]
+        self.me = FakeMember(http, self, BOT_USER_ID, "TMS-Bot", bot=True)
+        self.members: List[FakeMember] = []
+        channel_ids = {
+            CHANNEL_REPORTS: "reports",
+            CHANNEL_CLOSED_REPORTS: "closed-reports",
+            CHANNEL_DELETEDM: "deleted-messages",
+            CHANNEL_DMLOG: "dm-log",
+            WELCOME_CHANNEL: "welcome",
+            CHANNEL_SUGGESTIONS: "suggestions",
+        }
+        channel_ids.update({cid: f"chat-{i}" for i, cid in enumerate(CHAT_CHANNEL_IDS)})
+        self.text_channels = [FakeChannel(http, self, cid, name) for cid, name in channel_ids.items()]
+        self.channels = self.text_channels
+        self._channels = {c.id: c for c in self.text_channels}
+        self._members: Dict[int, FakeMember] = {}
+
+    def get_channel(self, channel_id: int):
+        return self._channels.get(channel_id)
+
+    _resolve_channel = get_channel
+
+    def get_member(self, member_id: int):
+        return self._members.get(member_id)
+
+    def get_role(self, role_id: int):
+        return discord.utils.get(self.roles, id=role_id)
+
+    def add_member(self, member: FakeMember) -> None:
+        self._members[member.id] = member
+        self.members.append(member)
+
+
+class FakePayload:
+    def __init__(self, message: FakeMessage):
+        self.channel_id = message.channel.id
+        self.message_id = message.id
+        self.guild_id = message.guild.id
+        self.cached_message = message
+        self.data = {"content": message.content}
+
+
+class ReplayWorld:
+    """The stand-in guild, its members and the fake HTTP layer for one replay."""
+
+    def __init__(self, authors: int = 200):
+        self.http = FakeHTTP()
+        self.guild = FakeGuild(self.http)
+        for i in range(authors):
+            self.guild.add_member(FakeMember(self.http, self.guild, 920000000000000000 + i, f"scientist{i}"))
+
+    def message(self, author: int, channel: int, content: str, **kwargs) -> FakeMessage:
+        """Builds a message from a stream entry, whose keys match these parameters."""
+        member = self.guild.get_member(author)
+        if member is None:
+            member = FakeMember(self.http, self.guild, author, f"user{author}")
+            self.guild.add_member(member)
+        text_channel = self.guild.get_channel(channel) or self.guild.get_channel(CHAT_CHANNEL_IDS[0])
+        return FakeMessage(self.http, text_channel, member, content, **kwargs)
+
+
+def synthetic_stream(count: int, seed: int = 0, authors: int = 200, censored_word: str = "BAD_WORDS") -> List[dict]:
+    """
+    Generates a deterministic message stream: mostly normal chat, with some caps, short repeated bursts, mentions and
+    the occasional censored word, spread over many authors so no single author is escalated.
+    """
+    rng = random.Random(seed)
+    stream = []
+    while len(stream) < count:
+        author = 920000000000000000 + rng.randrange(authors)
+        channel = rng.choice(CHAT_CHANNEL_IDS)
+        roll = rng.random()
+        text = rng.choice(SAMPLE_TEXT)
+        if roll < 0.05:
+            text = text.upper() + "!!!"
+        elif roll < 0.10:
+            for _ in range(rng.randint(2, 4)):
+                stream.append({"author": author, "channel": channel, "content": text})
+            continue
+        elif roll < 0.13:
+            text = f"<@{920000000000000000 + rng.randrange(authors)}> {text}"
+        elif roll < 0.15:
+            text = f"{text} {censored_word}"
+        stream.append({"author": author, "channel": channel, "content": text})
+    return stream[:count]
+
+
+def load_stream(path: str) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+class ReplayHarness:
+    def __init__(self, bot, stream: List[dict]):
+        self.bot = bot
+        self.stream = stream
+        self.world = ReplayWorld()
+
+    def install(self) -> None:
+        """Points the bot at the stand-in guild and keeps the replay's databases out of the working tree."""
+        from utils.cases import CASE_LEDGER
+        from utils.search import SEARCH_INDEX
+
+        self.bot._connection._guilds[self.world.guild.id] = self.world.guild
+        self.bot._connection.user = self.world.guild.me
+        tmp = tempfile.mkdtemp(prefix="tms-replay-")
+        CASE_LEDGER.path = os.path.join(tmp, "cases.db")
+        SEARCH_INDEX.path = os.path.join(tmp, "search.db")
+
+    async def close(self) -> None:
+        """Closes the replay's databases, whose connection threads would otherwise keep the process alive."""
+        from utils.cases import CASE_LEDGER
+        from utils.search import SEARCH_INDEX
+
+        await CASE_LEDGER.close()
+        await SEARCH_INDEX.close()
+
+    def reset(self) -> None:
+        from utils.cases import CASE_LEDGER
+
+        self.world.http.calls.clear()
+        CASE_LEDGER._recent.clear()
+        spam = self.bot.get_cog("SpamManager")
+        if spam is not None:
+            spam.recent_messages.clear()
+        for stats in self.bot.pipeline.stats.values():
+            stats.__init__()
+
+    def suite_runner(self, suite: str):
+        from utils.pipeline import NormalizedMessage
+
+        if suite == "pipeline":
+            return self.bot.on_message
+        if suite == "censor":
+            censor = self.bot.get_cog("Censor")
+            return lambda m: censor.check(NormalizedMessage(m))
+        if suite == "spam":
+            spam = self.bot.get_cog("SpamManager")
+            return lambda m: spam.store_and_validate(NormalizedMessage(m))
+        if suite == "logging":
+            listeners = self.bot.get_cog("Listeners")
+
+            async def log(message):
+                message.created_at = discord.utils.utcnow() - datetime.timedelta(minutes=5)
+                message.edited_at = discord.utils.utcnow()
+                message.channel._messages[message.id] = message
+                payload = FakePayload(message)
+                await listeners.log_edit_message_payload(payload)
+                await listeners.log_delete_message_payload(payload)
+
+            return log
+        raise ValueError(f"Unknown suite {suite}")
+
+    async def _replay(self, runner, latencies: Optional[List[float]] = None) -> float:
+        messages = [self.world.message(**m) for m in self.stream]
+        start = time.perf_counter()
+        for message in messages:
+            before = time.perf_counter()
+            await runner(message)
+            if latencies is not None:
+                latencies.append(time.perf_counter() - before)
+        return time.perf_counter() - start
+
+    async def run_suite(self, suite: str) -> dict:
+        runner = self.suite_runner(suite)
+
+        self.reset()
+        latencies: List[float] = []
+        elapsed = await self._replay(runner, latencies)
+        calls = dict(self.world.http.calls)
+        stages = {
+            name: {"calls": s.calls, "avg_ms": s.average * 1000, "max_ms": s.slowest * 1000}
+            for name, s in self.bot.pipeline.stats.items() if s.calls
+        }
+
+        # Allocations are measured on a second pass, since tracing slows everything down
+        self.reset()
+        tracemalloc.start()
+        await self._replay(runner)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "messages": len(self.stream),
+            "seconds": elapsed,
+            "msgs_per_sec": len(self.stream) / elapsed if elapsed else 0.0,
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p95_ms": percentile(latencies, 0.95) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+            "alloc_peak_kib": peak / 1024,
+            "alloc_retained_kib": current / 1024,
+            "stages": stages,
+            "rest_calls": calls,
+        }
+
+
+def print_report(results: Dict[str, dict], previous: Optional[Dict[str, dict]] = None) -> None:
+    for suite, r in results.items():
+        print(f"== {suite} ==")
+        line = f"{r['messages']} messages in {r['seconds']:.3f}s -> {r['msgs_per_sec']:.0f} msgs/sec"
+        if previous and suite in previous and previous[suite]["msgs_per_sec"]:
+            change = (r["msgs_per_sec"] / previous[suite]["msgs_per_sec"] - 1) * 100
+            line += f" ({change:+.1f}% vs previous)"
+        print(line)
+        print(f"latency p50 {r['p50_ms']:.3f} ms | p95 {r['p95_ms']:.3f} ms | p99 {r['p99_ms']:.3f} ms")
+        print(f"allocations peak {r['alloc_peak_kib']:.1f} KiB | retained {r['alloc_retained_kib']:.1f} KiB")
+        for name, s in r["stages"].items():
+            print(f"  stage {name}: {s['calls']} calls, {s['avg_ms']:.3f} ms avg, {s['max_ms']:.3f} ms max")
+        for name, count in sorted(r["rest_calls"].items()):
+            print(f"  would call {name}: {count}")
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a message stream through the bot offline.")
+    parser.add_argument("--messages", type=int, default=5000, help="number of synthetic messages to generate")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic stream")
+    parser.add_argument("--stream", help="replay a recorded JSON lines stream instead of a synthetic one")
+    parser.add_argument("--suite", nargs="+", default=["pipeline", "censor", "spam", "logging"],
+                        choices=["pipeline", "censor", "spam", "logging"])
+    parser.add_argument("--output", help="save the results as JSON")
+    parser.add_argument("--compare", help="compare against results saved by a previous run")
+    args = parser.parse_args()
+
+    # Importing the bot module builds the bot and loads every extension, exactly as in production
+    from bot import bot
+    from cogs.censor import CENSORED
+
+    stream = load_stream(args.stream) if args.stream else synthetic_stream(
+        args.messages, args.seed, censored_word=CENSORED["words"][0])
+    harness = ReplayHarness(bot, stream)
+    harness.install()
+
+    async def run_all():
+        try:
+            return {suite: await harness.run_suite(suite) for suite in args.suite}
+        finally:
+            await harness.close()
+
+    results = bot.loop.run_until_complete(run_all())
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_report(results, previous)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
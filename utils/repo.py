@@ -0,0 +1,102 @@
+import asyncio
+import datetime
+import inspect
+import itertools
+import os
+from typing import Dict, List, Optional, Tuple
+
+import discord
+import pygit2
+
+from utils import times
+
+REPO_PATH = "tms-scioly-bots"
+REPO_URL = "https://github.com/pandabear189/tms-scioly-bots"
+BRANCH = "master"
+
+# How many commits are formatted and cached each time HEAD moves
+CACHED_COMMITS = 50
+
+
+def format_commit(commit: pygit2.Commit) -> str:
+    short, _, _ = commit.message.partition('\n')
+    short_sha2 = commit.hex[0:6]
+    commit_tz = datetime.timezone(datetime.timedelta(minutes=commit.commit_time_offset))
+    commit_time = datetime.datetime.fromtimestamp(commit.commit_time).astimezone(commit_tz)
+
+    # [`hash`](url) message (offset)
+    offset = times.format_relative(commit_time.astimezone(datetime.timezone.utc))
+    return f'[`{short_sha2}`]({REPO_URL}/commit/{commit.hex}) {short} ({offset})'
+
+
+class RepoInfo:
+    """
+    Information about the bot's own git repository.
+    The repository is opened once. The formatted commit log is cached against the HEAD commit, and the history is
+    only walked again when HEAD moves. All git access happens in an executor so it never blocks the event loop.
+    """
+
+    def __init__(self, path: str = REPO_PATH):
+        self.path = path
+        self._repo: Optional[pygit2.Repository] = None
+        self._head: Optional[pygit2.Oid] = None
+        self._commits: List[str] = []
+        self._lock = asyncio.Lock()
+
+    def _refresh(self) -> None:
+        if self._repo is None:
+            self._repo = pygit2.Repository(self.path)
+        head = self._repo.head.target
+        if head == self._head:
+            return
+        walker = self._repo.walk(head, pygit2.GIT_SORT_TOPOLOGICAL)
+        self._commits = [format_commit(c) for c in itertools.islice(walker, CACHED_COMMITS)]
+        self._head = head
+
+    async def last_commits(self, count: int) -> str:
+        """Returns the latest `count` commits, formatted one per line."""
+        async with self._lock:
+            await asyncio.get_running_loop().run_in_executor(None, self._refresh)
+        return '\n'.join(self._commits[:count])
+
+
+# (location, first line, last line, repository URL)
+SourceLocation = Tuple[str, int, int, str]
+
+
+def source_location(obj) -> SourceLocation:
+    lines, firstlineno = inspect.getsourcelines(obj)
+    module = inspect.getmodule(obj).__name__
+    if not module.startswith('discord'):
+        # not a built-in command
+        location = os.path.relpath(inspect.getsourcefile(obj)).replace('\\', '/')
+        source_url = REPO_URL
+    else:
+        location = module.replace('.', '/') + '.py'
+        source_url = 'https://github.com/Rapptz/discord.py'
+    return location, firstlineno, firstlineno + len(lines) - 1, source_url
+
+
+def build_source_map(bot) -> Dict[str, SourceLocation]:
+    """Maps every slash command and subcommand name to where its source lives."""
+    source_map = {}
+    for command in bot.application_commands:
+        if isinstance(command, discord.SlashCommandGroup):
+            entries = [(f"{command.name} {sub.name}", sub) for sub in command.subcommands]
+        elif isinstance(command, discord.SlashCommand):
+            entries = [(command.name, command)]
+        else:
+            continue
+        for name, cmd in entries:
+            try:
+                source_map[name] = source_location(cmd.callback)
+            except (OSError, TypeError):
+                continue
+    try:
+        source_map['help'] = source_location(type(bot.help_command))
+    except (OSError, TypeError):
+        pass
+    return source_map
+
+
+REPO_INFO = RepoInfo()
@@ -0,0 +1,139 @@
+import datetime
+from typing import Iterable, List, Optional, Tuple
+
+import aiosqlite
+import discord
+
+SEARCH_DB = "search.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    user_id INTEGER,
+    channel_id INTEGER,
+    created_at REAL NOT NULL,
+    url TEXT,
+    content TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_user ON entries(user_id, created_at);
+CREATE INDEX IF NOT EXISTS entries_time ON entries(created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(content, content='entries', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts(entries_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+# (kind, user_id, channel_id, created_at, url, content)
+Entry = Tuple[str, Optional[int], Optional[int], float, Optional[str], str]
+
+
+def make_entry(
+        kind: str,
+        content: str,
+        *,
+        user_id: Optional[int] = None,
+        channel_id: Optional[int] = None,
+        created_at: Optional[datetime.datetime] = None,
+        url: Optional[str] = None
+) -> Entry:
+    created_at = created_at or discord.utils.utcnow()
+    return kind, user_id, channel_id, created_at.timestamp(), url, content
+
+
+def embed_text(embed: discord.Embed) -> str:
+    """Flattens the searchable text of an embed into a single string."""
+    parts = [embed.title, embed.description]
+    for field in embed.fields:
+        parts.append(field.name)
+        parts.append(field.value)
+    return "\n".join(str(p) for p in parts if p and p is not discord.Embed.Empty)
+
+
+def fts_query(keywords: str) -> str:
+    """Quotes every keyword so user input can never be parsed as FTS5 query syntax."""
+    return " ".join('"' + token.replace('"', '""') + '"' for token in keywords.split())
+
+
+class SearchIndex:
+    """
+    A local SQLite FTS5 index of moderation related text: logged edits and deletions, reports, moderation actions and
+    ticket transcripts. The connection is opened lazily the first time the index is used.
+    """
+
+    def __init__(self, path: str = SEARCH_DB):
+        self.path = path
+        self._db: Optional[aiosqlite.Connection] = None
+
+    async def connect(self) -> aiosqlite.Connection:
+        if self._db is None:
+            self._db = await aiosqlite.connect(self.path)
+            await self._db.executescript(SCHEMA)
+            await self._db.commit()
+        return self._db
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+    async def add(self, kind: str, content: str, **kwargs) -> None:
+        """Adds a single piece of text to the index."""
+        await self.add_many([make_entry(kind, content, **kwargs)])
+
+    async def add_many(self, entries: Iterable[Entry]) -> None:
+        """Adds a batch of entries to the index in one transaction."""
+        entries = [e for e in entries if e[5]]
+        if not entries:
+            return
+        db = await self.connect()
+        await db.executemany(
+            "INSERT INTO entries (kind, user_id, channel_id, created_at, url, content) VALUES (?, ?, ?, ?, ?, ?)",
+            entries
+        )
+        await db.commit()
+
+    async def search(
+            self,
+            *,
+            keywords: Optional[str] = None,
+            user_id: Optional[int] = None,
+            after: Optional[datetime.datetime] = None,
+            before: Optional[datetime.datetime] = None,
+            kind: Optional[str] = None,
+            limit: int = 250
+    ) -> List[aiosqlite.Row]:
+        """Returns the newest entries matching every given filter."""
+        clauses = []
+        params = []
+        if keywords:
+            clauses.append("e.id IN (SELECT rowid FROM entries_fts WHERE entries_fts MATCH ?)")
+            params.append(fts_query(keywords))
+        if user_id is not None:
+            clauses.append("e.user_id = ?")
+            params.append(user_id)
+        if after is not None:
+            clauses.append("e.created_at >= ?")
+            params.append(after.timestamp())
+        if before is not None:
+            clauses.append("e.created_at < ?")
+            params.append(before.timestamp())
+        if kind is not None:
+            clauses.append("e.kind = ?")
+            params.append(kind)
+
+        query = "SELECT e.kind, e.user_id, e.channel_id, e.created_at, e.url, e.content FROM entries e"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY e.created_at DESC LIMIT ?"
+        params.append(limit)
+
+        db = await self.connect()
+        async with db.execute(query, params) as cursor:
+            return list(await cursor.fetchall())
+
+
+SEARCH_INDEX = SearchIndex()
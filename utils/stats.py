@@ -0,0 +1,142 @@
+import bisect
+import collections
+import datetime
+from typing import Counter, Dict, List, Optional, Tuple
+
+import discord
+
+
+def is_locked(channel: discord.abc.GuildChannel, everyone_perms: int) -> bool:
+    """Whether @everyone is unable to read (or, for voice channels, join and speak in) a channel."""
+    allow, deny = channel.overwrites_for(channel.guild.default_role).pair()
+    perms = discord.Permissions((everyone_perms & ~deny.value) | allow.value)
+    if not perms.read_messages:
+        return True
+    return isinstance(channel, discord.VoiceChannel) and (not perms.connect or not perms.speak)
+
+
+class GuildStats:
+    """
+    Counters for a single guild, built once from the cache and then kept up to date from gateway events.
+    Members are also kept in a join-ordered index, so the newest members can be read without sorting everyone.
+    """
+
+    __slots__ = ("guild_id", "members", "bots", "features", "channels", "locked", "_channel_state", "_joined",
+                 "_join_times", "_boosters")
+
+    def __init__(self, guild: discord.Guild):
+        self.guild_id = guild.id
+        self.members = 0
+        self.bots = 0
+        self.features = frozenset(guild.features)
+        self.channels: Counter[type] = collections.Counter()
+        self.locked: Counter[type] = collections.Counter()
+        self._channel_state: Dict[int, Tuple[type, bool]] = {}
+        # Sorted (joined timestamp, member ID) pairs, and each member's entry for removal
+        self._joined: List[Tuple[float, int]] = []
+        self._join_times: Dict[int, float] = {}
+        # When each current booster started boosting
+        self._boosters: Dict[int, datetime.datetime] = {}
+
+        self.rebuild_channels(guild)
+        for member in guild.members:
+            self.add_member(member)
+
+    def rebuild_channels(self, guild: discord.Guild) -> None:
+        """Recounts every channel. Only needed when @everyone's permissions change."""
+        self.channels.clear()
+        self.locked.clear()
+        self._channel_state.clear()
+        for channel in guild.channels:
+            self.add_channel(channel)
+
+    def add_channel(self, channel: discord.abc.GuildChannel) -> None:
+        channel_type = type(channel)
+        locked = is_locked(channel, channel.guild.default_role.permissions.value)
+        self._channel_state[channel.id] = (channel_type, locked)
+        self.channels[channel_type] += 1
+        self.locked[channel_type] += locked
+
+    def remove_channel(self, channel_id: int) -> None:
+        state = self._channel_state.pop(channel_id, None)
+        if state is None:
+            return
+        channel_type, locked = state
+        # Drop types that reach zero, so they aren't shown as "0" lines
+        for counter, amount in ((self.channels, 1), (self.locked, locked)):
+            counter[channel_type] -= amount
+            if counter[channel_type] <= 0:
+                del counter[channel_type]
+
+    def update_channel(self, channel: discord.abc.GuildChannel) -> None:
+        self.remove_channel(channel.id)
+        self.add_channel(channel)
+
+    def add_member(self, member: discord.Member) -> None:
+        if member.id in self._join_times:
+            return
+        self.members += 1
+        self.bots += member.bot
+        joined = member.joined_at.timestamp() if member.joined_at else 0.0
+        self._join_times[member.id] = joined
+        bisect.insort(self._joined, (joined, member.id))
+        self.update_boost(member)
+
+    def remove_member(self, member: discord.Member) -> None:
+        joined = self._join_times.pop(member.id, None)
+        if joined is None:
+            return
+        self.members -= 1
+        self.bots -= member.bot
+        self._boosters.pop(member.id, None)
+        index = bisect.bisect_left(self._joined, (joined, member.id))
+        if index < len(self._joined) and self._joined[index] == (joined, member.id):
+            del self._joined[index]
+
+    def update_boost(self, member: discord.Member) -> None:
+        if member.premium_since is None:
+            self._boosters.pop(member.id, None)
+        else:
+            self._boosters[member.id] = member.premium_since
+
+    @property
+    def last_boost(self) -> Optional[Tuple[datetime.datetime, int]]:
+        """The (boosted at, member ID) of whoever most recently started boosting, among the current boosters."""
+        if not self._boosters:
+            return None
+        member_id = max(self._boosters, key=self._boosters.__getitem__)
+        return self._boosters[member_id], member_id
+
+    def newest(self, count: int) -> List[int]:
+        """Returns the IDs of the `count` most recently joined members, newest first."""
+        return [member_id for _, member_id in reversed(self._joined[-count:])] if count > 0 else []
+
+
+class StatsRegistry:
+    """Keeps a GuildStats for every guild the bot is in, building each one the first time it's asked for."""
+
+    def __init__(self):
+        self._guilds: Dict[int, GuildStats] = {}
+
+    def get(self, guild: discord.Guild) -> GuildStats:
+        stats = self._guilds.get(guild.id)
+        if stats is None:
+            stats = self._guilds[guild.id] = GuildStats(guild)
+        return stats
+
+    def peek(self, guild_id: int) -> Optional[GuildStats]:
+        """Returns a guild's stats only if they are already being tracked, so events never trigger a full build."""
+        return self._guilds.get(guild_id)
+
+    def rebuild(self, guild: discord.Guild) -> GuildStats:
+        stats = self._guilds[guild.id] = GuildStats(guild)
+        return stats
+
+    def discard(self, guild_id: int) -> None:
+        self._guilds.pop(guild_id, None)
+
+    def all(self) -> List[GuildStats]:
+        return list(self._guilds.values())
+
+
+GUILD_STATS = StatsRegistry()
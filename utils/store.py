@@ -0,0 +1,51 @@
+import asyncio
+import contextlib
+import json
+import os
+
+DATA_FILE = "data.json"
+
+_data_lock = asyncio.Lock()
+
+
+def load_data() -> dict:
+    """Reads the bot's persistent data file."""
+    with open(DATA_FILE) as f:
+        return json.load(f)
+
+
+def save_data(data: dict) -> None:
+    """
+    Writes the bot's persistent data file.
+    The data is written to a temporary file first and swapped in, so a crash never leaves a half written file.
+    """
+    tmp = f"{DATA_FILE}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, DATA_FILE)
+
+
+@contextlib.asynccontextmanager
+async def edit_data():
+    """
+    Loads the data file for a read-modify-write, saving it on exit.
+    Only one edit can be in progress at a time, so concurrent callers never overwrite each other's changes.
+    """
+    async with _data_lock:
+        data = load_data()
+        yield data
+        save_data(data)
+
+
+async def next_ticket_number() -> int:
+    """Atomically allocates the next ticket number."""
+    async with edit_data() as data:
+        data["ticket-counter"] = int(data["ticket-counter"]) + 1
+        return data["ticket-counter"]
+
+
+async def next_report_id() -> int:
+    """Atomically allocates the next report ID."""
+    async with edit_data() as data:
+        data["report_id"] = int(data["report_id"]) + 1
+        return data["report_id"]
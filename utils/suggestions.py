@@ -0,0 +1,115 @@
+import heapq
+import time
+from typing import Dict, List, Optional
+
+import aiosqlite
+
+SUGGESTIONS_DB = "suggestions.db"
+
+UPVOTE = "\U0001f44d"
+DOWNVOTE = "\U0001f44e"
+STATUSES = ["open", "approved", "denied", "deleted"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suggestions (
+    message_id INTEGER PRIMARY KEY,
+    author_id INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'open',
+    up INTEGER NOT NULL DEFAULT 0,
+    down INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL
+);
+"""
+
+
+class Suggestion:
+    __slots__ = ("message_id", "author_id", "content", "status", "up", "down", "created_at")
+
+    def __init__(self, message_id: int, author_id: int, content: str, status: str = "open", up: int = 0,
+                 down: int = 0, created_at: Optional[float] = None):
+        self.message_id = message_id
+        self.author_id = author_id
+        self.content = content
+        self.status = status
+        self.up = up
+        self.down = down
+        self.created_at = time.time() if created_at is None else created_at
+
+    @property
+    def score(self) -> int:
+        return self.up - self.down
+
+
+class SuggestionStore:
+    """
+    Suggestions and their vote tallies.
+    Votes are counted as reaction events arrive instead of by fetching the messages, and every suggestion is kept in
+    memory as well as in SQLite, so ranking them never touches the suggestions channel or the database. Once a
+    suggestion is approved, denied or deleted its tally is frozen.
+    """
+
+    def __init__(self, path: str = SUGGESTIONS_DB):
+        self.path = path
+        self._db: Optional[aiosqlite.Connection] = None
+        self._suggestions: Dict[int, Suggestion] = {}
+
+    async def connect(self) -> aiosqlite.Connection:
+        if self._db is None:
+            self._db = await aiosqlite.connect(self.path)
+            self._db.row_factory = aiosqlite.Row
+            await self._db.executescript(SCHEMA)
+            await self._db.commit()
+            async with self._db.execute("SELECT * FROM suggestions") as cursor:
+                async for row in cursor:
+                    self._suggestions[row["message_id"]] = Suggestion(**dict(row))
+        return self._db
+
+    async def close(self) -> None:
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+    def get(self, message_id: int) -> Optional[Suggestion]:
+        return self._suggestions.get(message_id)
+
+    async def add(self, message_id: int, author_id: int, content: str) -> Suggestion:
+        db = await self.connect()
+        suggestion = self._suggestions[message_id] = Suggestion(message_id, author_id, content)
+        await db.execute(
+            "INSERT OR REPLACE INTO suggestions (message_id, author_id, content, created_at) VALUES (?, ?, ?, ?)",
+            (message_id, author_id, content, suggestion.created_at)
+        )
+        await db.commit()
+        return suggestion
+
+    async def vote(self, message_id: int, emoji: str, delta: int) -> bool:
+        """Applies a reaction add (+1) or removal (-1), returning true if it changed an open suggestion's tally."""
+        suggestion = self._suggestions.get(message_id)
+        if suggestion is None or suggestion.status != "open" or emoji not in (UPVOTE, DOWNVOTE):
+            return False
+        column = "up" if emoji == UPVOTE else "down"
+        setattr(suggestion, column, max(0, getattr(suggestion, column) + delta))
+        db = await self.connect()
+        await db.execute(f"UPDATE suggestions SET {column} = ? WHERE message_id = ?",
+                         (getattr(suggestion, column), message_id))
+        await db.commit()
+        return True
+
+    async def set_status(self, message_id: int, status: str) -> bool:
+        suggestion = self._suggestions.get(message_id)
+        if suggestion is None:
+            return False
+        suggestion.status = status
+        db = await self.connect()
+        await db.execute("UPDATE suggestions SET status = ? WHERE message_id = ?", (status, message_id))
+        await db.commit()
+        return True
+
+    def top(self, count: int, status: str = "open") -> List[Suggestion]:
+        """The highest scoring suggestions with a status, breaking ties by the most upvotes and then the newest."""
+        candidates = (s for s in self._suggestions.values() if s.status == status)
+        return heapq.nlargest(count, candidates, key=lambda s: (s.score, s.up, s.created_at))
+
+
+SUGGESTIONS = SuggestionStore()
@@ -0,0 +1,185 @@
+import collections
+import functools
+import re
+import tokenize
+from typing import Dict, Optional, Tuple
+
+from utils.workers import JobError, WorkerPool
+
+MAX_EXPRESSION = 300
+MEMO_SIZE = 512
+# Only maths: no quotes, brackets, attribute access or dunders, which is all an escape from the parser would need
+ALLOWED = re.compile(r"[\w\s+\-*/^().,=!<>]*")
+ATTRIBUTE = re.compile(r"\.\s*[^\W\d]")
+# The only names expressions may use, besides the units for evaluation: elementary and special functions, calculus,
+# constants, and the constructors the parser emits for numbers, symbols, lambdas and factorials. Nothing that converts
+# strings or prints expressions, so input can never reach SymPy's own unrestricted parser.
+NAMES = (
+    "sin cos tan cot sec csc asin acos atan acot asec acsc atan2 sinh cosh tanh coth sech csch asinh acosh atanh acoth "
+    "exp log ln sqrt cbrt root Abs sign floor ceiling frac Mod Min Max gcd lcm re im arg conjugate "
+    "factorial factorial2 binomial gamma beta erf erfc zeta "
+    "diff integrate limit summation product Derivative Integral Limit Sum Product "
+    "expand factor simplify cancel apart together trigsimp expand_trig nsimplify N "
+    "Eq Piecewise Lambda pi E I oo zoo nan GoldenRatio EulerGamma Catalan "
+    "Integer Float Rational Symbol Function"
+).split()
+
+Result = Tuple[str, str]  # (plain text, LaTeX)
+
+
+class MathError(Exception):
+    pass
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+# Everything below runs in the worker processes
+
+@functools.lru_cache(maxsize=None)
+def _namespace(units: bool) -> dict:
+    """The names expressions may use: the NAMES allow-list and, for evaluation, the physical units. No builtins."""
+    import sympy
+
+    namespace: Dict[str, object] = {name: getattr(sympy, name) for name in NAMES}
+    if units:
+        from sympy.physics import units as u
+        namespace.update(
+            (name, value) for name, value in vars(u).items() if isinstance(value, u.Quantity) and len(name) <= 12
+        )
+    namespace["__builtins__"] = {}
+    return namespace
+
+
+def _parse(text: str, units: bool = False):
+    from sympy.parsing.sympy_parser import convert_xor, implicit_multiplication_application, parse_expr, \
+        standard_transformations
+
+    if len(text) > MAX_EXPRESSION:
+        raise MathError(f"Expressions can be at most {MAX_EXPRESSION} characters")
+    if "__" in text or not ALLOWED.fullmatch(text) or ATTRIBUTE.search(text):
+        raise MathError("That expression has characters I can't use")
+    transformations = standard_transformations + (implicit_multiplication_application, convert_xor)
+    try:
+        if "=" in text:
+            left, _, right = text.partition("=")
+            return parse_expr(left, global_dict=_namespace(units), transformations=transformations) - \
+                parse_expr(right, global_dict=_namespace(units), transformations=transformations)
+        return parse_expr(text, global_dict=_namespace(units), transformations=transformations)
+    except tokenize.TokenError:
+        raise MathError(f"I couldn't understand `{text}`: its brackets don't match")
+    except (SyntaxError, TypeError, ValueError, AttributeError, NameError) as e:
+        raise MathError(f"I couldn't understand `{text}`: {e}")
+
+
+def _variable(expression, name: Optional[str]):
+    import sympy
+
+    if name:
+        if not name.isidentifier():
+            raise MathError(f"`{name}` isn't a variable name")
+        return sympy.Symbol(name)
+    free = sorted(expression.free_symbols, key=lambda s: s.name)
+    if not free:
+        raise MathError("There's no variable in that expression")
+    x = sympy.Symbol("x")
+    return x if x in free else free[0]
+
+
+def _format(result) -> Result:
+    import sympy
+
+    return str(result), sympy.latex(result)
+
+
+@functools.lru_cache(maxsize=256)
+def _compute(operation: str, expression, args: tuple) -> Result:
+    """
+    Computes on a parsed expression. SymPy expressions hash by structure, so inputs that only differ in how they were
+    written share one cached result per worker.
+    """
+    import sympy
+
+    if operation == "simplify":
+        return _format(sympy.simplify(expression))
+    if operation == "solve":
+        variable = _variable(expression, args[0])
+        solutions = sympy.solve(expression, variable)
+        if not solutions:
+            return "No solutions", r"\text{No solutions}"
+        text = ", ".join(f"{variable} = {s}" for s in solutions)
+        latex = r",\;\;".join(
+            f"{sympy.latex(variable)}{'_' + str(i) if len(solutions) > 1 else ''} = {sympy.latex(s)}"
+            for i, s in enumerate(solutions, start=1)
+        )
+        return text, latex
+    if operation == "differentiate":
+        variable, order = _variable(expression, args[0]), args[1]
+        return _format(sympy.diff(expression, variable, order))
+    if operation == "integrate":
+        variable, lower, upper = _variable(expression, args[0]), args[1], args[2]
+        if lower is not None and upper is not None:
+            return _format(sympy.integrate(expression, (variable, _parse(lower), _parse(upper))))
+        return _format(sympy.integrate(expression, variable))
+    raise MathError(f"Unknown operation {operation}")
+
+
+def _job(operation: str, text: str, args: tuple) -> Result:
+    from sympy.polys.polyerrors import BasePolynomialError
+
+    try:
+        if operation == "evaluate":
+            from sympy.physics.units import convert_to
+
+            expression = _parse(text, units=True)
+            target = args[0]
+            if target:
+                expression = convert_to(expression, _parse(target, units=True))
+            return _format(expression.evalf(8))
+        return _compute(operation, _parse(text), args)
+    except NotImplementedError:
+        raise MathError(f"I don't know how to {operation} that")
+    # What SymPy raises when an expression it parsed doesn't make sense for the operation, e.g. solving a Lambda or
+    # converting to something that isn't a unit
+    except (ArithmeticError, LookupError, TypeError, ValueError, AttributeError, RecursionError,
+            BasePolynomialError) as e:
+        raise MathError(f"I couldn't {operation} that: {e}")
+
+
+class SymbolicEngine:
+    """
+    Runs SymPy jobs in a WorkerPool, so an expensive integral or a huge power can't stall the gateway, and each job's
+    time and memory are limited. Results, including "I couldn't understand that" errors, are memoized by operation and
+    normalized input in a small LRU; workers also cache by the parsed expression.
+    """
+
+    def __init__(self, workers: int = 2, timeout: float = 8.0, memory: int = 512 * 1024 * 1024):
+        self.workers = WorkerPool(workers, timeout, memory, preload=("sympy", "sympy.physics.units"))
+        self._memo: "collections.OrderedDict[tuple, object]" = collections.OrderedDict()
+
+    async def run(self, operation: str, text: str, *args) -> Result:
+        key = (operation, normalize(text), args)
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            result = self._memo[key]
+        else:
+            try:
+                result = await self.workers.run(_job, operation, key[1], args)
+            except MathError as e:
+                result = e
+            except JobError as e:
+                # Timeouts aren't memoized; the worker might just have been busy
+                raise MathError(f"I gave up on that. {e}")
+            self._memo[key] = result
+            if len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        if isinstance(result, MathError):
+            raise result
+        return result
+
+    def shutdown(self) -> None:
+        self.workers.shutdown()
+
+
+SYMBOLIC = SymbolicEngine()
@@ -0,0 +1,193 @@
+"""
+Load test for ticket creation.
+
+Presses the Create Ticket button many times concurrently against stand-in guild, channel and interaction objects,
+while other data.json writers (report IDs and a bulk edit checkpoint) run alongside, and checks that:
+  - every ticket got a distinct number, and the counter ends at the number of presses
+  - every ticket channel was recorded, and no other writer's changes were lost
+  - each ticket channel was created with one request carrying every permission overwrite
+
+The test runs against a copy of data.json in a temporary directory. It exits with a non-zero status on failure.
+
+Usage:
+    python -m utils.ticketload [--presses N] [--writers N] [--latency SECONDS]
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import sys
+import tempfile
+from typing import Dict, List
+
+from utils import store
+
+GUILD_ID = 920000000000000001
+ROLE_IDS = [920000000000000100 + i for i in range(4)]
+VALID_ROLES, PINGED_ROLES = ROLE_IDS[:2], ROLE_IDS[2:]
+
+
+class FakeHTTP:
+    """Counts the REST calls that would have been sent to Discord, after a random delay like a real request."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = collections.Counter()
+
+    async def request(self, name: str) -> None:
+        self.calls[name] += 1
+        await asyncio.sleep(random.uniform(0, self.latency))
+
+
+class FakeRole:
+    def __init__(self, role_id: int):
+        self.id = role_id
+        self.mention = f"<@&{role_id}>"
+
+
+class FakeChannel:
+    def __init__(self, http: FakeHTTP, channel_id: int, name: str, overwrites: dict):
+        self._http = http
+        self.id = channel_id
+        self.name = name
+        self.overwrites = overwrites
+        self.mention = f"<#{channel_id}>"
+
+    async def send(self, *args, **kwargs):
+        await self._http.request("POST /channels/messages")
+
+    async def set_permissions(self, *args, **kwargs):
+        await self._http.request("PUT /channels/permissions")
+
+
+class FakeGuild:
+    def __init__(self, http: FakeHTTP):
+        self._http = http
+        self.id = GUILD_ID
+        self.default_role = FakeRole(GUILD_ID)
+        self.roles = {role_id: FakeRole(role_id) for role_id in ROLE_IDS}
+        self.channels: List[FakeChannel] = []
+
+    def get_role(self, role_id: int):
+        return self.roles.get(role_id)
+
+    async def create_text_channel(self, name: str, *, overwrites: dict = None, **kwargs) -> FakeChannel:
+        await self._http.request("POST /guilds/channels")
+        channel = FakeChannel(self._http, GUILD_ID + 1000 + len(self.channels), name, dict(overwrites or {}))
+        self.channels.append(channel)
+        return channel
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.name = f"user{user_id}"
+        self.discriminator = "0001"
+
+
+class FakeResponse:
+    def __init__(self, http: FakeHTTP):
+        self._http = http
+
+    async def send_message(self, *args, **kwargs):
+        await self._http.request("POST /interactions/callback")
+
+
+class FakeInteraction:
+    def __init__(self, http: FakeHTTP, guild: FakeGuild, user: FakeUser):
+        self.guild = guild
+        self.user = user
+        self.response = FakeResponse(http)
+
+
+async def report_writer(count: int) -> List[int]:
+    ids = []
+    for _ in range(count):
+        ids.append(await store.next_report_id())
+        await asyncio.sleep(0)
+    return ids
+
+
+async def checkpoint_writer(count: int) -> None:
+    for i in range(count):
+        async with store.edit_data() as data:
+            data.setdefault("load-test-checkpoints", []).append(i)
+        await asyncio.sleep(0)
+
+
+async def run(presses: int, writers: int, latency: float) -> Dict[str, object]:
+    from utils.views import Ticket
+
+    http = FakeHTTP(latency)
+    guild = FakeGuild(http)
+    view = Ticket(None)
+    start = store.load_data()
+
+    results = await asyncio.gather(
+        *(Ticket.ticket(view, None, FakeInteraction(http, guild, FakeUser(i))) for i in range(presses)),
+        *(report_writer(writers) for _ in range(2)),
+        checkpoint_writer(writers),
+        return_exceptions=True
+    )
+    errors = [r for r in results if isinstance(r, BaseException)]
+    report_ids = [i for r in results if isinstance(r, list) for i in r]
+    end = store.load_data()
+
+    numbers = [int(channel.name.rsplit("-", 1)[1]) for channel in guild.channels]
+    first = int(start["ticket-counter"]) + 1
+    failures = []
+    if errors:
+        failures.append(f"{len(errors)} presses or writers raised, first: {errors[0]!r}")
+    if sorted(numbers) != list(range(first, first + presses)):
+        failures.append(f"ticket numbers collided or skipped: {len(set(numbers))} distinct of {presses}")
+    if int(end["ticket-counter"]) != first + presses - 1:
+        failures.append(f"ticket-counter is {end['ticket-counter']}, expected {first + presses - 1}")
+    if len(set(end["ticket-channel-ids"]) - set(start["ticket-channel-ids"])) != presses:
+        failures.append("some ticket channels weren't recorded in ticket-channel-ids")
+    if len(set(report_ids)) != 2 * writers or int(end["report_id"]) != int(start["report_id"]) + 2 * writers:
+        failures.append("report IDs collided or were lost")
+    if len(end.get("load-test-checkpoints", [])) != writers:
+        failures.append("bulk edit checkpoints were lost")
+    if http.calls["PUT /channels/permissions"]:
+        failures.append(f"{http.calls['PUT /channels/permissions']} separate permission overwrite requests were made")
+    if any(len(channel.overwrites) != len(VALID_ROLES) + 2 for channel in guild.channels):
+        failures.append("a ticket channel was created without every overwrite")
+
+    return {"presses": presses, "calls": dict(http.calls), "failures": failures}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Press the Create Ticket button many times at once, offline.")
+    parser.add_argument("--presses", type=int, default=200, help="number of concurrent button presses")
+    parser.add_argument("--writers", type=int, default=50, help="writes made by each concurrent data.json writer")
+    parser.add_argument("--latency", type=float, default=0.05, help="most seconds each fake request takes")
+    args = parser.parse_args()
+
+    with open(store.DATA_FILE) as f:
+        data = json.load(f)
+    data["valid-roles"] = VALID_ROLES
+    data["pinged-roles"] = PINGED_ROLES
+    data["verified-roles"] = []
+    # Extra keys stand in for the rest of the file, which must survive every write untouched
+    data["load-test-untouched"] = list(range(100))
+    store.DATA_FILE = os.path.join(tempfile.mkdtemp(prefix="tms-ticketload-"), "data.json")
+    store.save_data(data)
+
+    result = asyncio.run(run(args.presses, args.writers, args.latency))
+    if store.load_data().get("load-test-untouched") != list(range(100)):
+        result["failures"].append("unrelated data.json keys were overwritten")
+
+    print(f"{result['presses']} concurrent ticket presses")
+    for name, count in sorted(result["calls"].items()):
+        print(f"  would call {name}: {count}")
+    for failure in result["failures"]:
+        print(f"FAIL: {failure}")
+    if result["failures"]:
+        sys.exit(1)
+    print("OK: no counter collisions and no lost writes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
 import datetime
+import functools
+import re
+import time
+from typing import Optional, Tuple, Union
 
 
 def format_relative(dt):
@@ -12,3 +16,120 @@ def format_dt(dt, style=None):
     if style is None:
         return f'<t:{int(dt.timestamp())}>'
     return f'<t:{int(dt.timestamp())}:{style}>'
+
+
+_UNITS = {
+    "s": 1, "sec": 1, "secs": 1, "second": 1, "seconds": 1,
+    "m": 60, "min": 60, "mins": 60, "minute": 60, "minutes": 60,
+    "h": 3600, "hr": 3600, "hrs": 3600, "hour": 3600, "hours": 3600,
+    "d": 86400, "day": 86400, "days": 86400,
+    "w": 604800, "wk": 604800, "wks": 604800, "week": 604800, "weeks": 604800,
+    "mo": 2592000, "month": 2592000, "months": 2592000,
+    "y": 31536000, "yr": 31536000, "yrs": 31536000, "year": 31536000, "years": 31536000,
+}
+_UNIT = "|".join(sorted(_UNITS, key=len, reverse=True))
+_PART = rf"((?<![\d.])\d+(?:\.\d+)?\s*|\ban?\s+)({_UNIT})(?![a-z])"
+_DURATION = re.compile(rf"(?:in\s+)?{_PART}(?:\s*(?:,|and)?\s*{_PART})*(?:\s+from\s+now)?", re.I)
+_PARTS = re.compile(_PART, re.I)
+
+# Unrelated reference times, on different weekdays, at different times of day and in months of different lengths.
+# A fallback result that is the same offset from every one of them is a pure duration.
+_REFERENCES = (
+    datetime.datetime(2001, 1, 1),
+    datetime.datetime(2002, 6, 15, 13, 37, 11),
+    datetime.datetime(2003, 2, 27, 22, 5, 43),
+)
+
+_DATEPARSER_SETTINGS = {"PREFER_DATES_FROM": "future"}
+
+
+def parse_duration(text: str) -> Optional[datetime.timedelta]:
+    """
+    Parses durations such as `1 day`, `2 months, 1 day`, `1h30m` or `in 3 weeks` with a single compiled pattern.
+    Months are 30 days and years are 365 days. Returns None if the text is not a simple duration.
+    """
+    text = text.strip()
+    if not _DURATION.fullmatch(text):
+        return None
+    seconds = 0.0
+    for amount, unit in _PARTS.findall(text):
+        amount = amount.strip()
+        amount = 1 if amount.lower() in ("a", "an") else float(amount)
+        seconds += amount * _UNITS[unit.lower()]
+    return datetime.timedelta(seconds=seconds)
+
+
+def _dateparse(text: str, reference: datetime.datetime) -> Optional[datetime.datetime]:
+    import dateparser
+
+    return dateparser.parse(text, settings={**_DATEPARSER_SETTINGS, "RELATIVE_BASE": reference})
+
+
+@functools.lru_cache(maxsize=512)
+def _fallback(text: str) -> Tuple[str, Optional[Union[datetime.datetime, datetime.timedelta]]]:
+    """
+    Classifies unusual input by parsing it with dateparser against several reference times. Only results that are
+    the same for every reference can be cached and reused later:
+      - "duration", a timedelta: the same offset from every reference, like `next week`
+      - "absolute", a datetime: the same date for every reference, like `2030-01-01`
+      - "invalid", None: dateparser doesn't understand the text
+      - "contextual", None: anything that depends on when it's said, like `5pm` or `friday`, which has to be
+        parsed against the current time on every call
+    """
+    results = [_dateparse(text, reference) for reference in _REFERENCES]
+    if any(result is None for result in results):
+        return "invalid", None
+    if len(set(results)) == 1:
+        return "absolute", results[0]
+    offsets = {result - reference for result, reference in zip(results, _REFERENCES)}
+    if len(offsets) == 1:
+        return "duration", offsets.pop()
+    return "contextual", None
+
+
+def parse_time(text: str, now: Optional[datetime.datetime] = None) -> Optional[datetime.datetime]:
+    """
+    Converts a length of time or a date into the (naive, local) time it refers to.
+    Common durations are handled by `parse_duration`; anything else falls back to dateparser, whose result is cached
+    unless it depends on the current time.
+    """
+    now = now or datetime.datetime.now()
+    delta = parse_duration(text)
+    if delta is not None:
+        return now + delta
+    text = text.strip().lower()
+    kind, result = _fallback(text)
+    if kind == "duration":
+        return now + result
+    if kind == "contextual":
+        return _dateparse(text, now)
+    return result
+
+
+def benchmark(iterations: int = 2000) -> None:
+    """Compares the compiled grammar, the cached fallback and uncached dateparser on common mute and ban lengths."""
+    import dateparser
+
+    samples = ["10 minutes", "30 minutes", "1 hour", "2 hours", "8 hours", "1 day", "4 days", "7 days", "1 month",
+               "1 year", "2 months, 1 day", "1h30m", "in 3 weeks"]
+
+    start = time.perf_counter()
+    dateparser.parse("1 day")
+    print(f"dateparser first call: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for name, parse in [
+        ("grammar", parse_time),
+        ("cached fallback", lambda t: _fallback(t)),
+        ("dateparser", lambda t: dateparser.parse(t, settings=_DATEPARSER_SETTINGS)),
+    ]:
+        runs = iterations if name != "dateparser" else max(1, iterations // 20)
+        start = time.perf_counter()
+        for _ in range(runs):
+            for sample in samples:
+                parse(sample)
+        elapsed = time.perf_counter() - start
+        print(f"{name}: {elapsed / (runs * len(samples)) * 1e6:.2f} us per call")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,202 @@
+import asyncio
+import datetime
+import gzip
+import html
+import json
+import logging
+import os
+from typing import List, Optional
+
+import discord
+
+from utils.search import SEARCH_INDEX, make_entry
+from utils.store import edit_data
+from utils.variables import CHANNEL_CLOSED_REPORTS
+
+log = logging.getLogger(__name__)
+
+TRANSCRIPT_DIR = "transcripts"
+TRANSCRIPT_INDEX = os.path.join(TRANSCRIPT_DIR, "index.jsonl")
+
+# Discord rejects messages whose uploads add up to more than 8 MiB for servers without boosts
+UPLOAD_LIMIT = 8 * 1024 * 1024
+
+HTML_HEAD = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ background: #36393f; color: #dcddde; font-family: sans-serif; }}
+.message {{ padding: 4px 0; }}
+.author {{ font-weight: bold; color: #fff; }}
+.time {{ color: #72767d; font-size: 0.8em; margin-left: 6px; }}
+.content {{ white-space: pre-wrap; }}
+a {{ color: #00aff4; }}
+</style>
+</head>
+<body>
+<h2>{title}</h2>
+"""
+
+HTML_FOOT = "</body>\n</html>\n"
+
+
+class TranscriptWriter:
+    """
+    Writes a transcript as gzipped JSON lines and gzipped HTML.
+    All file access happens in the default executor so the event loop is never blocked on disk writes.
+    """
+
+    def __init__(self, name: str, title: str):
+        self.name = name
+        self.title = title
+        self.jsonl_path = os.path.join(TRANSCRIPT_DIR, f"{name}.jsonl.gz")
+        self.html_path = os.path.join(TRANSCRIPT_DIR, f"{name}.html.gz")
+        self.count = 0
+        self._jsonl = None
+        self._html = None
+        self._loop = asyncio.get_event_loop()
+
+    def _open(self) -> None:
+        os.makedirs(TRANSCRIPT_DIR, exist_ok=True)
+        self._jsonl = gzip.open(self.jsonl_path, "wt", encoding="utf-8")
+        self._html = gzip.open(self.html_path, "wt", encoding="utf-8")
+        self._html.write(HTML_HEAD.format(title=html.escape(self.title)))
+
+    def _write(self, records: List[dict]) -> None:
+        for record in records:
+            self._jsonl.write(json.dumps(record) + "\n")
+            self._html.write(self.render_html(record))
+
+    def _close(self) -> None:
+        self._html.write(HTML_FOOT)
+        self._jsonl.close()
+        self._html.close()
+
+    async def open(self) -> None:
+        await self._loop.run_in_executor(None, self._open)
+
+    async def write(self, records: List[dict], channel_id: Optional[int] = None) -> None:
+        self.count += len(records)
+        await self._loop.run_in_executor(None, self._write, records)
+        await SEARCH_INDEX.add_many(
+            make_entry("transcript", r["content"], user_id=r["author_id"], channel_id=channel_id,
+                       created_at=datetime.datetime.fromisoformat(r["created_at"]), url=self.html_path)
+            for r in records
+        )
+
+    async def close(self) -> None:
+        await self._loop.run_in_executor(None, self._close)
+
+    @staticmethod
+    def render_html(record: dict) -> str:
+        attachments = "".join(
+            f'<div><a href="{html.escape(a["url"])}">{html.escape(a["filename"])}</a></div>'
+            for a in record["attachments"]
+        )
+        return (
+            f'<div class="message"><span class="author">{html.escape(record["author"])}</span>'
+            f'<span class="time">{html.escape(record["created_at"])}</span>'
+            f'<div class="content">{html.escape(record["content"])}</div>{attachments}</div>\n'
+        )
+
+
+def message_record(message: discord.Message) -> dict:
+    """Converts a message into the JSON serializable record stored in transcripts."""
+    return {
+        "id": message.id,
+        "author": str(message.author),
+        "author_id": message.author.id,
+        "created_at": message.created_at.isoformat(),
+        "content": message.content,
+        "attachments": [{"filename": a.filename, "url": a.url} for a in message.attachments],
+        "embeds": [e.to_dict() for e in message.embeds],
+    }
+
+
+async def export_channel(channel: discord.TextChannel, name: str, page_size: int = 100) -> TranscriptWriter:
+    """
+    Streams the full history of a channel, oldest first, into a transcript.
+    Only one page of messages is held in memory at a time, so very long channels are exported in bounded memory.
+    """
+    writer = TranscriptWriter(name, f"Transcript of #{channel.name}")
+    await writer.open()
+    page = []
+    try:
+        async for message in channel.history(limit=None, oldest_first=True):
+            page.append(message_record(message))
+            if len(page) >= page_size:
+                await writer.write(page, channel.id)
+                page = []
+        if page:
+            await writer.write(page, channel.id)
+    finally:
+        await writer.close()
+    return writer
+
+
+def _append_index(entry: dict) -> None:
+    os.makedirs(TRANSCRIPT_DIR, exist_ok=True)
+    with open(TRANSCRIPT_INDEX, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+async def archive_ticket(channel: discord.TextChannel, closed_by: discord.abc.User) -> Optional[discord.Message]:
+    """
+    Exports a ticket channel's transcript, records it in the transcript index and uploads it to the closed reports
+    channel. Returns the closed reports message, if one could be sent.
+    """
+    closed_at = discord.utils.utcnow()
+    name = f"{channel.name.split('│', 1)[-1]}-{channel.id}"
+    writer = await export_channel(channel, name)
+
+    entry = {
+        "name": name,
+        "channel_id": channel.id,
+        "channel_name": channel.name,
+        "closed_by": closed_by.id,
+        "closed_at": closed_at.isoformat(),
+        "messages": writer.count,
+        "jsonl": writer.jsonl_path,
+        "html": writer.html_path,
+    }
+    await asyncio.get_event_loop().run_in_executor(None, _append_index, entry)
+
+    closed_reports = discord.utils.get(channel.guild.text_channels, id=CHANNEL_CLOSED_REPORTS)
+    if closed_reports is None:
+        return None
+
+    embed = discord.Embed(
+        title="Ticket Closed",
+        description=f"`#{channel.name}` was closed by {closed_by.mention}.",
+        color=0x00a8ff,
+        timestamp=closed_at
+    )
+    embed.add_field(name="Messages", value=str(writer.count))
+    # The limit is on the whole message, so attach the HTML first and the JSON lines only if both fit
+    files, size = [], 0
+    for path in (writer.html_path, writer.jsonl_path):
+        size += os.path.getsize(path)
+        if size > UPLOAD_LIMIT:
+            break
+        files.append(discord.File(path))
+    if len(files) < 2:
+        embed.add_field(name="Transcript", value=f"Too large to upload, stored as `{name}` on the bot host.")
+    return await closed_reports.send(embed=embed, files=files)
+
+
+async def close_ticket(channel: discord.TextChannel, closed_by: discord.abc.User) -> None:
+    """
+    Archives a ticket and deletes its channel. The ticket is closed even if archiving fails, since a transcript that
+    can't be saved or uploaded shouldn't leave the ticket open for good.
+    """
+    try:
+        await archive_ticket(channel, closed_by)
+    except Exception:
+        log.exception("Failed to archive ticket %s, closing it anyway", channel.id)
+    await channel.delete()
+
+    async with edit_data() as data:
+        if channel.id in data["ticket-channel-ids"]:
+            data["ticket-channel-ids"].remove(channel.id)
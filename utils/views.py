@@ -2,9 +2,10 @@ import datetime
 import re
 
 import discord
-import json
 import asyncio
-from typing import List
+from typing import List, Optional
+from utils.store import edit_data, load_data, next_ticket_number
+from utils.transcripts import close_ticket
 from utils.variables import *
 
 
@@ -60,65 +61,45 @@ class Ticket(discord.ui.View):
 
     @discord.ui.button(label='\U0001f4e9 Create Ticket', custom_id="ticket", style=discord.ButtonStyle.secondary)
     async def ticket(self, button: discord.ui.Button, interaction: discord.Interaction):
-        with open("data.json") as f:
-            data = json.load(f)
-
-            ticket_number = int(data["ticket-counter"])
-            ticket_number += 1
-
-            ticket_channel = await interaction.guild.create_text_channel("\U0001f4e9│ticket-{}".format(ticket_number))
-            await ticket_channel.set_permissions(interaction.guild.get_role(interaction.guild.id), send_messages=False,
-                                                 read_messages=False)
-
-            for role_id in data["valid-roles"]:
-                role = interaction.guild.get_role(role_id)
-
-                await ticket_channel.set_permissions(role, send_messages=True, read_messages=True,
-                                                     add_reactions=True,
-                                                     embed_links=True, attach_files=True,
-                                                     read_message_history=True,
-                                                     external_emojis=True)
-
-                await ticket_channel.set_permissions(interaction.user, send_messages=True, read_messages=True,
-                                                     add_reactions=True,
-                                                     embed_links=True, attach_files=True,
-                                                     read_message_history=True,
-                                                     external_emojis=True)
-
-                pinged_msg_content = ""
-                non_mentionable_roles = []
-
-                if data["pinged-roles"] != []:
-
-                    for role_id in data["pinged-roles"]:
-                        role = interaction.guild.get_role(role_id)
-
-                        pinged_msg_content += role.mention
-                        pinged_msg_content += " "
-
-                        if role.mentionable:
-                            pass
-                        else:
-                            await role.edit(mentionable=True)
-                            non_mentionable_roles.append(role)
-
-                message_content = "Please wait and a moderator will assist you! To close this ticket press the `Close` button below"
-                em = discord.Embed(
-                    title="New ticket from {}#{}".format(interaction.user.name, interaction.user.discriminator),
-                    description=f"{message_content} {pinged_msg_content}", color=0x00a8ff)
-                view1 = Close(self.bot)
-
-                data["ticket-channel-ids"].append(ticket_channel.id)
-                data["ticket-counter"] = int(ticket_number)
-                with open("data.json", 'w') as f:
-                    json.dump(data, f)
-
-                    em3 = discord.Embed(title="TMS Tickets",
-                                        description="Your ticket has been created at {}".format(
-                                            ticket_channel.mention),
-                                        color=0x00a8ff)
-                    await interaction.response.send_message(embed=em3, ephemeral=True)
-                return await ticket_channel.send(embed=em, view=view1)
+        data = load_data()
+        guild = interaction.guild
+
+        # Build every permission overwrite up front so the channel is created with a single request
+        access = discord.PermissionOverwrite(send_messages=True, read_messages=True,
+                                             add_reactions=True,
+                                             embed_links=True, attach_files=True,
+                                             read_message_history=True,
+                                             external_emojis=True)
+        overwrites = {guild.default_role: discord.PermissionOverwrite(send_messages=False, read_messages=False)}
+        for role_id in data["valid-roles"]:
+            role = guild.get_role(role_id)
+            if role is not None:
+                overwrites[role] = access
+        overwrites[interaction.user] = access
+
+        pinged_roles = [r for r in map(guild.get_role, data["pinged-roles"]) if r is not None]
+        pinged_msg_content = " ".join(role.mention for role in pinged_roles)
+
+        ticket_number = await next_ticket_number()
+        ticket_channel = await guild.create_text_channel("\U0001f4e9│ticket-{}".format(ticket_number),
+                                                         overwrites=overwrites)
+        async with edit_data() as data:
+            data["ticket-channel-ids"].append(ticket_channel.id)
+
+        em3 = discord.Embed(title="TMS Tickets",
+                            description="Your ticket has been created at {}".format(
+                                ticket_channel.mention),
+                            color=0x00a8ff)
+        await interaction.response.send_message(embed=em3, ephemeral=True)
+
+        message_content = "Please wait and a moderator will assist you! To close this ticket press the `Close` button below"
+        em = discord.Embed(
+            title="New ticket from {}#{}".format(interaction.user.name, interaction.user.discriminator),
+            description=f"{message_content} {pinged_msg_content}", color=0x00a8ff)
+        view1 = Close(self.bot)
+        # Mentions inside embeds never ping, so the roles are mentioned in the message content instead
+        return await ticket_channel.send(content=pinged_msg_content or None, embed=em, view=view1,
+                                         allowed_mentions=discord.AllowedMentions(roles=pinged_roles))
 
 
 class Close(discord.ui.View):
@@ -129,38 +110,33 @@ class Close(discord.ui.View):
 
     @discord.ui.button(label='Close', custom_id="close", style=discord.ButtonStyle.danger)
     async def close(self, button: discord.ui.Button, interaction: discord.Interaction):
-        with open('data.json') as f:
-            data = json.load(f)
+        data = load_data()
 
-            if interaction.channel.id in data["ticket-channel-ids"]:
+        if interaction.channel.id in data["ticket-channel-ids"]:
 
-                channel_id = interaction.channel.id
-                channel = interaction.channel
+            channel = interaction.channel
 
-                def check(message):
-                    return message.author == interaction.user and message.channel == interaction.channel and message.content.lower() == "close"
-
-                try:
+            def check(message):
+                return message.author == interaction.user and message.channel == interaction.channel and message.content.lower() == "close"
 
-                    em = discord.Embed(title="TMS Tickets",
-                                       description="Are you sure you want to close this ticket? Reply with `close` if you are sure.",
-                                       color=0x00a8ff)
-
-                    await interaction.response.send_message(embed=em)
-                    await self.bot.wait_for('message', check=check, timeout=60)
-                    await channel.delete()
+            try:
 
-                    index = data["ticket-channel-ids"].index(channel_id)
-                    del data["ticket-channel-ids"][index]
+                em = discord.Embed(title="TMS Tickets",
+                                   description="Are you sure you want to close this ticket? Reply with `close` if you are sure.",
+                                   color=0x00a8ff)
 
-                    with open('data.json', 'w') as f:
-                        json.dump(data, f)
+                await interaction.response.send_message(embed=em)
+                await self.bot.wait_for('message', check=check, timeout=60)
+                await channel.send(embed=discord.Embed(title="TMS Tickets",
+                                                       description="Saving a transcript of this ticket...",
+                                                       color=0x00a8ff))
+                await close_ticket(channel, interaction.user)
 
-                except asyncio.TimeoutError:
-                    em = discord.Embed(title="TMS Tickets",
-                                       description="You have run out of time to close this ticket. Please press the red `Close` button again.",
-                                       color=0x00a8ff)
-                    await channel.send(embed=em)
+            except asyncio.TimeoutError:
+                em = discord.Embed(title="TMS Tickets",
+                                   description="You have run out of time to close this ticket. Please press the red `Close` button again.",
+                                   color=0x00a8ff)
+                await channel.send(embed=em)
 
 
 class TicTacToeButton(discord.ui.Button['TicTacToe']):
@@ -662,6 +638,8 @@ class NukeStopButton(discord.ui.Button["Nuke"]):
 
     async def callback(self, interaction: discord.Interaction):
         self.nuke.stopped = True
+        if self.nuke.job is not None:
+            self.nuke.job.cancel()
         self.style = discord.ButtonStyle.green
         self.label = "ABORTED"
         self.disabled = True
@@ -672,15 +650,21 @@ class NukeStopButton(discord.ui.Button["Nuke"]):
         embed.title = "NUKE COMMAND PANEL"
         embed.colour = discord.Colour.brand_green()
         embed.timestamp = discord.utils.utcnow()
+        self.nuke.aborted = embed
         await interaction.response.edit_message(embed=embed, view=None, content=None)
         self.nuke.stop()
 
 
 class Nuke(discord.ui.View):
-    stopped = False
+    """Lets the commander abort a nuke, both during the countdown and while its PurgeJob is running."""
 
     def __init__(self, ctx):
-        super().__init__()
+        # Stays up for the whole purge, which can outlast the default timeout; the command stops it when it's done
+        super().__init__(timeout=None)
+        self.stopped = False
+        self.job = None
+        # The panel shown once aborted, so a progress edit racing the abort can put it back
+        self.aborted: Optional[discord.Embed] = None
         button = NukeStopButton(self, ctx)
         self.add_item(button)
         self.author = ctx.author
@@ -776,7 +760,6 @@ class ReportView(discord.ui.View):
         if interaction.channel.id == CHANNEL_REPORTS:
             await interaction.response.defer()
             await interaction.message.delete()
-            print("Handled by staff")
         else:
             await interaction.response.defer()
 
@@ -785,7 +768,6 @@ class ReportView(discord.ui.View):
         if interaction.channel.id == CHANNEL_REPORTS:
             await interaction.response.defer()
             await interaction.message.delete()
-            print("Cleared with no action")
         else:
             await interaction.response.defer()
 
@@ -809,7 +791,6 @@ class CronSelect(discord.ui.Select):
     def __init__(self, docs, bot, ctx):
         options = []
         docs.sort(key=lambda d: d['time'])
-        print([d['time'] for d in docs])
         counts = {}
         for doc in docs[:20]:
             timeframe = (doc['time'] - datetime.datetime.now()).days
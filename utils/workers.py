@@ -0,0 +1,91 @@
+import asyncio
+import concurrent.futures
+import importlib
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Sequence, Tuple
+
+
+class JobError(Exception):
+    """A job couldn't finish in a worker: it ran too long, ran out of memory, or its worker died."""
+
+
+class _Timeout(BaseException):
+    # Not an Exception, so library code with broad `except Exception` handlers can't swallow it
+    pass
+
+
+def _timeout(signum, frame):
+    raise _Timeout()
+
+
+def _initialize(budget: int, preload: Tuple[str, ...]) -> None:
+    """
+    Imports the modules jobs need, so the import isn't paid for (or timed out) by the first job, and then caps the
+    worker's address space at its size at that point plus `budget`, where the platform allows it.
+    """
+    for module in preload:
+        importlib.import_module(module)
+    try:
+        import resource
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = current + budget
+        resource.setrlimit(resource.RLIMIT_AS, (limit if hard == resource.RLIM_INFINITY else min(limit, hard), hard))
+    except (ImportError, OSError, ValueError):
+        pass
+
+
+def _call(function: Callable, timeout: float, args: tuple) -> Any:
+    # Workers run jobs on their main thread, so an interval timer can interrupt one that runs too long
+    signal.signal(signal.SIGALRM, _timeout)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return function(*args)
+    except _Timeout:
+        raise JobError("It took too long to finish")
+    except MemoryError:
+        raise JobError("It needed too much memory")
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+class WorkerPool:
+    """
+    A process pool for CPU heavy jobs, so they use more than one core and never block the event loop.
+    Each job is interrupted after `timeout` seconds and each worker's memory is capped at `memory` bytes more than it
+    started with, after importing the `preload` modules. If a worker dies anyway the pool is replaced on the next job.
+    Jobs must be module level functions.
+    """
+
+    def __init__(self, workers: int, timeout: float, memory: int, preload: Sequence[str] = ()):
+        self.workers = workers
+        self.timeout = timeout
+        self.memory = memory
+        self.preload = tuple(preload)
+        self._pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+    @property
+    def pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = concurrent.futures.ProcessPoolExecutor(
+                self.workers, initializer=_initialize, initargs=(self.memory, self.preload)
+            )
+        return self._pool
+
+    async def run(self, function: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, _call, function, self.timeout, args)
+        try:
+            # The worker times itself out; this only catches a worker that stopped responding entirely
+            return await asyncio.wait_for(future, self.timeout + 5)
+        except (BrokenProcessPool, asyncio.TimeoutError):
+            self.shutdown()
+            raise JobError("The worker crashed, please try again")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None